@@ -4,11 +4,14 @@ from datetime import datetime, timedelta, timezone
 import jwt
 from flask import Blueprint, current_app, jsonify, request
 
-from middleware.auth_middleware import enhanced_token_required, rate_limit
+from core.operation_policy import policy_collection
+from middleware.auth_middleware import enhanced_token_required
 from models.user import User
 from services.auth_service import AuthService
 from services.email_service import EmailService
 from utils.auth_utils import token_required
+from utils.hashing_pool import HashingPoolBusy
+from utils.password_utils import password_hasher
 from utils.validators import input_validator
 
 logger = logging.getLogger(__name__)
@@ -31,9 +34,6 @@ def serialize_user(user_dict):
 
 
 @auth_bp.route("/login", methods=["POST", "OPTIONS"])
-@rate_limit(
-    max_requests=5, window_minutes=5, per="ip"
-)  # 5 attempts per 5 minutes per IP
 def login():
     """Enhanced login endpoint with security features"""
     if request.method == "OPTIONS":
@@ -99,6 +99,8 @@ def login():
             ),
             401,
         )
+    except HashingPoolBusy:
+        raise  # Answered with 503 + Retry-After by the app error handler
     except Exception as e:
         logger.error(f"Login error: {str(e)}")
         return (
@@ -117,9 +119,6 @@ def login():
 @auth_bp.route(
     "/signup", methods=["POST", "OPTIONS"]
 )  # Add signup alias for frontend compatibility
-@rate_limit(
-    max_requests=3, window_minutes=10, per="ip"
-)  # 3 registrations per 10 minutes per IP
 def register():
     """Enhanced registration endpoint with password validation and email verification"""
     if request.method == "OPTIONS":
@@ -198,6 +197,8 @@ def register():
             ),
             400,
         )
+    except HashingPoolBusy:
+        raise
     except Exception as e:
         logger.error(f"Registration error: {str(e)}")
         return (
@@ -361,7 +362,7 @@ def resend_verification():
 
         # Find user
         user_model = User()
-        user = user_model.find_by_email(email)
+        user = user_model.find_by_email(email, User.CONTACT_VIEW)
 
         if not user:
             return (
@@ -394,7 +395,7 @@ def resend_verification():
         from utils.database import get_db
 
         db = get_db()
-        verification_tokens = db.verification_tokens
+        verification_tokens = policy_collection(db, "verification_tokens")
 
         # Remove old tokens
         verification_tokens.delete_many({"user_id": str(user["_id"])})
@@ -467,7 +468,7 @@ def forgot_password():
 
         # Find user
         user_model = User()
-        user = user_model.find_by_email(email)
+        user = user_model.find_by_email(email, User.CONTACT_VIEW)
 
         if not user:
             # Don't reveal if user exists or not for security
@@ -509,7 +510,7 @@ def forgot_password():
         from utils.database import get_db
 
         db = get_db()
-        reset_tokens = db.reset_tokens
+        reset_tokens = policy_collection(db, "reset_tokens")
 
         # Remove old reset tokens
         reset_tokens.delete_many({"user_id": str(user["_id"])})
@@ -563,6 +564,7 @@ def forgot_password():
 @auth_bp.route("/reset-password", methods=["POST"])
 def reset_password():
     """Reset password using reset token"""
+    new_hash = None
     try:
         data = request.get_json()
 
@@ -613,11 +615,18 @@ def reset_password():
                 400,
             )
 
+        # Only a signed reset token may start a hash; it runs while the token
+        # and user are looked up, and is cancelled or discarded on every path
+        # that does not store it
+        is_valid, message = auth_service.validate_password_strength(new_password)
+        if is_valid:
+            new_hash = password_hasher.submit_hash(new_password)
+
         # Check if token exists and is not used
         from utils.database import get_db
 
         db = get_db()
-        reset_tokens = db.reset_tokens
+        reset_tokens = policy_collection(db, "reset_tokens")
 
         token_doc = reset_tokens.find_one(
             {
@@ -640,7 +649,6 @@ def reset_password():
             )
 
         # Validate new password
-        is_valid, message = auth_service.validate_password_strength(new_password)
         if not is_valid:
             return (
                 jsonify(
@@ -655,7 +663,7 @@ def reset_password():
 
         # Get user and update password
         user_model = User()
-        user = user_model.find_by_id(payload["user_id"])
+        user = user_model.find_by_id(payload["user_id"], User.AUTH_VIEW)
 
         if not user or not user.get("is_active"):
             return (
@@ -670,13 +678,7 @@ def reset_password():
             )
 
         # Update password
-        user_model.update_user(
-            str(user["_id"]),
-            {
-                "password_hash": user_model.hash_password(new_password),
-                "updated_at": datetime.now(timezone.utc),
-            },
-        )
+        user_model.set_password_hash(str(user["_id"]), password_hasher.result(new_hash))
 
         # Mark reset token as used
         reset_tokens.update_one({"_id": token_doc["_id"]}, {"$set": {"is_used": True}})
@@ -691,6 +693,8 @@ def reset_password():
             200,
         )
 
+    except HashingPoolBusy:
+        raise
     except Exception as e:
         logger.error(f"Reset password error: {str(e)}")
         return (
@@ -703,6 +707,9 @@ def reset_password():
             ),
             500,
         )
+    finally:
+        if new_hash is not None:
+            new_hash.cancel()
 
 
 @auth_bp.route("/verify", methods=["GET"])
@@ -712,6 +719,10 @@ def verify():
     try:
         user = request.current_user
 
+        # The decorator only loads the authorization view (or, for stateless
+        # tokens, reads it from the claims); the client needs the profile
+        user = User().find_by_id_cached(str(user["_id"]))
+
         return (
             jsonify(
                 {
@@ -782,7 +793,7 @@ def update_profile():
             )
 
         # Get updated user
-        updated_user = user_model.find_by_id(str(user["_id"]))
+        updated_user = user_model.find_by_id(str(user["_id"]), User.PROFILE_VIEW)
 
         return (
             jsonify(
@@ -827,6 +838,10 @@ def change_password():
         old_password = data["old_password"]
         new_password = data["new_password"]
 
+        is_valid, message = auth_service.validate_password_strength(new_password)
+        if not is_valid:
+            return jsonify({"error": message, "status": "error"}), 400
+
         user_model = User()
         success = user_model.change_password(
             str(user["_id"]), old_password, new_password
@@ -845,6 +860,8 @@ def change_password():
 
     except ValueError as e:
         return jsonify({"error": str(e), "status": "error"}), 400
+    except HashingPoolBusy:
+        raise
     except Exception as e:
         logger.error(f"Change password error: {str(e)}")
         return (
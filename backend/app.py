@@ -7,10 +7,13 @@ from flask_cors import CORS
 
 from api.auth import auth_bp
 from config import config
-from core.database import db_manager, init_database
+from core.health import health_monitor
 from core.responses import APIResponse, ErrorResponses
 from core.security import SecurityMiddleware
+from middleware.rate_limit_policy import init_rate_limiting
 from models.user import User
+from utils.cache import user_cache
+from utils.hashing_pool import HashingPoolBusy, init_password_hashing
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -30,6 +33,9 @@ def create_app(config_name=None):
     # Load configuration
     app.config.from_object(config[config_name])
 
+    # Pick the bcrypt cost for this node before anything hashes
+    init_password_hashing(app)
+
     # Enable CORS for frontend communication - Unified for dev and production
     cors_origins = [
         "http://localhost:5173",  # Vite dev server
@@ -91,12 +97,14 @@ def create_app(config_name=None):
                     400,
                 )
 
-    # Initialize database
-    try:
-        init_database()
-        logger.info("Database initialized successfully")
-    except Exception as e:
-        logger.error(f"Failed to initialize database: {str(e)}")
+    # Rate limit every request from the configured policy table
+    init_rate_limiting(app)
+
+    # The database connects on first use and indexes are applied by
+    # "python manage.py migrate" (or once per schema version when
+    # DB_AUTO_MIGRATE is set), keeping startup free of network round trips.
+    # Health endpoints read the state a background monitor keeps current.
+    health_monitor.init_app(app)
 
     # Register blueprints
     app.register_blueprint(auth_bp)
@@ -211,6 +219,21 @@ def create_app(config_name=None):
             500,
         )
 
+    @app.errorhandler(HashingPoolBusy)
+    def handle_hashing_pool_busy(e):
+        """Shed password hashing load instead of queueing it"""
+        logger.warning("Password hashing pool is full, rejecting request")
+        response = jsonify(
+            {
+                "status": "error",
+                "message": "Service is busy. Please try again shortly.",
+                "errors": {"server": "Too many concurrent password operations"},
+            }
+        )
+        response.status_code = 503
+        response.headers["Retry-After"] = str(e.retry_after)
+        return response
+
     @app.errorhandler(Exception)
     def handle_unexpected_error(e):
         """Handle any unexpected errors"""
@@ -276,6 +299,8 @@ def create_app(config_name=None):
                 "api_name": "CoreConnect API",
                 "documentation": "/docs",
                 "health_check": "/health",
+                "liveness": "/health/live",
+                "readiness": "/health/ready",
             },
             message="CoreConnect API is running",
         )
@@ -283,7 +308,7 @@ def create_app(config_name=None):
     @app.route("/health")
     def health_check():
         """Comprehensive health check endpoint."""
-        health_data = db_manager.health_check()
+        health_data = health_monitor.snapshot()
 
         return (
             APIResponse.success(
@@ -298,11 +323,29 @@ def create_app(config_name=None):
             else ErrorResponses.service_unavailable("Database connection issues")
         )
 
+    @app.route("/health/live")
+    def liveness():
+        """Liveness probe: the process serves requests (never touches the database)"""
+        return APIResponse.success(data={"status": "alive"}, message="Service is alive")
+
+    @app.route("/health/ready")
+    def readiness():
+        """Readiness probe from the monitor's last database check"""
+        health_data = health_monitor.snapshot()
+        if health_monitor.ready(health_data):
+            return APIResponse.success(
+                data={"status": "ready", "database": health_data},
+                message="Service is ready",
+            )
+        return ErrorResponses.service_unavailable(
+            "Service is not ready", details={"database": health_data}
+        )
+
     @app.route("/api/health")
     def api_health_check():
         """API-specific health check endpoint for deployment monitoring."""
         try:
-            health_data = db_manager.health_check()
+            health_data = health_monitor.snapshot()
 
             # Check critical components
             checks = {
@@ -352,7 +395,7 @@ def create_app(config_name=None):
         """Get detailed API status for deployment monitoring"""
         try:
             # Gather system information
-            health_data = db_manager.health_check()
+            health_data = health_monitor.snapshot()
 
             status_info = {
                 "api_version": "1.0.0",
@@ -369,6 +412,7 @@ def create_app(config_name=None):
                     "health": "available",
                     "cors": "configured",
                 },
+                "caches": {"users": user_cache.stats()},
                 "deployment": {
                     "platform": (
                         "render" if os.getenv("RENDER_EXTERNAL_URL") else "unknown"
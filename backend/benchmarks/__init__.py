@@ -0,0 +1,5 @@
+"""
+Micro-benchmarks for the authentication hot paths.
+
+Run with ``python -m benchmarks --help`` from the backend directory.
+"""
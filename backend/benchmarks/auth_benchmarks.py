@@ -0,0 +1,417 @@
+"""
+Cost per request of the rate limit policy hook and the login lockout checks.
+
+Each target is run for every combination of store (in-memory stand-in or a
+real MongoDB), seeded collection size and number of concurrent threads, and
+reported as throughput plus p50/p99 latency.
+"""
+
+import argparse
+import ipaddress
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from flask import Flask
+
+from config import Config
+from core.database import create_auth_indexes, get_mongo_client
+from core.memory_store import MemoryDatabase
+from middleware.rate_limit_policy import ALGORITHM_BACKENDS, init_rate_limiting
+from services.auth_service import AuthService
+
+logger = logging.getLogger(__name__)
+
+TARGETS = ("baseline", "rate_limit", "lockout_check", "lockout_record")
+STORES = ("memory", "mongo")
+# RATE_LIMIT_POLICY_BACKEND[:algorithm] of the rate_limit target's policy
+BACKENDS = tuple(
+    f"{backend}:{algorithm}" if algorithm != "token_bucket" else backend
+    for algorithm in ALGORITHM_BACKENDS
+    for backend in ("memory", "mongo")
+)
+SEED_CHUNK_SIZE = 10000
+FIRST_CLIENT_IP = int(ipaddress.IPv4Address("198.51.100.0"))
+
+# Pipeline updates are not emulated by the in-memory stand-in
+MEMORY_STORE_UNSUPPORTED = {"mongo", "mongo:sliding_counter"}
+
+
+class BenchmarkResult(NamedTuple):
+    target: str
+    backend: str
+    store: str
+    size: int
+    concurrency: int
+    operations: int
+    errors: int
+    ops_per_sec: float
+    p50_ms: float
+    p99_ms: float
+
+
+def parse_count(value: str) -> int:
+    """Parse counts such as "1000", "10k" or "10m" """
+    value = value.strip().lower()
+    multiplier = {"k": 1000, "m": 1000000}.get(value[-1:], 1)
+    if multiplier != 1:
+        value = value[:-1]
+    return int(float(value) * multiplier)
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(int(fraction * len(sorted_values)), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def run_concurrent(
+    operation: Callable[[int], None], operations: int, concurrency: int
+) -> Tuple[List[float], float, int]:
+    """
+    Run operation(i) for i in range(operations) spread over concurrency threads.
+
+    Returns the per-operation latencies in seconds, the wall clock time and the
+    number of operations that raised.
+    """
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    barrier = threading.Barrier(concurrency + 1)
+
+    def worker(offset: int):
+        local_latencies = []
+        local_errors = 0
+        barrier.wait()
+        for i in range(offset, operations, concurrency):
+            start = time.perf_counter()
+            try:
+                operation(i)
+            except Exception:
+                local_errors += 1
+            local_latencies.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+
+    threads = [
+        threading.Thread(target=worker, args=(offset,), daemon=True)
+        for offset in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return latencies, elapsed, errors[0]
+
+
+def _insert_in_chunks(collection, documents: Iterator[dict]):
+    chunk = []
+    for document in documents:
+        chunk.append(document)
+        if len(chunk) >= SEED_CHUNK_SIZE:
+            collection.insert_many(chunk, ordered=False)
+            chunk = []
+    if chunk:
+        collection.insert_many(chunk, ordered=False)
+
+
+def seed_collections(db, size: int):
+    """Fill rate_limits and failed_attempts with size documents each"""
+    now = datetime.now(timezone.utc)
+    seed_keys = max(size // 10, 1)
+
+    _insert_in_chunks(
+        db["rate_limits"],
+        (
+            {
+                "key": f"seed|{i}",
+                "identifier": f"seed-{i % seed_keys}",
+                "endpoint": "bench",
+                "timestamp": now,
+            }
+            for i in range(size)
+        ),
+    )
+    _insert_in_chunks(
+        db["failed_attempts"],
+        (
+            {
+                "email": f"seed{i % seed_keys}@bench.invalid",
+                "attempted_at": now - timedelta(seconds=i % 3600),
+                "ip_address": None,
+            }
+            for i in range(size)
+        ),
+    )
+
+
+def prepare_database(store: str, size: int, mongo_db=None):
+    """Get an empty, indexed and seeded database for one run"""
+    if store == "memory":
+        db = MemoryDatabase()
+    else:
+        db = mongo_db
+        for name in ("rate_limits", "failed_attempts"):
+            db.drop_collection(name)
+        create_auth_indexes(db)
+
+    seed_collections(db, size)
+    return db
+
+
+def _client_ip(i: int, hot_keys: int) -> str:
+    return str(ipaddress.IPv4Address(FIRST_CLIENT_IP + i % hot_keys))
+
+
+def make_request_operation(
+    db, backend: Optional[str], hot_keys: int
+) -> Callable[[int], None]:
+    """
+    Build an operation that serves one request to a trivial view.
+
+    With a backend ("memory", "mongo:fixed_window", ...) the app enforces a
+    one-policy table of that algorithm (default token_bucket), through the
+    same before_request hook as production, with a rate high enough that
+    every request is allowed; without one it measures the Flask request
+    overhead that rate_limit numbers should be compared to.
+    """
+    app = Flask("benchmarks")
+    app.config.from_object(Config)
+
+    def view():
+        return "ok"
+
+    app.add_url_rule("/bench", "bench", view)
+
+    if backend is not None:
+        policy_backend, _, algorithm = backend.partition(":")
+        app.config["RATE_LIMIT_POLICY_BACKEND"] = policy_backend
+        app.config["RATE_LIMIT_POLICIES"] = [
+            {
+                "name": "bench",
+                "pattern": "/bench",
+                "rate": f"{10**9}/m",
+                "algorithm": algorithm or "token_bucket",
+            }
+        ]
+        init_rate_limiting(app, collection_getter=lambda: db.rate_limits)
+
+    def operation(i: int):
+        with app.test_request_context(
+            "/bench", environ_base={"REMOTE_ADDR": _client_ip(i, hot_keys)}
+        ):
+            if app.preprocess_request() is None:
+                view()
+
+    return operation
+
+
+def make_lockout_operation(db, target: str, hot_keys: int) -> Callable[[int], None]:
+    """Build an operation calling the lockout check or the failed attempt record"""
+    service = AuthService()
+    service.db = db
+    emails = [f"user{n}@bench.invalid" for n in range(hot_keys)]
+
+    if target == "lockout_check":
+        return lambda i: service._is_email_locked(emails[i % hot_keys])
+    return lambda i: service._record_failed_attempt(emails[i % hot_keys])
+
+
+def run_benchmarks(
+    targets: Iterable[str],
+    backends: Iterable[str],
+    stores: Iterable[str],
+    sizes: Iterable[int],
+    concurrency_levels: Iterable[int],
+    operations: int,
+    hot_keys: int = 100,
+    mongo_db=None,
+    report: Optional[Callable[[BenchmarkResult], None]] = None,
+) -> List[BenchmarkResult]:
+    """Run every target/backend/store/size/concurrency combination"""
+    targets = list(targets)
+    backends = list(backends)
+    results = []
+
+    for store in stores:
+        for size in sizes:
+            for target in targets:
+                if target == "rate_limit":
+                    target_backends = backends
+                elif target == "baseline":
+                    target_backends = [None]
+                else:
+                    target_backends = ["auth_service"]
+
+                for backend in target_backends:
+                    if store == "memory" and backend in MEMORY_STORE_UNSUPPORTED:
+                        logger.warning(
+                            f"Skipping {backend}: not supported by the memory store"
+                        )
+                        continue
+
+                    for concurrency in concurrency_levels:
+                        # Fresh data per run so earlier writes do not skew it
+                        db = prepare_database(store, size, mongo_db)
+                        if target in ("baseline", "rate_limit"):
+                            operation = make_request_operation(db, backend, hot_keys)
+                        else:
+                            operation = make_lockout_operation(db, target, hot_keys)
+
+                        # Warm up caches, connections and lazily built limiters
+                        run_concurrent(operation, min(operations, 100), 1)
+
+                        latencies, elapsed, errors = run_concurrent(
+                            operation, operations, concurrency
+                        )
+                        latencies.sort()
+                        result = BenchmarkResult(
+                            target=target,
+                            backend=backend or "-",
+                            store=store,
+                            size=size,
+                            concurrency=concurrency,
+                            operations=operations,
+                            errors=errors,
+                            ops_per_sec=operations / elapsed if elapsed else 0.0,
+                            p50_ms=percentile(latencies, 0.50) * 1000,
+                            p99_ms=percentile(latencies, 0.99) * 1000,
+                        )
+                        results.append(result)
+                        if report is not None:
+                            report(result)
+
+    return results
+
+
+ROW_FORMAT = "{:<15} {:<22} {:<7} {:>10} {:>5} {:>12} {:>10} {:>10} {:>7}"
+
+
+def format_header() -> str:
+    return ROW_FORMAT.format(
+        "target",
+        "backend",
+        "store",
+        "size",
+        "conc",
+        "ops/sec",
+        "p50 ms",
+        "p99 ms",
+        "errors",
+    )
+
+
+def format_result(result: BenchmarkResult) -> str:
+    return ROW_FORMAT.format(
+        result.target,
+        result.backend,
+        result.store,
+        result.size,
+        result.concurrency,
+        f"{result.ops_per_sec:,.0f}",
+        f"{result.p50_ms:.3f}",
+        f"{result.p99_ms:.3f}",
+        result.errors,
+    )
+
+
+def _csv(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark the rate limit policy hook and login lockout checks.",
+    )
+    parser.add_argument(
+        "--targets",
+        default=",".join(TARGETS),
+        help=f"Comma separated targets (default: all of {', '.join(TARGETS)})",
+    )
+    parser.add_argument(
+        "--backends",
+        default=",".join(BACKENDS),
+        help="Policy backends[:algorithm] for the rate_limit target (default: all)",
+    )
+    parser.add_argument(
+        "--stores",
+        default="memory",
+        help="memory (in-process stand-in), mongo, or both comma separated",
+    )
+    parser.add_argument(
+        "--sizes",
+        default="1k,100k",
+        help="Seeded documents per collection, e.g. 1k,100k,1m,10m",
+    )
+    parser.add_argument(
+        "--concurrency", default="1,4,16", help="Thread counts to run with"
+    )
+    parser.add_argument(
+        "--operations", type=parse_count, default=2000, help="Operations per run"
+    )
+    parser.add_argument(
+        "--hot-keys",
+        type=int,
+        default=100,
+        help="Distinct client IPs / emails the operations cycle through",
+    )
+    parser.add_argument("--mongo-uri", default=Config.MONGO_URI)
+    parser.add_argument(
+        "--mongo-db",
+        default="coreconnect_benchmark",
+        help="Database to use; its rate_limits and failed_attempts are dropped",
+    )
+    parser.add_argument("--json", dest="json_path", help="Also write results here")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    targets = _csv(args.targets)
+    stores = _csv(args.stores)
+    for name, values, allowed in (
+        ("target", targets, TARGETS),
+        ("store", stores, STORES),
+    ):
+        unknown = set(values) - set(allowed)
+        if unknown:
+            raise SystemExit(f"Unknown {name}: {', '.join(sorted(unknown))}")
+
+    mongo_db = None
+    if "mongo" in stores:
+        client = get_mongo_client({**vars(Config), "MONGO_URI": args.mongo_uri})
+        client.admin.command("ping")
+        mongo_db = client[args.mongo_db]
+
+    print(format_header())
+    results = run_benchmarks(
+        targets=targets,
+        backends=_csv(args.backends),
+        stores=stores,
+        sizes=[parse_count(size) for size in _csv(args.sizes)],
+        concurrency_levels=[int(level) for level in _csv(args.concurrency)],
+        operations=args.operations,
+        hot_keys=args.hot_keys,
+        mongo_db=mongo_db,
+        report=lambda result: print(format_result(result), flush=True),
+    )
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump([result._asdict() for result in results], f, indent=2)
+
+    return 0
@@ -0,0 +1,93 @@
+"""
+Per-call cost of the password policy check.
+
+Times PasswordPolicy.check() for passwords of increasing length, both ones
+that pass and ones that fail several rules, and reports microseconds per call.
+"""
+
+import argparse
+import json
+import time
+from typing import Callable, List, NamedTuple, Optional
+
+from benchmarks.auth_benchmarks import parse_count
+from utils.password_policy import password_policy
+
+SAMPLE_PASSWORDS = (
+    ("valid_12", "Tr0ub4dor&3x"),
+    ("valid_32", "c0rrect-Horse-battery-St4ple-xyz"),
+    ("valid_128", ("Zq7!mR2#vK9$wL4%" * 8)),
+    ("weak_8", "aaaaaaaa"),
+    ("weak_common", "Password123"),
+    ("weak_128", "a" * 128),
+)
+
+
+class PolicyResult(NamedTuple):
+    name: str
+    length: int
+    valid: bool
+    calls: int
+    us_per_call: float
+
+
+def time_calls(fn: Callable[[], object], calls: int) -> float:
+    """Seconds per call of fn, the best of three runs"""
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        elapsed = (time.perf_counter() - start) / calls
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_policy_benchmark(calls: int) -> List[PolicyResult]:
+    results = []
+    for name, password in SAMPLE_PASSWORDS:
+        # Maps the breached password filter before timing
+        valid = password_policy.check(password).valid
+        seconds = time_calls(lambda: password_policy.check(password), calls)
+        results.append(
+            PolicyResult(name, len(password), valid, calls, seconds * 1000000)
+        )
+    return results
+
+
+ROW_FORMAT = "{:<12} {:>6} {:>6} {:>10} {:>10}"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.password_policy",
+        description="Benchmark the password policy check.",
+    )
+    parser.add_argument(
+        "--calls", type=parse_count, default=20000, help="Calls per password"
+    )
+    parser.add_argument("--json", dest="json_path", help="Also write results here")
+    args = parser.parse_args(argv)
+
+    print(ROW_FORMAT.format("password", "length", "valid", "calls", "us/call"))
+    results = run_policy_benchmark(args.calls)
+    for result in results:
+        print(
+            ROW_FORMAT.format(
+                result.name,
+                result.length,
+                str(result.valid),
+                result.calls,
+                f"{result.us_per_call:.2f}",
+            )
+        )
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump([result._asdict() for result in results], f, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
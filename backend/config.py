@@ -1,3 +1,4 @@
+import json
 import os
 
 from dotenv import load_dotenv
@@ -15,6 +16,40 @@ class Config:
     # MongoDB Configuration
     MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/coreconnect")
     MONGO_DBNAME = os.getenv("MONGO_DBNAME", "coreconnect")
+    # One pooled MongoClient per process, shared by every request and both
+    # database layers. Compressors missing their optional package are skipped.
+    MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 100))
+    MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", 0))
+    MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", 60000))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", 5000))
+    MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "zstd,snappy,zlib")
+    # Apply pending index migrations on a process's first database use (one
+    # marker lookup once migrated); disable when deploys run manage.py migrate
+    DB_AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "True").lower() == "true"
+    # Seconds before a process retries a failed automatic migration
+    DB_MIGRATE_RETRY_INTERVAL = float(os.getenv("DB_MIGRATE_RETRY_INTERVAL", 300))
+    # "mongo", or "memory" for a process-local store (load tests, benchmarks);
+    # the memory store is not shared between processes and is lost on exit
+    DB_BACKEND = os.getenv("DB_BACKEND", "mongo")
+    # Write concern (w, j, wtimeout) and read preference (read_preference,
+    # max_staleness_seconds of -1 or >= 90) per operation class: access_log,
+    # audit (rate limits, failed logins), credentials (accounts, passwords,
+    # tokens), stats and profile (cached profile reads). Unlisted classes use
+    # the client defaults. w=0 only suits access_log, since the rate limit
+    # counters read their own writes.
+    DB_OPERATION_POLICIES = json.loads(os.getenv("DB_OPERATION_POLICIES", "null")) or {
+        "access_log": {"w": 1},
+        "audit": {"w": 1},
+        "credentials": {"w": "majority", "read_preference": "primary"},
+        "stats": {"read_preference": "secondaryPreferred", "max_staleness_seconds": 90},
+        "profile": {
+            "read_preference": "secondaryPreferred",
+            "max_staleness_seconds": 90,
+        },
+    }
+    # Seconds between background database checks behind the health endpoints
+    # (0 checks on every request instead)
+    HEALTH_CHECK_INTERVAL = float(os.getenv("HEALTH_CHECK_INTERVAL", 10))
 
     # JWT Configuration
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", SECRET_KEY)
@@ -24,6 +59,14 @@ class Config:
     JWT_REFRESH_TOKEN_EXPIRES = int(
         os.getenv("JWT_REFRESH_TOKEN_EXPIRES", 604800)
     )  # 7 days
+    # Embed is_active/is_verified/role/token_epoch in access tokens so protected
+    # routes can authorize without reading the user document
+    STATELESS_ACCESS_TOKENS = (
+        os.getenv("STATELESS_ACCESS_TOKENS", "False").lower() == "true"
+    )
+    TOKEN_EPOCH_REFRESH_INTERVAL = int(os.getenv("TOKEN_EPOCH_REFRESH_INTERVAL", 30))
+    # Verified JWT payloads kept in memory until the token expires
+    TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
 
     # Email Configuration
     MAIL_SERVER = os.getenv("MAIL_SERVER", "smtp.gmail.com")
@@ -37,11 +80,142 @@ class Config:
     FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
 
     # Security Configuration
+    # Bloom filter built with "python manage.py build-breached-filter"
+    BREACHED_PASSWORDS_PATH = os.getenv(
+        "BREACHED_PASSWORDS_PATH",
+        os.path.join(os.path.dirname(__file__), "data", "breached_passwords.bloom"),
+    )
+    # Password policy shared by registration, password changes and validators
+    PASSWORD_MIN_LENGTH = int(os.getenv("PASSWORD_MIN_LENGTH", 8))
+    PASSWORD_MAX_LENGTH = int(os.getenv("PASSWORD_MAX_LENGTH", 128))
+    PASSWORD_REQUIRED_CLASSES = os.getenv(
+        "PASSWORD_REQUIRED_CLASSES", "uppercase,lowercase,digit,special"
+    )
+    PASSWORD_SPECIAL_CHARACTERS = os.getenv(
+        "PASSWORD_SPECIAL_CHARACTERS", '!@#$%^&*(),.?":{}|<>_-+=[]\\/~`'
+    )
+    PASSWORD_FORBIDDEN_SEQUENCES = os.getenv(
+        "PASSWORD_FORBIDDEN_SEQUENCES", "password,admin"
+    )
+    # Runs of this many identical characters are rejected (0 disables)
+    PASSWORD_MAX_REPEATS = int(os.getenv("PASSWORD_MAX_REPEATS", 3))
+
+    # Scheme for new password hashes (bcrypt | scrypt). Hashes of any
+    # registered scheme still verify and are upgraded on login.
+    PASSWORD_HASH_SCHEME = os.getenv("PASSWORD_HASH_SCHEME", "bcrypt")
+    SCRYPT_N = int(os.getenv("SCRYPT_N", 16384))
+    SCRYPT_R = int(os.getenv("SCRYPT_R", 8))
+    SCRYPT_P = int(os.getenv("SCRYPT_P", 1))
     BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+    # Replace BCRYPT_ROUNDS at startup with the cost that takes about
+    # BCRYPT_TARGET_MS on this node; older hashes are upgraded on login
+    BCRYPT_CALIBRATE = os.getenv("BCRYPT_CALIBRATE", "False").lower() == "true"
+    BCRYPT_TARGET_MS = float(os.getenv("BCRYPT_TARGET_MS", 250))
+    BCRYPT_MIN_ROUNDS = int(os.getenv("BCRYPT_MIN_ROUNDS", 10))
+    # Uncalibrated, BCRYPT_ROUNDS is the fleet target: login rehashes and
+    # hash-audit --mark (or its --rounds) move every other cost to it, so
+    # lowering it cuts login CPU. Calibrated nodes only upgrade cheaper
+    # hashes and downgrade those dearer than BCRYPT_MAX_ROUNDS.
+    BCRYPT_MAX_ROUNDS = int(os.getenv("BCRYPT_MAX_ROUNDS", 14))
+    BCRYPT_REHASH_ON_LOGIN = (
+        os.getenv("BCRYPT_REHASH_ON_LOGIN", "True").lower() == "true"
+    )
+    # Process pool that runs bcrypt off the request threads. At most
+    # workers + queue size hashes are admitted; the rest get a 503.
+    HASHING_POOL_ENABLED = os.getenv("HASHING_POOL_ENABLED", "True").lower() == "true"
+    HASHING_POOL_WORKERS = int(os.getenv("HASHING_POOL_WORKERS", 0)) or None
+    HASHING_POOL_QUEUE_SIZE = int(os.getenv("HASHING_POOL_QUEUE_SIZE", 32))
+    HASHING_POOL_RETRY_AFTER = int(os.getenv("HASHING_POOL_RETRY_AFTER", 1))
+    HASHING_POOL_TIMEOUT = float(os.getenv("HASHING_POOL_TIMEOUT", 30))
     RATE_LIMIT_PER_MINUTE = int(os.getenv("RATE_LIMIT_PER_MINUTE", 60))
+    # Backend of the rate_limit decorator:
+    # memory | memory_counter | memory_fixed | mongo | mongo_fixed | mongo_counter
+    RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100000))
+    # Peers whose X-Forwarded-For / X-Real-IP headers are believed (CIDR list)
+    TRUSTED_PROXIES = [
+        cidr.strip()
+        for cidr in os.getenv(
+            "TRUSTED_PROXIES",
+            "127.0.0.0/8,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16,::1/128,fc00::/7",
+        ).split(",")
+        if cidr.strip()
+    ]
+
+    # Rate limit policies applied to every request by one before_request hook.
+    # Exact paths or glob patterns; per = ip | user | email; rate = "N/[k]s|m|h|d";
+    # algorithm = token_bucket (default, honours burst) | sliding_log |
+    # sliding_counter | fixed_window.
+    # memory (per process) | mongo (shared by every node in rate_limits; with
+    # DB_BACKEND=memory, token_bucket and sliding_counter become fixed_window)
+    RATE_LIMIT_POLICY_BACKEND = os.getenv("RATE_LIMIT_POLICY_BACKEND", "memory")
+    RATE_LIMIT_POLICIES = json.loads(os.getenv("RATE_LIMIT_POLICIES", "null")) or [
+        {
+            "name": "login",
+            "pattern": "/api/auth/login",
+            "per": "ip",
+            "rate": "5/5m",
+            "burst": 5,
+        },
+        {
+            "name": "register",
+            "patterns": ["/api/auth/register", "/api/auth/signup"],
+            "per": "ip",
+            "rate": "3/10m",
+            "burst": 3,
+        },
+        {
+            "name": "password-reset",
+            "patterns": ["/api/auth/forgot-password", "/api/auth/resend-verification"],
+            "per": "email",
+            "rate": "5/15m",
+            "burst": 5,
+        },
+        {
+            "name": "api",
+            "pattern": "/api/*",
+            "per": "user",
+            "rate": f"{RATE_LIMIT_PER_MINUTE}/m",
+            "burst": RATE_LIMIT_PER_MINUTE,
+        },
+    ]
     MAX_LOGIN_ATTEMPTS = int(os.getenv("MAX_LOGIN_ATTEMPTS", 5))
     LOCKOUT_DURATION = int(os.getenv("LOCKOUT_DURATION", 1800))  # 30 minutes
 
+    # Authenticated user cache used by the token decorators. Entries are
+    # invalidated on local writes; other workers see changes after the TTL.
+    USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 10000))
+    USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", 60))
+    # Seconds a user written on this worker is reloaded from the primary rather
+    # than a lagging secondary; keep at least the profile max_staleness_seconds
+    USER_PRIMARY_AFTER_WRITE = float(os.getenv("USER_PRIMARY_AFTER_WRITE", 90))
+
+    # /api/stats reads counters maintained on every user write, cached per
+    # process; a full recount corrects drift once per interval (0 disables)
+    USER_STATS_CACHE_TTL = float(os.getenv("USER_STATS_CACHE_TTL", 10))
+    USER_STATS_RECONCILE_INTERVAL = int(
+        os.getenv("USER_STATS_RECONCILE_INTERVAL", 3600)
+    )
+
+    # Access logs are queued and written in batches by a background thread
+    ACCESS_LOG_ASYNC = os.getenv("ACCESS_LOG_ASYNC", "True").lower() == "true"
+    ACCESS_LOG_QUEUE_SIZE = int(os.getenv("ACCESS_LOG_QUEUE_SIZE", 10000))
+    ACCESS_LOG_BATCH_SIZE = int(os.getenv("ACCESS_LOG_BATCH_SIZE", 500))
+    ACCESS_LOG_FLUSH_INTERVAL = float(os.getenv("ACCESS_LOG_FLUSH_INTERVAL", 1.0))
+    # Keep one entry in N while the queue is above its high watermark
+    ACCESS_LOG_SAMPLE_RATE = int(os.getenv("ACCESS_LOG_SAMPLE_RATE", 10))
+
+    # Retention for ephemeral auth collections, enforced by MongoDB TTL indexes.
+    # Seconds after the indexed timestamp (tokens: after expires_at).
+    TTL_RETENTION = {
+        "rate_limits": int(os.getenv("RATE_LIMIT_RETENTION", 86400)),  # 1 day
+        "failed_attempts": int(os.getenv("FAILED_ATTEMPT_RETENTION", 86400)),
+        "access_logs": int(os.getenv("ACCESS_LOG_RETENTION", 7776000)),  # 90 days
+        "verification_tokens": int(os.getenv("VERIFICATION_TOKEN_RETENTION", 0)),
+        "reset_tokens": int(os.getenv("RESET_TOKEN_RETENTION", 0)),
+        "refresh_tokens": int(os.getenv("REFRESH_TOKEN_RETENTION", 0)),
+    }
+
 
 class DevelopmentConfig(Config):
     """Development configuration."""
@@ -9,6 +9,8 @@ from typing import Any, Dict, Optional
 import jwt
 from flask import current_app
 
+from utils.auth_utils import decode_token_cached
+
 from ..database.collections import RefreshTokenCollection
 
 
@@ -93,9 +95,7 @@ class TokenService:
     def verify_token(self, token: str) -> Optional[Dict[str, Any]]:
         """Verify and decode JWT token"""
         try:
-            payload = jwt.decode(
-                token, current_app.config["JWT_SECRET_KEY"], algorithms=["HS256"]
-            )
+            payload = decode_token_cached(token, current_app.config["JWT_SECRET_KEY"])
             return payload
         except jwt.ExpiredSignatureError:
             return None
@@ -138,5 +138,5 @@ class TokenService:
         return self.refresh_token_collection.revoke_all_for_user(str(user_id))
 
     def cleanup_expired_tokens(self) -> int:
-        """Clean up expired refresh tokens"""
+        """Clean up expired refresh tokens (normally done by the expires_at TTL index)"""
         return self.refresh_token_collection.cleanup_expired()
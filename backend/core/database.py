@@ -3,39 +3,167 @@ Database connection and utilities for CoreConnect.
 Provides MongoDB connection management and database operations.
 """
 
+import importlib.util
 import logging
 import os
-from typing import Optional
+import socket
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Mapping, Optional, Tuple
 
 from flask import current_app
 from pymongo import MongoClient
 from pymongo.database import Database
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
 
+from config import Config
+from core.indexes import ensure_indexes
+from core.memory_store import get_memory_database
+
 logger = logging.getLogger(__name__)
 
 
+# Packages pymongo needs for each wire compressor (zlib is built in)
+COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": None}
+
+
+def available_compressors(names: str) -> List[str]:
+    """The configured compressors whose optional package is installed"""
+    available = []
+    for name in (item.strip() for item in names.split(",")):
+        if name not in COMPRESSOR_MODULES:
+            continue
+        module = COMPRESSOR_MODULES[name]
+        if module is None or importlib.util.find_spec(module) is not None:
+            available.append(name)
+    return available
+
+
+def _current_config() -> Mapping[str, Any]:
+    try:
+        return current_app.config
+    except RuntimeError:
+        return vars(Config)
+
+
+class MongoClientFactory:
+    """
+    Process-wide MongoClients, one per distinct URI and pool settings.
+
+    Every request shares the client's connection pool instead of opening its
+    own. Clients are dropped in a forked child (pre-fork servers), which then
+    connects on first use, since PyMongo clients are not fork-safe.
+    """
+
+    def __init__(self):
+        self._reset()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._clients: Dict[Tuple, MongoClient] = {}
+
+    @staticmethod
+    def client_options(config: Mapping[str, Any]) -> Dict[str, Any]:
+        options = {
+            "maxPoolSize": config.get("MONGO_MAX_POOL_SIZE", 100),
+            "minPoolSize": config.get("MONGO_MIN_POOL_SIZE", 0),
+            "maxIdleTimeMS": config.get("MONGO_MAX_IDLE_TIME_MS", 60000) or None,
+            "waitQueueTimeoutMS": config.get("MONGO_WAIT_QUEUE_TIMEOUT_MS", 5000)
+            or None,
+            "serverSelectionTimeoutMS": 5000,
+            "connectTimeoutMS": 10000,
+            "socketTimeoutMS": 10000,
+        }
+        compressors = available_compressors(config.get("MONGO_COMPRESSORS", "zlib"))
+        if compressors:
+            options["compressors"] = ",".join(compressors)
+        return options
+
+    def get_client(self, config: Optional[Mapping[str, Any]] = None) -> MongoClient:
+        """Shared client for config (default: the app's, else Config)"""
+        config = _current_config() if config is None else config
+        uri = config.get("MONGO_URI", Config.MONGO_URI)
+        options = self.client_options(config)
+        key = (uri, tuple(sorted(options.items())))
+
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    client = MongoClient(uri, **options)
+                    self._clients[key] = client
+                    logger.info(
+                        f"Created MongoDB client pool (maxPoolSize "
+                        f"{options['maxPoolSize']}, compressors "
+                        f"{options.get('compressors', 'none')})"
+                    )
+        return client
+
+    def close(self):
+        with self._lock:
+            clients, self._clients = self._clients, {}
+        for client in clients.values():
+            client.close()
+
+
+mongo_clients = MongoClientFactory()
+
+
+def get_mongo_client(config: Optional[Mapping[str, Any]] = None) -> MongoClient:
+    """Process-wide pooled MongoClient"""
+    return mongo_clients.get_client(config)
+
+
+DB_BACKENDS = ("mongo", "memory")
+
+
+def open_database(config: Optional[Mapping[str, Any]] = None):
+    """The configured DB_BACKEND's database: MongoDB or the in-process store"""
+    config = _current_config() if config is None else config
+    backend = config.get("DB_BACKEND", "mongo")
+    name = config.get("MONGO_DBNAME", Config.MONGO_DBNAME)
+    if backend == "memory":
+        return get_memory_database(name)
+    if backend != "mongo":
+        raise ValueError(f"Unknown database backend: {backend}")
+    return get_mongo_client(config)[name]
+
+
+def supports_pipeline_updates(config: Optional[Mapping[str, Any]] = None) -> bool:
+    """Whether the DB_BACKEND database runs update pipelines (the memory store does not)"""
+    config = _current_config() if config is None else config
+    return config.get("DB_BACKEND", "mongo") != "memory"
+
+
 class DatabaseManager:
-    """Manages MongoDB connections and operations."""
+    """
+    Manages MongoDB connections and operations.
+
+    A forked child forgets the parent's client and database, like
+    MongoClientFactory, and connects again on first use.
+    """
 
     def __init__(self):
-        self._client: Optional[MongoClient] = None
-        self._database: Optional[Database] = None
+        self._reset()
         self.connection_string = None
         self.database_name = None
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset)
 
-    def _get_config(self):
-        """Get configuration from Flask app or environment variables."""
-        try:
-            # Try to get from Flask app config first
-            self.connection_string = current_app.config.get("MONGO_URI")
-            self.database_name = current_app.config.get("MONGO_DBNAME")
-        except RuntimeError:
-            # Fallback to environment variables if no app context
-            self.connection_string = os.getenv(
-                "MONGO_URI", "mongodb://localhost:27017/coreconnect"
-            )
-            self.database_name = os.getenv("MONGO_DBNAME", "coreconnect")
+    def _reset(self):
+        self._client: Optional[MongoClient] = None
+        self._database: Optional[Database] = None
+
+    def _get_config(self) -> Mapping[str, Any]:
+        """Get configuration from Flask app or the default config."""
+        config = _current_config()
+        self.connection_string = config.get("MONGO_URI")
+        self.database_name = config.get("MONGO_DBNAME")
+        return config
 
     def connect(self) -> bool:
         """
@@ -45,14 +173,13 @@ class DatabaseManager:
             bool: True if connection successful, False otherwise
         """
         try:
-            self._get_config()
+            config = self._get_config()
+            if config.get("DB_BACKEND", "mongo") == "memory":
+                self._database = open_database(config)
+                logger.info(f"Using in-memory database: {self.database_name}")
+                return True
 
-            self._client = MongoClient(
-                self.connection_string,
-                serverSelectionTimeoutMS=5000,
-                connectTimeoutMS=10000,
-                socketTimeoutMS=10000,
-            )
+            self._client = get_mongo_client(config)
 
             # Test the connection
             self._client.admin.command("ping")
@@ -78,24 +205,33 @@ class DatabaseManager:
     def disconnect(self):
         """Close the MongoDB connection."""
         if self._client:
-            self._client.close()
-            self._client = None
-            self._database = None
+            mongo_clients.close()
             logger.info("Disconnected from MongoDB")
+        self._client = None
+        self._database = None
 
     def get_database(self) -> Optional[Database]:
         """
-        Get the database instance.
+        Get the database instance, connecting on first use.
 
         Returns:
             Database: MongoDB database instance or None if not connected
         """
         if self._database is None:
-            if self.connect():
-                return self._database
-            return None
+            if not self.connect():
+                return None
+            ensure_migrated(self._database)
         return self._database
 
+    def ping(self):
+        """One round trip to the server (a no-op for the in-memory backend)"""
+        self._database.command("ping")
+
+    def server_version(self) -> str:
+        if self._client is None:
+            return "memory"
+        return self._client.server_info().get("version")
+
     def health_check(self) -> dict:
         """
         Check database health and connectivity.
@@ -104,13 +240,22 @@ class DatabaseManager:
             dict: Health status information
         """
         try:
-            if self._database is None:
+            if self.get_database() is None:
                 return {
                     "status": "disconnected",
                     "message": "Not connected to database",
                     "connected": False,
                 }
 
+            if self._client is None:
+                return {
+                    "status": "healthy",
+                    "message": "Using the in-memory database",
+                    "connected": True,
+                    "backend": "memory",
+                    "database_name": self.database_name,
+                }
+
             # Ping the database
             self._client.admin.command("ping")
 
@@ -150,62 +295,107 @@ def get_db() -> Optional[Database]:
 
 def init_database() -> bool:
     """
-    Initialize database connection.
+    Connect and apply pending migrations; for deploy steps, not app startup.
 
     Returns:
         bool: True if initialization successful, False otherwise
     """
     success = db_manager.connect()
     if success:
-        # Create indexes for authentication collections
-        create_auth_indexes()
+        migrate(db_manager.get_database())
     return success
 
 
-def create_auth_indexes():
-    """Create necessary indexes for authentication collections."""
-    try:
-        db = get_db()
-        if db is None:
-            return
+# Bump when create_auth_indexes changes so the next deployment re-applies it
+SCHEMA_VERSION = 2
+MIGRATIONS_COLLECTION = "schema_migrations"
+MIGRATION_MARKER_ID = "auth_indexes"
+
+_migration_lock = threading.Lock()
+_migration_checked = False
+_migration_retry_at = 0.0  # time.monotonic() before which a failure is not retried
+
+
+def applied_schema_version(db: Database) -> int:
+    """Schema version recorded by the last migration, 0 if none ran"""
+    marker = db[MIGRATIONS_COLLECTION].find_one({"_id": MIGRATION_MARKER_ID})
+    return marker.get("version", 0) if marker else 0
+
 
-        # Users collection indexes
-        db.users.create_index("email", unique=True)
-        db.users.create_index("created_at")
+def migrate(db: Database, force: bool = False) -> bool:
+    """
+    Create the indexes this version needs, once per schema version.
 
-        # Refresh tokens indexes
-        db.refresh_tokens.create_index("user_id")
-        db.refresh_tokens.create_index("expires_at")
-        db.refresh_tokens.create_index("revoked")
+    Index creation is idempotent, so running this concurrently from several
+    instances is safe; the marker document only lets later processes skip it.
+    Returns whether the indexes were (re)applied.
+    """
+    if not force and applied_schema_version(db) >= SCHEMA_VERSION:
+        return False
+
+    if not create_auth_indexes(db):
+        raise RuntimeError("Database indexes could not be created")
+
+    db[MIGRATIONS_COLLECTION].update_one(
+        {"_id": MIGRATION_MARKER_ID},
+        {
+            "$set": {
+                "version": SCHEMA_VERSION,
+                "applied_at": datetime.now(timezone.utc),
+                "host": socket.gethostname(),
+            }
+        },
+        upsert=True,
+    )
+    logger.info(f"Applied database schema version {SCHEMA_VERSION}")
+    return True
 
-        # Verification tokens indexes
-        db.verification_tokens.create_index("user_id")
-        db.verification_tokens.create_index("token", unique=True)
-        db.verification_tokens.create_index("expires_at")
 
-        # Reset tokens indexes
-        db.reset_tokens.create_index("user_id")
-        db.reset_tokens.create_index("token", unique=True)
-        db.reset_tokens.create_index("expires_at")
+def ensure_migrated(db: Database):
+    """
+    Migrate on this process's first database use if DB_AUTO_MIGRATE is set.
+
+    After the first deployment this is a single marker lookup per process.
+    Failures are logged, never fail the request that triggered it, and are
+    retried after DB_MIGRATE_RETRY_INTERVAL seconds rather than per request.
+    """
+    global _migration_checked, _migration_retry_at
+    if _migration_checked or time.monotonic() < _migration_retry_at:
+        return
+    config = _current_config()
+    if not config.get("DB_AUTO_MIGRATE", True):
+        return
+
+    with _migration_lock:
+        if _migration_checked or time.monotonic() < _migration_retry_at:
+            return
+        try:
+            migrate(db)
+            _migration_checked = True
+        except Exception as e:
+            retry_interval = config.get("DB_MIGRATE_RETRY_INTERVAL", 300)
+            _migration_retry_at = time.monotonic() + retry_interval
+            logger.error(
+                f"Database migration check failed, retrying in "
+                f"{retry_interval:.0f}s: {e}"
+            )
 
-        # Failed attempts indexes
-        db.failed_attempts.create_index("email")
-        db.failed_attempts.create_index("ip_address")
-        db.failed_attempts.create_index("created_at")
 
-        # Rate limits indexes
-        db.rate_limits.create_index("key", unique=True)
-        db.rate_limits.create_index("reset_time")
+def create_auth_indexes(db: Optional[Database] = None) -> bool:
+    """Create the indexes declared in core.indexes, including TTL indexes."""
+    try:
+        db = get_db() if db is None else db
+        if db is None:
+            return False
 
-        # Access logs indexes
-        db.access_logs.create_index("user_id")
-        db.access_logs.create_index("ip_address")
-        db.access_logs.create_index("timestamp")
+        ensure_indexes(db)
 
         logger.info("Successfully created database indexes")
+        return True
 
     except Exception as e:
         logger.error(f"Failed to create database indexes: {e}")
+        return False
 
 
 def close_database():
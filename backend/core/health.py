@@ -0,0 +1,149 @@
+"""
+Background database health monitor behind the health, liveness and readiness
+endpoints, so probes are answered from memory
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from config import Config
+from core.database import DatabaseManager, db_manager
+
+logger = logging.getLogger(__name__)
+
+
+class HealthMonitor:
+    """
+    Checks the database every interval seconds on a daemon thread and keeps
+    the latest result: status, ping latency and server version.
+
+    The server version is only fetched after a (re)connection. An interval of
+    0 disables the thread and checks on every snapshot instead. A snapshot
+    older than max_staleness intervals (e.g. the thread died) is reported as
+    stale and not ready.
+    """
+
+    def __init__(
+        self,
+        manager: DatabaseManager,
+        interval: float = 10.0,
+        max_staleness: float = 3.0,
+    ):
+        self.manager = manager
+        self.interval = interval
+        self.max_staleness = max_staleness
+        self._app = None
+        self._reset_state()
+
+        if hasattr(os, "register_at_fork"):
+            # The parent's thread does not exist in a child
+            os.register_at_fork(after_in_child=self._reset_state)
+
+    def _reset_state(self):
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._state: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0  # time.monotonic() of the last check
+        self._server_version: Optional[str] = None
+        self._failures = 0
+
+    def init_app(self, app):
+        """Check within app's context, at its HEALTH_CHECK_INTERVAL"""
+        self._app = app
+        self.interval = app.config.get("HEALTH_CHECK_INTERVAL", self.interval)
+
+    def check(self) -> Dict[str, Any]:
+        """Probe the database once and store the result"""
+        if self._app is not None:
+            with self._app.app_context():
+                return self._check()
+        return self._check()
+
+    def _check(self) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            if self.manager.get_database() is None:
+                raise ConnectionError("Not connected to database")
+            self.manager.ping()
+            latency_ms = (time.perf_counter() - start) * 1000
+
+            if self._server_version is None:
+                self._server_version = self.manager.server_version()
+            self._failures = 0
+            state = {
+                "status": "healthy",
+                "message": "Database connection is healthy",
+                "connected": True,
+                "latency_ms": round(latency_ms, 2),
+                "server_version": self._server_version,
+                "database_name": self.manager.database_name,
+            }
+        except Exception as e:
+            self._server_version = None  # Re-read after reconnecting
+            self._failures += 1
+            state = {
+                "status": "unhealthy",
+                "message": f"Database health check failed: {str(e)}",
+                "connected": False,
+                "consecutive_failures": self._failures,
+            }
+            if self._failures == 1:
+                logger.error(f"Database health check failed: {e}")
+
+        state["timestamp"] = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            self._state = state
+            self._checked_at = time.monotonic()
+        return state
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def _ensure_started(self):
+        if self._thread is not None or self.interval <= 0:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name="health-monitor", daemon=True
+                )
+                self._thread.start()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        The latest result, without touching the database once the monitor
+        is running; the first call checks synchronously.
+        """
+        if self._state is None or self.interval <= 0:
+            self.check()
+        self._ensure_started()
+
+        with self._lock:
+            state = dict(self._state)
+            age = time.monotonic() - self._checked_at
+
+        state["age_seconds"] = round(age, 1)
+        if self.interval > 0 and age > self.interval * self.max_staleness:
+            state["stale"] = True
+        return state
+
+    def ready(self, state: Optional[Dict[str, Any]] = None) -> bool:
+        """Whether a snapshot (default: a new one) shows a fresh, healthy database"""
+        state = self.snapshot() if state is None else state
+        return state["connected"] and not state.get("stale", False)
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+
+health_monitor = HealthMonitor(db_manager, interval=Config.HEALTH_CHECK_INTERVAL)
@@ -0,0 +1,311 @@
+"""
+Declarative MongoDB index specification, aligned with the queries the
+application issues, and explain-plan verification of those queries.
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from bson import ObjectId
+from flask import current_app
+from pymongo.errors import OperationFailure
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class IndexSpec(NamedTuple):
+    collection: str
+    keys: Tuple[Tuple[str, int], ...]
+    options: Dict[str, Any] = {}
+
+
+# Compound keys follow equality fields first, then the range/sort field.
+INDEXES = (
+    # User.find_by_email, login
+    IndexSpec("users", (("email", 1),), {"unique": True}),
+    # User.find_by_username; not unique since users without one store null
+    IndexSpec("users", (("username", 1),)),
+    # TokenEpochs.refresh
+    IndexSpec("users", (("token_epoch_updated_at", 1),), {"sparse": True}),
+    # AuthService.refresh_access_token and logout
+    IndexSpec("refresh_tokens", (("jti", 1),), {"unique": True}),
+    # AuthService.revoke_all_tokens
+    IndexSpec("refresh_tokens", (("user_id", 1),)),
+    # AuthService.verify_email, resend-verification cleanup
+    IndexSpec("verification_tokens", (("token", 1),), {"unique": True}),
+    IndexSpec("verification_tokens", (("user_id", 1),)),
+    # reset-password lookup, forgot-password cleanup
+    IndexSpec("reset_tokens", (("token", 1),), {"unique": True}),
+    IndexSpec("reset_tokens", (("user_id", 1),)),
+    # AuthService._is_email_locked and _clear_failed_attempts
+    IndexSpec("failed_attempts", (("email", 1), ("attempted_at", 1))),
+    # MongoRateLimiter sliding window count
+    IndexSpec("rate_limits", (("identifier", 1), ("endpoint", 1), ("timestamp", 1))),
+    # Counter limiters and token buckets; per-request log documents carry no key
+    IndexSpec("rate_limits", (("key", 1),), {"unique": True, "sparse": True}),
+    # Access log lookups by user or client
+    IndexSpec("access_logs", (("user_id", 1), ("timestamp", -1))),
+    IndexSpec("access_logs", (("ip_address", 1), ("timestamp", -1))),
+)
+
+
+# TTL-indexed date field per ephemeral collection; the counter and token bucket
+# documents in rate_limits carry their own absolute expiry in reset_time.
+TTL_FIELDS = {
+    "rate_limits": "timestamp",
+    "failed_attempts": "attempted_at",
+    "access_logs": "timestamp",
+    "verification_tokens": "expires_at",
+    "reset_tokens": "expires_at",
+    "refresh_tokens": "expires_at",
+}
+
+
+def _get_ttl_retention() -> dict:
+    """Get TTL retention settings from Flask app or the default config."""
+    try:
+        return current_app.config.get("TTL_RETENTION", Config.TTL_RETENTION)
+    except RuntimeError:
+        return Config.TTL_RETENTION
+
+
+def ensure_ttl_index(collection, field: str, expire_after_seconds: int):
+    """
+    Create or update a TTL index on a single date field.
+
+    An existing plain index on the field is replaced and an existing TTL index
+    with a different retention is modified in place, so this is safe to call
+    on every startup.
+    """
+    for name, info in collection.index_information().items():
+        if info["key"] != [(field, 1)]:
+            continue
+
+        current = info.get("expireAfterSeconds")
+        if current == expire_after_seconds:
+            return
+        if current is not None:
+            collection.database.command(
+                "collMod",
+                collection.name,
+                index={
+                    "keyPattern": {field: 1},
+                    "expireAfterSeconds": expire_after_seconds,
+                },
+            )
+            return
+
+        collection.drop_index(name)
+        break
+
+    collection.create_index(field, expireAfterSeconds=expire_after_seconds)
+
+
+def create_ttl_indexes(db, retention: Optional[dict] = None):
+    """Let MongoDB expire ephemeral authentication data in the background."""
+    retention = retention or _get_ttl_retention()
+
+    for collection_name, field in TTL_FIELDS.items():
+        seconds = retention.get(collection_name)
+        if seconds is None:
+            continue
+        ensure_ttl_index(db[collection_name], field, int(seconds))
+
+    # Counter and token bucket documents expire at their absolute reset_time
+    ensure_ttl_index(db.rate_limits, "reset_time", 0)
+
+
+# Same keys (or name) already indexed with other options
+INDEX_CONFLICT_CODES = (85, 86)
+
+
+def ensure_index(db, spec: IndexSpec):
+    """Create an index, replacing one on the same keys with other options"""
+    collection = db[spec.collection]
+    try:
+        collection.create_index(list(spec.keys), **spec.options)
+    except OperationFailure as e:
+        if e.code not in INDEX_CONFLICT_CODES:
+            raise
+        for name, info in collection.index_information().items():
+            if name != "_id_" and info["key"] == list(spec.keys):
+                logger.warning(f"Replacing index {spec.collection}.{name}")
+                collection.drop_index(name)
+        collection.create_index(list(spec.keys), **spec.options)
+
+
+def ensure_indexes(db, retention: Optional[dict] = None):
+    """Create every index in INDEXES plus the TTL indexes; idempotent"""
+    for spec in INDEXES:
+        ensure_index(db, spec)
+    create_ttl_indexes(db, retention)
+
+
+class QueryShape(NamedTuple):
+    name: str
+    collection: str
+    # find | count | update | delete | find_and_modify
+    operation: str
+    filter: Dict[str, Any]
+    # Deliberate whole-collection reads, reported but never failed
+    full_scan: bool = False
+
+
+def query_shapes(now: Optional[datetime] = None) -> List[QueryShape]:
+    """The filters the application sends, with representative values"""
+    now = now or datetime.now(timezone.utc)
+    user_id = str(ObjectId())
+    since = now - timedelta(minutes=30)
+
+    return [
+        QueryShape("user_by_email", "users", "find", {"email": "a@example.com"}),
+        QueryShape("user_by_username", "users", "find", {"username": "someone"}),
+        QueryShape("user_by_id", "users", "find", {"_id": ObjectId(user_id)}),
+        QueryShape(
+            "user_rehash",
+            "users",
+            "update",
+            {"_id": ObjectId(user_id), "password_hash": "$2b$12$x"},
+        ),
+        QueryShape(
+            "token_epoch_refresh",
+            "users",
+            "find",
+            {"token_epoch_updated_at": {"$gte": since}},
+        ),
+        QueryShape("user_stats", "counters", "find", {"_id": "users"}),
+        QueryShape("user_stats_reconcile", "users", "count", {"is_active": True}, True),
+        QueryShape("password_audit", "users", "find", {}, True),
+        QueryShape(
+            "refresh_token_by_jti",
+            "refresh_tokens",
+            "find",
+            {"jti": "jti", "is_revoked": False},
+        ),
+        QueryShape("refresh_token_revoke", "refresh_tokens", "update", {"jti": "jti"}),
+        QueryShape(
+            "refresh_tokens_revoke_all",
+            "refresh_tokens",
+            "update",
+            {"user_id": user_id},
+        ),
+        QueryShape(
+            "verification_token",
+            "verification_tokens",
+            "find",
+            {"token": "token", "is_used": False, "expires_at": {"$gt": now}},
+        ),
+        QueryShape(
+            "verification_tokens_by_user",
+            "verification_tokens",
+            "delete",
+            {"user_id": user_id},
+        ),
+        QueryShape(
+            "reset_token",
+            "reset_tokens",
+            "find",
+            {"token": "token", "is_used": False, "expires_at": {"$gt": now}},
+        ),
+        QueryShape(
+            "reset_tokens_by_user", "reset_tokens", "delete", {"user_id": user_id}
+        ),
+        QueryShape(
+            "failed_attempts_recent",
+            "failed_attempts",
+            "count",
+            {"email": "a@example.com", "attempted_at": {"$gte": since}},
+        ),
+        QueryShape(
+            "failed_attempts_clear",
+            "failed_attempts",
+            "delete",
+            {"email": "a@example.com", "attempted_at": {"$gte": since}},
+        ),
+        QueryShape(
+            "rate_limit_window",
+            "rate_limits",
+            "count",
+            {"identifier": "ip", "endpoint": "login", "timestamp": {"$gte": since}},
+        ),
+        QueryShape(
+            "rate_limit_counter",
+            "rate_limits",
+            "find_and_modify",
+            {"key": "ip|login|60|0"},
+        ),
+        QueryShape(
+            "rate_limit_bucket",
+            "rate_limits",
+            "find_and_modify",
+            {"key": "bucket|login|ip:127.0.0.1"},
+        ),
+    ]
+
+
+def _explain_command(shape: QueryShape) -> Dict[str, Any]:
+    if shape.operation == "find":
+        return {"find": shape.collection, "filter": shape.filter}
+    if shape.operation == "count":
+        return {"count": shape.collection, "query": shape.filter}
+    if shape.operation == "update":
+        return {
+            "update": shape.collection,
+            "updates": [
+                {"q": shape.filter, "u": {"$set": {"_explain": 1}}, "multi": True}
+            ],
+        }
+    if shape.operation == "delete":
+        return {
+            "delete": shape.collection,
+            "deletes": [{"q": shape.filter, "limit": 0}],
+        }
+    if shape.operation == "find_and_modify":
+        return {
+            "findAndModify": shape.collection,
+            "query": shape.filter,
+            "update": {"$inc": {"count": 1}},
+        }
+    raise ValueError(f"Unknown operation: {shape.operation}")
+
+
+def plan_stages(plan: Any) -> Iterator[str]:
+    """Every stage name in an explain output, however deeply nested"""
+    if isinstance(plan, dict):
+        if isinstance(plan.get("stage"), str):
+            yield plan["stage"]
+        for value in plan.values():
+            yield from plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from plan_stages(item)
+
+
+class PlanCheck(NamedTuple):
+    shape: QueryShape
+    stages: List[str]
+
+    @property
+    def collscan(self) -> bool:
+        return "COLLSCAN" in self.stages
+
+    @property
+    def ok(self) -> bool:
+        return self.shape.full_scan or not self.collscan
+
+
+def verify_query_plans(
+    db, shapes: Optional[List[QueryShape]] = None
+) -> List[PlanCheck]:
+    """Explain every query shape (queryPlanner only; nothing is executed)"""
+    checks = []
+    for shape in shapes if shapes is not None else query_shapes():
+        explain = db.command(
+            "explain", _explain_command(shape), verbosity="queryPlanner"
+        )
+        winning = explain.get("queryPlanner", {}).get("winningPlan", explain)
+        checks.append(PlanCheck(shape, list(plan_stages(winning))))
+    return checks
@@ -0,0 +1,550 @@
+"""
+In-process stand-in for the MongoDB database, selected with DB_BACKEND=memory.
+
+Implements the subset of the pymongo Collection API that the user, token,
+failed attempt, rate limit and access log stores use, so the whole service
+can be load-tested and benchmarked without a MongoDB server.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import (
+    DeleteMany,
+    DeleteOne,
+    InsertOne,
+    ReturnDocument,
+    UpdateMany,
+    UpdateOne,
+)
+from pymongo.errors import DuplicateKeyError, OperationFailure
+from pymongo.results import (
+    BulkWriteResult,
+    DeleteResult,
+    InsertManyResult,
+    InsertOneResult,
+    UpdateResult,
+)
+
+from core.indexes import INDEXES
+
+# MongoDB's TTL monitor also only runs once a minute
+TTL_MONITOR_SECONDS = 60
+
+_MISSING = object()
+
+
+def _present(value: Any) -> bool:
+    return value is not None and value is not _MISSING
+
+
+def _compare(compare):
+    def operator(value, bound):
+        try:
+            return _present(value) and compare(value, bound)
+        except TypeError:  # Mongo never matches across types
+            return False
+
+    return operator
+
+
+OPERATORS = {
+    "$eq": lambda value, bound: _value(value) == bound,
+    "$ne": lambda value, bound: _value(value) != bound,
+    "$gte": _compare(lambda value, bound: value >= bound),
+    "$gt": _compare(lambda value, bound: value > bound),
+    "$lte": _compare(lambda value, bound: value <= bound),
+    "$lt": _compare(lambda value, bound: value < bound),
+    "$in": lambda value, bound: _value(value) in bound,
+    "$nin": lambda value, bound: _value(value) not in bound,
+    "$exists": lambda value, bound: (value is not _MISSING) == bool(bound),
+}
+
+
+def _value(value: Any) -> Any:
+    return None if value is _MISSING else value
+
+
+def _bson(value: Any) -> Any:
+    """A copy of value as a BSON round trip returns it (naive UTC datetimes, ms)"""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.replace(microsecond=value.microsecond // 1000 * 1000)
+    if isinstance(value, dict):
+        return {key: _bson(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_bson(item) for item in value]
+    return value
+
+
+def _is_operator_dict(condition: Any) -> bool:
+    return isinstance(condition, dict) and all(key.startswith("$") for key in condition)
+
+
+def _matches(doc: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    for field, condition in query.items():
+        value = doc.get(field, _MISSING)
+        if _is_operator_dict(condition):
+            for operator, bound in condition.items():
+                if operator not in OPERATORS:
+                    raise NotImplementedError(f"Query operator {operator}")
+                if not OPERATORS[operator](value, bound):
+                    return False
+        elif _value(value) != condition:
+            return False
+    return True
+
+
+def _project(doc: Dict[str, Any], projection: Optional[Dict[str, Any]]):
+    if projection is None:
+        return _bson(doc)
+
+    include_id = bool(projection.get("_id", 1))
+    fields = {field: bool(flag) for field, flag in projection.items() if field != "_id"}
+    if any(fields.values()):
+        projected = {field: doc[field] for field in fields if field in doc}
+    else:
+        projected = {
+            field: value for field, value in doc.items() if field not in fields
+        }
+
+    if include_id and "_id" in doc:
+        projected["_id"] = doc["_id"]
+    else:
+        projected.pop("_id", None)
+    return _bson(projected)
+
+
+def _index_key(value: Any) -> Any:
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return repr(value)
+
+
+def _normalize_keys(keys) -> List[Tuple[str, int]]:
+    if isinstance(keys, str):
+        return [(keys, 1)]
+    return [tuple(key) for key in keys]
+
+
+class MemoryCollection:
+    """
+    Thread-safe documents keyed by _id, with hash indexes on the first field of
+    every created index.
+
+    Queries with an equality condition on an indexed field only scan the
+    documents sharing that value, which approximates an indexed Mongo lookup;
+    anything else is a full scan. Single-field unique indexes are enforced and
+    TTL indexes expire documents. Only top-level fields and the $set, $unset,
+    $inc and $setOnInsert update operators are supported; pipeline updates
+    raise NotImplementedError.
+    """
+
+    def __init__(
+        self, indexed_fields: Iterable[str] = (), name: str = "", database=None
+    ):
+        self.name = name
+        self.database = database
+        self._lock = threading.RLock()
+        self._docs: Dict[Any, Dict[str, Any]] = {}
+        self._index_info: Dict[str, Dict[str, Any]] = {}
+        self._indexes: Dict[str, Dict[Any, Dict[Any, Dict[str, Any]]]] = {}
+        self._next_ttl_run = time.monotonic() + TTL_MONITOR_SECONDS
+        for field in indexed_fields:
+            self.create_index(field)
+
+    # Indexes
+
+    def create_index(self, keys, **kwargs) -> str:
+        keys = _normalize_keys(keys)
+        name = kwargs.pop("name", None) or "_".join(f"{f}_{d}" for f, d in keys)
+        with self._lock:
+            self._index_info[name] = {"key": keys, **kwargs}
+            self._rebuild_indexes()
+        return name
+
+    def index_information(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            info = {"_id_": {"key": [("_id", 1)]}}
+            info.update((name, dict(index)) for name, index in self._index_info.items())
+            return info
+
+    def drop_index(self, name: str):
+        with self._lock:
+            if self._index_info.pop(name, None) is None:
+                raise OperationFailure(f"index not found with name [{name}]", 27)
+            self._rebuild_indexes()
+
+    def _set_ttl(self, keys: List[Tuple[str, int]], expire_after_seconds: int):
+        with self._lock:
+            for index in self._index_info.values():
+                if index["key"] == keys:
+                    index["expireAfterSeconds"] = expire_after_seconds
+                    return
+        raise OperationFailure("cannot find index for collMod", 27)
+
+    def _rebuild_indexes(self):
+        self._indexes = {}
+        for index in self._index_info.values():
+            self._indexes.setdefault(index["key"][0][0], {})
+        for doc in self._docs.values():
+            self._index(doc)
+
+    def _index(self, doc: Dict[str, Any]):
+        for field, index in self._indexes.items():
+            key = _index_key(doc.get(field))
+            index.setdefault(key, {})[doc["_id"]] = doc
+
+    def _unindex(self, doc: Dict[str, Any]):
+        for field, index in self._indexes.items():
+            key = _index_key(doc.get(field))
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.pop(doc["_id"], None)
+                if not bucket:
+                    del index[key]
+
+    def _check_unique(self, doc: Dict[str, Any], existing=None):
+        """Raise DuplicateKeyError unless doc may replace existing (or be added)"""
+        if self._docs.get(doc["_id"], existing) is not existing:
+            raise DuplicateKeyError(f"E11000 duplicate key _id: {doc['_id']}", 11000)
+
+        for name, index in self._index_info.items():
+            if not index.get("unique") or len(index["key"]) != 1:
+                continue
+            field = index["key"][0][0]
+            if index.get("sparse") and field not in doc:
+                continue
+            bucket = self._indexes[field].get(_index_key(doc.get(field)), {})
+            if any(_id != doc["_id"] for _id in bucket):
+                raise DuplicateKeyError(
+                    f"E11000 duplicate key error index: {name} "
+                    f"dup key: {{{field}: {doc.get(field)!r}}}",
+                    11000,
+                )
+
+    def _candidates(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Smallest bucket an equality condition on an indexed field selects"""
+        if "_id" in query and not _is_operator_dict(query["_id"]):
+            doc = self._docs.get(query["_id"])
+            return [doc] if doc is not None else []
+
+        best = None
+        for field, condition in query.items():
+            index = self._indexes.get(field)
+            if index is None:
+                continue
+            if _is_operator_dict(condition):
+                if list(condition) != ["$eq"]:
+                    continue
+                condition = condition["$eq"]
+            bucket = index.get(_index_key(condition), {})
+            if best is None or len(bucket) < len(best):
+                best = bucket
+        return list((self._docs if best is None else best).values())
+
+    def _expire(self):
+        """Delete documents past their TTL index expiry, once a minute"""
+        if time.monotonic() < self._next_ttl_run:
+            return
+        self._next_ttl_run = time.monotonic() + TTL_MONITOR_SECONDS
+
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        for index in self._index_info.values():
+            seconds = index.get("expireAfterSeconds")
+            if seconds is None or len(index["key"]) != 1:
+                continue
+            cutoff = now - timedelta(seconds=seconds)
+            field = index["key"][0][0]
+            for doc in list(self._docs.values()):
+                value = doc.get(field)
+                if isinstance(value, datetime) and value <= cutoff:
+                    self._remove(doc)
+
+    # Writes
+
+    def _add(self, document: Dict[str, Any]) -> Any:
+        if "_id" not in document:
+            document["_id"] = ObjectId()
+        doc = _bson(document)
+        self._check_unique(doc)
+        self._docs[doc["_id"]] = doc
+        self._index(doc)
+        return doc["_id"]
+
+    def _remove(self, doc: Dict[str, Any]):
+        self._unindex(doc)
+        del self._docs[doc["_id"]]
+
+    def _replace(self, old: Dict[str, Any], new: Dict[str, Any]):
+        self._check_unique(new, old)
+        self._unindex(old)
+        self._docs[new["_id"]] = new
+        self._index(new)
+
+    @staticmethod
+    def _updated(doc: Dict[str, Any], update: Dict[str, Any], inserting: bool):
+        if not isinstance(update, dict):
+            raise NotImplementedError("Pipeline updates are not supported")
+        if not update or not all(key.startswith("$") for key in update):
+            raise ValueError("update only works with $ operators")
+
+        new = dict(doc)
+        for operator, fields in update.items():
+            if any("." in field for field in fields):
+                raise NotImplementedError("Dotted update paths are not supported")
+            if operator == "$set":
+                new.update(_bson(fields))
+            elif operator == "$setOnInsert":
+                if inserting:
+                    new.update(_bson(fields))
+            elif operator == "$unset":
+                for field in fields:
+                    new.pop(field, None)
+            elif operator == "$inc":
+                for field, amount in fields.items():
+                    new[field] = new.get(field, 0) + amount
+            else:
+                raise NotImplementedError(f"Update operator {operator}")
+        return new
+
+    def _upsert(self, query: Dict[str, Any], update: Dict[str, Any]):
+        seed = {
+            field: condition
+            for field, condition in query.items()
+            if not _is_operator_dict(condition)
+        }
+        doc = self._updated(seed, update, inserting=True)
+        self._add(doc)
+        return doc["_id"]
+
+    def _update(self, query, update, upsert: bool, multi: bool) -> Dict[str, Any]:
+        query = _bson(query)
+        matched = modified = 0
+        for doc in self._candidates(query):
+            if not _matches(doc, query):
+                continue
+            matched += 1
+            new = self._updated(doc, update, inserting=False)
+            if new != doc:
+                self._replace(doc, new)
+                modified += 1
+            if not multi:
+                break
+
+        result = {"n": matched, "nModified": modified}
+        if not matched and upsert:
+            result["upserted"] = self._upsert(query, update)
+            result["n"] = 1
+        return result
+
+    def _delete(self, query: Dict[str, Any], multi: bool) -> int:
+        query = _bson(query)
+        deleted = 0
+        for doc in self._candidates(query):
+            if _matches(doc, query):
+                self._remove(doc)
+                deleted += 1
+                if not multi:
+                    break
+        return deleted
+
+    def insert_one(self, document: Dict[str, Any]) -> InsertOneResult:
+        with self._lock:
+            self._expire()
+            return InsertOneResult(self._add(document), True)
+
+    def insert_many(
+        self, documents: Iterable[Dict[str, Any]], ordered: bool = True
+    ) -> InsertManyResult:
+        with self._lock:
+            self._expire()
+            return InsertManyResult([self._add(doc) for doc in documents], True)
+
+    def update_one(self, filter, update, upsert: bool = False, **kwargs):
+        with self._lock:
+            self._expire()
+            return UpdateResult(self._update(filter, update, upsert, False), True)
+
+    def update_many(self, filter, update, upsert: bool = False, **kwargs):
+        with self._lock:
+            self._expire()
+            return UpdateResult(self._update(filter, update, upsert, True), True)
+
+    def delete_one(self, filter, **kwargs) -> DeleteResult:
+        with self._lock:
+            return DeleteResult({"n": self._delete(filter, False)}, True)
+
+    def delete_many(self, filter, **kwargs) -> DeleteResult:
+        with self._lock:
+            return DeleteResult({"n": self._delete(filter, True)}, True)
+
+    def find_one_and_update(
+        self,
+        filter: Dict[str, Any],
+        update: Dict[str, Any],
+        projection: Optional[Dict[str, Any]] = None,
+        upsert: bool = False,
+        return_document: bool = ReturnDocument.BEFORE,
+        **kwargs,
+    ) -> Optional[Dict[str, Any]]:
+        filter = _bson(filter)
+        with self._lock:
+            self._expire()
+            doc = next(
+                (d for d in self._candidates(filter) if _matches(d, filter)), None
+            )
+            if doc is None:
+                if not upsert:
+                    return None
+                _id = self._upsert(filter, update)
+                if return_document == ReturnDocument.BEFORE:
+                    return None
+                return _project(self._docs[_id], projection)
+
+            new = self._updated(doc, update, inserting=False)
+            self._replace(doc, new)
+            returned = new if return_document == ReturnDocument.AFTER else doc
+            return _project(returned, projection)
+
+    def bulk_write(self, requests, ordered: bool = True) -> BulkWriteResult:
+        result = {
+            "nInserted": 0,
+            "nMatched": 0,
+            "nModified": 0,
+            "nRemoved": 0,
+            "nUpserted": 0,
+            "upserted": [],
+            "writeErrors": [],
+        }
+        with self._lock:
+            self._expire()
+            for i, request in enumerate(requests):
+                if isinstance(request, InsertOne):
+                    self._add(request._doc)
+                    result["nInserted"] += 1
+                elif isinstance(request, (UpdateOne, UpdateMany)):
+                    multi = isinstance(request, UpdateMany)
+                    outcome = self._update(
+                        request._filter, request._doc, request._upsert, multi
+                    )
+                    if "upserted" in outcome:
+                        result["nUpserted"] += 1
+                        result["upserted"].append(
+                            {"index": i, "_id": outcome["upserted"]}
+                        )
+                    else:
+                        result["nMatched"] += outcome["n"]
+                        result["nModified"] += outcome["nModified"]
+                elif isinstance(request, (DeleteOne, DeleteMany)):
+                    multi = isinstance(request, DeleteMany)
+                    result["nRemoved"] += self._delete(request._filter, multi)
+                else:
+                    raise NotImplementedError(f"Bulk operation {request!r}")
+        return BulkWriteResult(result, True)
+
+    # Reads
+
+    def find_one(
+        self, filter: Optional[Dict[str, Any]] = None, projection=None, **kwargs
+    ) -> Optional[Dict[str, Any]]:
+        filter = _bson(filter or {})
+        with self._lock:
+            for doc in self._candidates(filter):
+                if _matches(doc, filter):
+                    return _project(doc, projection)
+        return None
+
+    def find(
+        self, filter: Optional[Dict[str, Any]] = None, projection=None, **kwargs
+    ) -> List[Dict[str, Any]]:
+        """All matching documents, in insertion order (batch_size is ignored)"""
+        filter = _bson(filter or {})
+        with self._lock:
+            return [
+                _project(doc, projection)
+                for doc in self._candidates(filter)
+                if _matches(doc, filter)
+            ]
+
+    def count_documents(self, filter: Dict[str, Any], **kwargs) -> int:
+        filter = _bson(filter)
+        with self._lock:
+            return sum(1 for doc in self._candidates(filter) if _matches(doc, filter))
+
+    def drop(self):
+        with self._lock:
+            self._docs = {}
+            self._rebuild_indexes()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+
+class MemoryDatabase:
+    """
+    Named MemoryCollections, created on first access with the indexes
+    core.indexes declares for them (TTL indexes come from migrate)
+    """
+
+    def __init__(self, name: str = "memory"):
+        self.name = name
+        self._lock = threading.Lock()
+        self._collections: Dict[str, MemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        collection = self._collections.get(name)
+        if collection is None:
+            with self._lock:
+                collection = self._collections.get(name)
+                if collection is None:
+                    collection = MemoryCollection(name=name, database=self)
+                    for spec in INDEXES:
+                        if spec.collection == name:
+                            collection.create_index(list(spec.keys), **spec.options)
+                    self._collections[name] = collection
+        return collection
+
+    def __getattr__(self, name: str) -> MemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def list_collection_names(self) -> List[str]:
+        return list(self._collections)
+
+    def drop_collection(self, name: str):
+        with self._lock:
+            self._collections.pop(name, None)
+
+    def command(self, command: str, value: Any = None, **kwargs) -> Dict[str, Any]:
+        """ping, and collMod of a TTL index's expireAfterSeconds"""
+        if command == "ping":
+            return {"ok": 1.0}
+        if command == "collMod":
+            index = kwargs["index"]
+            self[value]._set_ttl(
+                _normalize_keys(list(index["keyPattern"].items())),
+                index["expireAfterSeconds"],
+            )
+            return {"ok": 1.0}
+        raise OperationFailure(f"Command {command} is not supported in memory", 59)
+
+
+_memory_databases: Dict[str, MemoryDatabase] = {}
+_memory_databases_lock = threading.Lock()
+
+
+def get_memory_database(name: str) -> MemoryDatabase:
+    """Process-wide in-memory database by name"""
+    with _memory_databases_lock:
+        db = _memory_databases.get(name)
+        if db is None:
+            db = _memory_databases[name] = MemoryDatabase(name)
+        return db
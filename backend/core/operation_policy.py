@@ -0,0 +1,115 @@
+"""
+Write concern and read preference per class of database operation, from
+DB_OPERATION_POLICIES
+"""
+
+from typing import Any, Mapping, NamedTuple, Optional
+
+from pymongo.read_preferences import (
+    Nearest,
+    Primary,
+    PrimaryPreferred,
+    Secondary,
+    SecondaryPreferred,
+)
+from pymongo.write_concern import WriteConcern
+
+from core.database import _current_config
+
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+# Smallest maxStalenessSeconds MongoDB accepts
+MIN_MAX_STALENESS_SECONDS = 90
+
+# Operation class of everything done on a collection; operations on users pick
+# theirs per call (credential writes, cached profile reads, stats counts)
+COLLECTION_OPERATIONS = {
+    "access_logs": "access_log",
+    "rate_limits": "audit",
+    "failed_attempts": "audit",
+    "refresh_tokens": "credentials",
+    "verification_tokens": "credentials",
+    "reset_tokens": "credentials",
+    "counters": "stats",
+}
+
+
+class OperationPolicy(NamedTuple):
+    write_concern: Optional[WriteConcern] = None
+    read_preference: Optional[Any] = None
+
+    @classmethod
+    def from_spec(cls, spec: Mapping[str, Any]) -> "OperationPolicy":
+        """Build from {"w", "j", "wtimeout", "read_preference", "max_staleness_seconds"}"""
+        write_options = {
+            key: spec[key] for key in ("w", "j", "wtimeout") if key in spec
+        }
+        write_concern = WriteConcern(**write_options) if write_options else None
+
+        read_preference = None
+        mode = spec.get("read_preference")
+        if mode is not None:
+            if mode not in READ_PREFERENCES:
+                raise ValueError(f"Unknown read preference: {mode}")
+            staleness = spec.get("max_staleness_seconds", -1)
+            if staleness != -1 and staleness < MIN_MAX_STALENESS_SECONDS:
+                raise ValueError(
+                    f"max_staleness_seconds must be -1 or at least "
+                    f"{MIN_MAX_STALENESS_SECONDS}"
+                )
+            if mode == "primary":
+                if staleness != -1:
+                    raise ValueError("max_staleness_seconds needs a secondary read")
+                read_preference = Primary()
+            else:
+                read_preference = READ_PREFERENCES[mode](max_staleness=staleness)
+
+        return cls(write_concern, read_preference)
+
+    def apply(self, collection):
+        """The collection with this policy's options; unchanged for the memory store"""
+        if self == OperationPolicy() or not hasattr(collection, "with_options"):
+            return collection
+        return collection.with_options(
+            write_concern=self.write_concern, read_preference=self.read_preference
+        )
+
+
+class OperationPolicies:
+    """Policies by operation class; unlisted classes keep the client defaults"""
+
+    def __init__(self, specs: Mapping[str, Mapping[str, Any]]):
+        self.policies = {
+            name: OperationPolicy.from_spec(spec) for name, spec in specs.items()
+        }
+
+    def collection(self, db, name: str, operation: Optional[str] = None):
+        """db.<name> with the policy of operation (default: the collection's class)"""
+        policy = self.policies.get(operation or COLLECTION_OPERATIONS.get(name))
+        collection = getattr(db, name)
+        return policy.apply(collection) if policy is not None else collection
+
+
+_policies_cache = (None, None)
+
+
+def get_operation_policies() -> OperationPolicies:
+    """Policies of the current app's DB_OPERATION_POLICIES (else Config's)"""
+    global _policies_cache
+    specs = _current_config().get("DB_OPERATION_POLICIES") or {}
+    cached_specs, policies = _policies_cache
+    if cached_specs is not specs:
+        policies = OperationPolicies(specs)
+        _policies_cache = (specs, policies)
+    return policies
+
+
+def policy_collection(db, name: str, operation: Optional[str] = None):
+    """db.<name> with the write concern and read preference of its operation"""
+    return get_operation_policies().collection(db, name, operation)
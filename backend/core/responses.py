@@ -235,10 +235,14 @@ class ErrorResponses:
     @staticmethod
     def service_unavailable(
         message: str = "Service temporarily unavailable",
+        details: Optional[Any] = None,
     ) -> tuple[Response, int]:
         """Return 503 Service Unavailable response."""
         return APIResponse.error(
-            message=message, status_code=503, error_code="SERVICE_UNAVAILABLE"
+            message=message,
+            status_code=503,
+            error_code="SERVICE_UNAVAILABLE",
+            details=details,
         )
 
 
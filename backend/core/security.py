@@ -4,16 +4,19 @@ Handles JWT operations, password hashing, and security validations.
 """
 
 import logging
-import re
 import secrets
 from datetime import datetime, timedelta
 from functools import wraps
 from typing import Any, Dict, Optional
 
-import bcrypt
 import jwt
 from flask import jsonify, request
 
+from middleware.request_context import get_request_context
+from utils.auth_utils import decode_token_cached
+from utils.hashing_pool import HashingPoolBusy, hashing_pool
+from utils.password_policy import PasswordCheck, password_policy
+
 logger = logging.getLogger(__name__)
 
 
@@ -129,7 +132,7 @@ class JWTManager:
             dict: Decoded token payload or None if invalid
         """
         try:
-            payload = jwt.decode(
+            payload = decode_token_cached(
                 token,
                 SecurityConfig.JWT_SECRET_KEY,
                 algorithms=[SecurityConfig.JWT_ALGORITHM],
@@ -171,10 +174,11 @@ class PasswordManager:
             str: Hashed password
         """
         try:
-            password_bytes = password.encode("utf-8")
-            salt = bcrypt.gensalt(rounds=SecurityConfig.PASSWORD_HASH_ROUNDS)
-            hashed = bcrypt.hashpw(password_bytes, salt)
-            return hashed.decode("utf-8")
+            return hashing_pool.hash_password(
+                password, SecurityConfig.PASSWORD_HASH_ROUNDS
+            )
+        except HashingPoolBusy:
+            raise
         except Exception as e:
             logger.error(f"Password hashing failed: {e}")
             raise ValueError("Failed to hash password")
@@ -192,9 +196,9 @@ class PasswordManager:
             bool: True if password matches, False otherwise
         """
         try:
-            password_bytes = password.encode("utf-8")
-            hashed_bytes = hashed_password.encode("utf-8")
-            return bcrypt.checkpw(password_bytes, hashed_bytes)
+            return hashing_pool.verify_password(password, hashed_password)
+        except HashingPoolBusy:
+            raise
         except Exception as e:
             logger.error(f"Password verification failed: {e}")
             return False
@@ -217,78 +221,27 @@ class PasswordManager:
                 "requirements": [],
             }
 
-        requirements = []
-
-        # Length check
-        if len(password) < SecurityConfig.MIN_PASSWORD_LENGTH:
-            requirements.append(
-                f"Must be at least {SecurityConfig.MIN_PASSWORD_LENGTH} characters long"
-            )
-
-        if len(password) > SecurityConfig.MAX_PASSWORD_LENGTH:
-            requirements.append(
-                f"Must not exceed {SecurityConfig.MAX_PASSWORD_LENGTH} characters"
-            )
-
-        # Character requirements
-        if not re.search(r"[A-Z]", password):
-            requirements.append("Must contain at least one uppercase letter")
-
-        if not re.search(r"[a-z]", password):
-            requirements.append("Must contain at least one lowercase letter")
-
-        if not re.search(r"\d", password):
-            requirements.append("Must contain at least one digit")
-
-        if not re.search(r'[!@#$%^&*(),.?":{}|<>]', password):
-            requirements.append("Must contain at least one special character")
-
-        # Common password check
-        common_passwords = [
-            "password",
-            "123456",
-            "12345678",
-            "qwerty",
-            "abc123",
-            "password123",
-            "admin",
-            "letmein",
-            "welcome",
-            "123123",
-        ]
-
-        if password.lower() in common_passwords:
-            requirements.append("Cannot be a commonly used password")
-
-        is_valid = len(requirements) == 0
+        result = password_policy.check(password)
 
         return {
-            "is_valid": is_valid,
+            "is_valid": result.valid,
             "message": (
                 "Password meets all requirements"
-                if is_valid
+                if result.valid
                 else "Password does not meet security requirements"
             ),
-            "requirements": requirements,
-            "strength_score": PasswordManager._calculate_strength_score(password),
+            "requirements": result.errors,
+            "strength_score": PasswordManager._calculate_strength_score(
+                password, result
+            ),
         }
 
     @staticmethod
-    def _calculate_strength_score(password: str) -> int:
+    def _calculate_strength_score(password: str, result: PasswordCheck) -> int:
         """Calculate password strength score (0-4)."""
-        score = 0
-
+        score = len(result.character_classes)
         if len(password) >= 8:
             score += 1
-        if re.search(r"[A-Z]", password):
-            score += 1
-        if re.search(r"[a-z]", password):
-            score += 1
-        if re.search(r"\d", password):
-            score += 1
-        if re.search(r'[!@#$%^&*(),.?":{}|<>]', password):
-            score += 1
-
         return min(score, 4)
 
 
@@ -354,15 +307,14 @@ def require_auth(f):
 
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        auth_header = request.headers.get("Authorization")
+        token = get_request_context().bearer_token
 
-        if not auth_header or not auth_header.startswith("Bearer "):
+        if not token:
             return (
                 jsonify({"success": False, "message": "Authentication required"}),
                 401,
             )
 
-        token = auth_header.split(" ")[1]
         payload = JWTManager.verify_token(token, "access")
 
         if not payload:
@@ -0,0 +1,268 @@
+"""
+Management commands for CoreConnect
+
+Usage: python manage.py <command> [options]
+"""
+
+import argparse
+import logging
+import sys
+import time
+from typing import List, Optional
+
+from config import Config
+from core.database import (
+    SCHEMA_VERSION,
+    applied_schema_version,
+    get_mongo_client,
+    migrate,
+)
+from core.indexes import ensure_indexes, verify_query_plans
+from models.user_stats import UserStats
+from utils.breached_passwords import (
+    build_bloom_filter,
+    read_password_list,
+)
+from utils.hashing_pool import hashing_pool
+from utils.password_audit import (
+    LoginCostEstimator,
+    audit_password_hashes,
+    target_cost,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def build_breached_filter(args) -> int:
+    """Build the breached password Bloom filter from a newline separated list"""
+    expected = args.expected_entries
+    if not expected:
+        # First pass sizes the filter, second pass fills it
+        expected = sum(1 for _ in read_password_list(args.password_list))
+
+    start = time.perf_counter()
+    stats = build_bloom_filter(
+        read_password_list(args.password_list),
+        args.output,
+        expected_entries=expected,
+        false_positive_rate=args.fp_rate,
+    )
+
+    print(
+        f"Wrote {stats['path']}: {stats['entries']} entries, "
+        f"{stats['size_bytes'] / (1024 * 1024):.1f} MiB, "
+        f"{stats['num_hashes']} hashes, "
+        f"target false positive rate {stats['false_positive_rate']} "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+    return 0
+
+
+def _format_seconds(seconds: Optional[float]) -> str:
+    return "-" if seconds is None else f"{seconds:,.1f}"
+
+
+def hash_audit(args) -> int:
+    """Report password hashes per scheme and cost, optionally marking outdated ones"""
+    if args.rounds:
+        # Plan for a cost other than this node's BCRYPT_ROUNDS, up or down
+        hashing_pool.rounds = args.rounds
+        hashing_pool.pin_rounds = True
+
+    client = get_mongo_client({**vars(Config), "MONGO_URI": args.mongo_uri})
+    report = audit_password_hashes(
+        client[args.mongo_db].users, mark=args.mark, batch_size=args.batch_size
+    )
+
+    estimator = LoginCostEstimator(scrypt_r=Config.SCRYPT_R, scrypt_p=Config.SCRYPT_P)
+    users = report["users"] or 1
+    current_total = 0.0
+    row = "{:<8} {:>5} {:>12} {:>7} {:>10} {:>12}"
+
+    print(row.format("scheme", "cost", "users", "share", "ms/login", "needs rehash"))
+    for key in sorted(report["histogram"], key=lambda k: (k[0], k[1] or 0)):
+        scheme, cost = key
+        count = report["histogram"][key]
+        seconds = estimator.seconds(scheme, cost)
+        current_total += (seconds or 0.0) * count
+        print(
+            row.format(
+                scheme,
+                "-" if cost is None else cost,
+                f"{count:,}",
+                f"{count / users:.1%}",
+                "-" if seconds is None else f"{seconds * 1000:.1f}",
+                f"{report['needs_rehash'].get(key, 0):,}",
+            )
+        )
+
+    scheme, cost = target_cost()
+    target_seconds = estimator.seconds(scheme, cost)
+    print(
+        f"\nCPU seconds for one login by every user: "
+        f"{_format_seconds(current_total)} now, "
+        f"{_format_seconds(target_seconds * report['users'])} "
+        f"once all are rehashed to {scheme} cost {cost}"
+    )
+    if args.mark:
+        print(f"Marked {report['marked']:,} users to rehash on their next login")
+    return 0
+
+
+def migrate_database(args) -> int:
+    """Create the indexes for this schema version and record the marker"""
+    config = {**vars(Config), "MONGO_URI": args.mongo_uri}
+    db = get_mongo_client(config)[args.mongo_db]
+
+    applied = applied_schema_version(db)
+    if migrate(db, force=args.force):
+        print(f"Migrated {args.mongo_db} from schema {applied} to {SCHEMA_VERSION}")
+    else:
+        print(f"{args.mongo_db} is already at schema {applied}, nothing to do")
+    return 0
+
+
+def verify_indexes(args) -> int:
+    """Explain every application query and fail if any scans a whole collection"""
+    config = {**vars(Config), "MONGO_URI": args.mongo_uri}
+    db = get_mongo_client(config)[args.mongo_db]
+    if args.create:
+        ensure_indexes(db)
+
+    checks = verify_query_plans(db)
+    row = "{:<28} {:<20} {:<6} {}"
+    print(row.format("query", "collection", "status", "plan"))
+    for check in checks:
+        if not check.collscan:
+            status = "ok"
+        elif check.shape.full_scan:
+            status = "scan"  # Whole-collection read by design
+        else:
+            status = "FAIL"
+        print(
+            row.format(
+                check.shape.name,
+                check.shape.collection,
+                status,
+                " > ".join(check.stages),
+            )
+        )
+
+    failures = [check for check in checks if not check.ok]
+    if failures:
+        print(f"\n{len(failures)} queries scan their whole collection")
+        return 1
+    return 0
+
+
+def reconcile_stats(args) -> int:
+    """Recount the users collection into the /api/stats counters"""
+    config = {**vars(Config), "MONGO_URI": args.mongo_uri}
+    db = get_mongo_client(config)[args.mongo_db]
+
+    counts = UserStats(db).reconcile()
+    print(
+        f"{counts['total_users']:,} users, {counts['active_users']:,} active, "
+        f"{counts['verified_users']:,} verified"
+    )
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python manage.py", description="CoreConnect management commands"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser(
+        "build-breached-filter",
+        help="Build the breached password filter used by password validation",
+    )
+    build.add_argument("password_list", help="File with one password per line")
+    build.add_argument(
+        "--output",
+        default=Config.BREACHED_PASSWORDS_PATH,
+        help="Filter file to write (default: BREACHED_PASSWORDS_PATH)",
+    )
+    build.add_argument(
+        "--fp-rate",
+        type=float,
+        default=0.001,
+        help="Target false positive rate (default: 0.001)",
+    )
+    build.add_argument(
+        "--expected-entries",
+        type=int,
+        help="Size the filter for this many entries instead of counting the list",
+    )
+    build.set_defaults(func=build_breached_filter)
+
+    audit = commands.add_parser(
+        "hash-audit",
+        help="Histogram of password hash costs and login CPU estimate",
+    )
+    audit.add_argument(
+        "--mark",
+        action="store_true",
+        help="Flag users not at the target cost to rehash on their next login",
+    )
+    audit.add_argument(
+        "--rounds",
+        type=int,
+        help="Target bcrypt cost (default: BCRYPT_ROUNDS)",
+    )
+    audit.add_argument(
+        "--batch-size",
+        type=int,
+        default=1000,
+        help="Cursor batch size and users per bulk write (default: 1000)",
+    )
+    audit.add_argument("--mongo-uri", default=Config.MONGO_URI)
+    audit.add_argument("--mongo-db", default=Config.MONGO_DBNAME)
+    audit.set_defaults(func=hash_audit)
+
+    migrate_command = commands.add_parser(
+        "migrate",
+        help="Create database indexes; run once per deployment",
+    )
+    migrate_command.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-apply even if the schema marker is current",
+    )
+    migrate_command.add_argument("--mongo-uri", default=Config.MONGO_URI)
+    migrate_command.add_argument("--mongo-db", default=Config.MONGO_DBNAME)
+    migrate_command.set_defaults(func=migrate_database)
+
+    verify = commands.add_parser(
+        "verify-indexes",
+        help="Explain every application query; exit 1 on any COLLSCAN",
+    )
+    verify.add_argument(
+        "--create",
+        action="store_true",
+        help="Create the declared indexes first (e.g. on a scratch database)",
+    )
+    verify.add_argument("--mongo-uri", default=Config.MONGO_URI)
+    verify.add_argument("--mongo-db", default=Config.MONGO_DBNAME)
+    verify.set_defaults(func=verify_indexes)
+
+    stats = commands.add_parser(
+        "reconcile-stats",
+        help="Recount users into the /api/stats counters (e.g. from cron)",
+    )
+    stats.add_argument("--mongo-uri", default=Config.MONGO_URI)
+    stats.add_argument("--mongo-db", default=Config.MONGO_DBNAME)
+    stats.set_defaults(func=reconcile_stats)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=logging.INFO)
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+"""
+Buffered access log writer that keeps audit logging off the request path
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AccessLogWriter:
+    """
+    Bounded in-process queue of access log entries drained by a background thread.
+
+    Entries are written with insert_many(ordered=False) once batch_size entries
+    are waiting or flush_interval seconds have passed. When the queue is above
+    the high watermark only one entry in sample_rate is kept, and when it is
+    full new entries are dropped; both cases are counted in stats().
+    """
+
+    def __init__(
+        self,
+        collection_getter: Callable[[], Any],
+        max_queue: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        high_watermark: float = 0.8,
+        sample_rate: int = 10,
+    ):
+        self._get_collection = collection_getter
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.high_watermark = int(max_queue * high_watermark)
+        self.sample_rate = max(sample_rate, 1)
+
+        self._max_queue = max_queue
+        self._reset_state()
+
+        atexit.register(self.close)
+        if hasattr(os, "register_at_fork"):
+            # The parent's queue, locks and drain thread are unusable in a child
+            os.register_at_fork(after_in_child=self._reset_state)
+
+    def _reset_state(self):
+        """Initialise the queue, thread bookkeeping and counters"""
+        self._collection = None
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(
+            maxsize=self._max_queue
+        )
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._sample_counter = 0
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "dropped": 0,
+            "sampled_out": 0,
+            "failed": 0,
+            "batches": 0,
+        }
+
+    def _ensure_started(self):
+        """Start the drain thread on first use"""
+        if self._thread is not None:
+            return
+
+        with self._lock:
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name="access-log-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def write(self, entry: Dict[str, Any]) -> bool:
+        """Queue an entry for writing. Returns False if it was dropped or sampled out."""
+        if self._collection is None:
+            # Resolve the collection on the request thread, where it is reachable
+            self._collection = self._get_collection()
+        self._ensure_started()
+
+        if self._queue.qsize() >= self.high_watermark:
+            with self._lock:
+                self._sample_counter += 1
+                keep = self._sample_counter % self.sample_rate == 0
+            if not keep:
+                self._count("sampled_out")
+                return False
+
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self._count("dropped")
+            return False
+
+        self._count("enqueued")
+        return True
+
+    def _run(self):
+        """Drain the queue in batches until stopped, then flush what is left"""
+        while not self._stop.is_set():
+            self._drain(block=True)
+        while not self._queue.empty():
+            self._drain(block=False)
+
+    def _drain(self, block: bool):
+        """Collect one batch and write it"""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+
+        while len(batch) < self.batch_size:
+            # Wait in short slices so close() is noticed promptly
+            wait = block and not self._stop.is_set()
+            timeout = deadline - time.monotonic()
+            try:
+                if wait and timeout > 0:
+                    batch.append(self._queue.get(timeout=min(timeout, 0.1)))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                if wait and timeout > 0:
+                    continue
+                break
+
+        if batch:
+            self._write_batch(batch)
+
+    def _write_batch(self, batch):
+        try:
+            self._collection.insert_many(batch, ordered=False)
+            self._count("written", len(batch))
+            self._count("batches")
+        except Exception as e:
+            logger.error(f"Access log batch write error: {str(e)}")
+            self._count("failed", len(batch))
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until every queued entry has been written (or failed)"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                pending = self._stats["enqueued"] - (
+                    self._stats["written"] + self._stats["failed"]
+                )
+            if pending <= 0:
+                return True
+            time.sleep(0.01)
+        return False
+
+    def close(self, timeout: float = 5.0):
+        """Stop the drain thread after writing everything still queued"""
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join(timeout)
+        self._thread = None
+
+    def stats(self) -> Dict[str, int]:
+        """Get writer counters"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["queued"] = self._queue.qsize()
+        return stats
@@ -3,14 +3,21 @@ Enhanced authentication middleware with rate limiting and security features
 """
 
 import logging
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 from functools import wraps
 
-from flask import jsonify, request
+from bson import ObjectId
+from flask import current_app, jsonify, request
 
+from core.database import supports_pipeline_updates
+from core.operation_policy import policy_collection
+from middleware.access_log import AccessLogWriter
+from middleware.rate_limit_policy import rate_limit_headers
+from middleware.rate_limiter import create_rate_limiter
+from middleware.request_context import get_request_context
 from models.user import User
-from utils.auth_utils import verify_token
 from utils.database import get_db
+from utils.token_epochs import token_epochs
 
 logger = logging.getLogger(__name__)
 
@@ -20,28 +27,42 @@ class AuthMiddleware:
 
     def __init__(self):
         self.user_model = User()
-        self.db = None
+        self.db = None  # Fixed database (tests, benchmarks); else get_db() per call
+        self._rate_limiters = {}
+        self._access_log_writer = None
 
     def _get_collection(self, collection_name: str):
-        """Get database collection"""
-        if self.db is None:
-            self.db = get_db()
-        return self.db[collection_name]
-
-    def _get_client_ip(self, request):
-        """Get client IP address"""
-        # Check for forwarded IP first (behind proxy/load balancer)
-        forwarded_for = request.headers.get("X-Forwarded-For")
-        if forwarded_for:
-            return forwarded_for.split(",")[0].strip()
-
-        # Check other common headers
-        real_ip = request.headers.get("X-Real-IP")
-        if real_ip:
-            return real_ip
-
-        # Fall back to remote_addr
-        return request.environ.get("REMOTE_ADDR", "unknown")
+        """Get database collection, with its operation class's write concern"""
+        # Resolved per call: this instance outlives forks and app contexts
+        db = self.db if self.db is not None else get_db()
+        return policy_collection(db, collection_name)
+
+    def _get_rate_limiter(self):
+        """Get the rate limiter backend selected by RATE_LIMIT_BACKEND"""
+        backend = current_app.config.get("RATE_LIMIT_BACKEND", "memory")
+        limiter = self._rate_limiters.get(backend)
+        if limiter is None:
+            limiter = create_rate_limiter(
+                backend,
+                collection_getter=lambda: self._get_collection("rate_limits"),
+                max_keys=current_app.config.get("RATE_LIMIT_MAX_KEYS", 100000),
+                pipeline_updates=supports_pipeline_updates(current_app.config),
+            )
+            limiter = self._rate_limiters.setdefault(backend, limiter)
+        return limiter
+
+    def _get_access_log_writer(self):
+        """Get the buffered access log writer, creating it on first use"""
+        if self._access_log_writer is None:
+            config = current_app.config
+            self._access_log_writer = AccessLogWriter(
+                lambda: self._get_collection("access_logs"),
+                max_queue=config.get("ACCESS_LOG_QUEUE_SIZE", 10000),
+                batch_size=config.get("ACCESS_LOG_BATCH_SIZE", 500),
+                flush_interval=config.get("ACCESS_LOG_FLUSH_INTERVAL", 1.0),
+                sample_rate=config.get("ACCESS_LOG_SAMPLE_RATE", 10),
+            )
+        return self._access_log_writer
 
     def rate_limit(
         self, max_requests: int = 60, window_minutes: int = 1, per: str = "ip"
@@ -53,42 +74,25 @@ class AuthMiddleware:
             def decorated_function(*args, **kwargs):
                 try:
                     # Get identifier for rate limiting
-                    if per == "ip":
-                        identifier = self._get_client_ip(request)
-                    elif per == "user":
-                        # Get user from token if available
-                        auth_header = request.headers.get("Authorization")
-                        if auth_header and auth_header.startswith("Bearer "):
-                            token = auth_header[7:]
-                            payload = verify_token(token)
-                            if payload:
-                                identifier = payload.get(
-                                    "user_id", self._get_client_ip(request)
-                                )
-                            else:
-                                identifier = self._get_client_ip(request)
-                        else:
-                            identifier = self._get_client_ip(request)
-                    else:
-                        identifier = self._get_client_ip(request)
-
-                    # Get current window
-                    now = datetime.now(timezone.utc)
-                    window_start = now - timedelta(minutes=window_minutes)
+                    context = get_request_context()
+                    identifier = None
+                    if per == "user":
+                        identifier = context.user_id
+                    identifier = identifier or context.client_ip
 
                     # Check rate limit
-                    rate_limits = self._get_collection("rate_limits")
-
-                    # Count requests in current window
-                    request_count = rate_limits.count_documents(
-                        {
-                            "identifier": identifier,
-                            "endpoint": request.endpoint,
-                            "timestamp": {"$gte": window_start},
-                        }
+                    result = self._get_rate_limiter().hit(
+                        identifier,
+                        request.endpoint,
+                        max_requests,
+                        window_minutes * 60,
+                        metadata={
+                            "ip_address": context.client_ip,
+                            "user_agent": request.headers.get("User-Agent", ""),
+                        },
                     )
 
-                    if request_count >= max_requests:
+                    if not result.allowed:
                         logger.warning(
                             f"Rate limit exceeded for {identifier} on {request.endpoint}"
                         )
@@ -101,23 +105,9 @@ class AuthMiddleware:
                                 }
                             ),
                             429,
+                            rate_limit_headers(result),
                         )
 
-                    # Record this request
-                    rate_limits.insert_one(
-                        {
-                            "identifier": identifier,
-                            "endpoint": request.endpoint,
-                            "timestamp": now,
-                            "ip_address": self._get_client_ip(request),
-                            "user_agent": request.headers.get("User-Agent", ""),
-                        }
-                    )
-
-                    # Clean up old records (optional, can be done via background job)
-                    cutoff_time = now - timedelta(hours=24)
-                    rate_limits.delete_many({"timestamp": {"$lt": cutoff_time}})
-
                     return f(*args, **kwargs)
 
                 except Exception as e:
@@ -134,14 +124,9 @@ class AuthMiddleware:
 
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            token = None
-
-            # Get token from Authorization header
-            auth_header = request.headers.get("Authorization")
-            if auth_header and auth_header.startswith("Bearer "):
-                token = auth_header[7:]
+            context = get_request_context()
 
-            if not token:
+            if not context.bearer_token:
                 return (
                     jsonify(
                         {
@@ -154,7 +139,7 @@ class AuthMiddleware:
                 )
 
             # Verify token
-            payload = verify_token(token)
+            payload = context.payload
             if not payload:
                 return (
                     jsonify(
@@ -180,9 +165,31 @@ class AuthMiddleware:
                     401,
                 )
 
-            # Get user from database
+            # Get user from the token claims or the database
             try:
-                user = self.user_model.find_by_id(payload["user_id"])
+                stateless = self._is_stateless_token(payload)
+                if stateless:
+                    if not token_epochs.is_current(
+                        payload["user_id"], payload["token_epoch"]
+                    ):
+                        return (
+                            jsonify(
+                                {
+                                    "status": "error",
+                                    "message": "Token has been revoked",
+                                    "errors": {"token": "Token has been revoked"},
+                                }
+                            ),
+                            401,
+                        )
+                    user = context.get_user(self._user_from_claims)
+                else:
+                    user = context.get_user(
+                        lambda p: self.user_model.find_by_id_cached(
+                            p["user_id"], "auth"
+                        )
+                    )
+
                 if not user:
                     return (
                         jsonify(
@@ -209,6 +216,7 @@ class AuthMiddleware:
 
                 # Add user to request context
                 request.current_user = user
+                request.current_user_is_stateless = stateless
                 request.current_token_payload = payload
 
                 # Log access for security monitoring
@@ -231,21 +239,39 @@ class AuthMiddleware:
 
         return decorated_function
 
+    def _is_stateless_token(self, payload):
+        """Check if the token carries the claims needed to skip the user lookup"""
+        return bool(current_app.config.get("STATELESS_ACCESS_TOKENS")) and (
+            "token_epoch" in payload
+        )
+
+    def _user_from_claims(self, payload):
+        """Build the authorization view of a user from access token claims"""
+        return {
+            "_id": ObjectId(payload["user_id"]),
+            "email": payload["email"],
+            "is_active": payload.get("is_active", False),
+            "is_verified": payload.get("is_verified", False),
+            "role": payload.get("role", "user"),
+        }
+
     def _log_access(self, user, request):
         """Log user access for security monitoring"""
         try:
-            access_logs = self._get_collection("access_logs")
-            access_logs.insert_one(
-                {
-                    "user_id": str(user["_id"]),
-                    "email": user["email"],
-                    "endpoint": request.endpoint,
-                    "method": request.method,
-                    "ip_address": self._get_client_ip(request),
-                    "user_agent": request.headers.get("User-Agent", ""),
-                    "timestamp": datetime.now(timezone.utc),
-                }
-            )
+            entry = {
+                "user_id": str(user["_id"]),
+                "email": user["email"],
+                "endpoint": request.endpoint,
+                "method": request.method,
+                "ip_address": get_request_context().client_ip,
+                "user_agent": request.headers.get("User-Agent", ""),
+                "timestamp": datetime.now(timezone.utc),
+            }
+
+            if current_app.config.get("ACCESS_LOG_ASYNC", True):
+                self._get_access_log_writer().write(entry)
+            else:
+                self._get_collection("access_logs").insert_one(entry)
         except Exception as e:
             logger.error(f"Access logging error: {str(e)}")
 
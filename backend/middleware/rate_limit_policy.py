@@ -0,0 +1,297 @@
+"""
+Declarative per-endpoint rate limit policies enforced by one before_request hook
+"""
+
+import fnmatch
+import logging
+import math
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from flask import g, jsonify, request
+
+from core.database import supports_pipeline_updates
+from core.operation_policy import policy_collection
+from middleware.rate_limiter import (
+    TOKEN_BUCKET_BACKENDS,
+    RateLimitResult,
+    TokenBucketBackend,
+    create_rate_limiter,
+    create_token_bucket,
+)
+from middleware.request_context import RequestContext, get_request_context
+from utils.database import get_db
+
+logger = logging.getLogger(__name__)
+
+RATE_PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+RATE_REGEX = re.compile(r"^\s*(\d+)\s*/\s*(\d*)\s*([smhd])\s*$")
+
+# Engine of each policy algorithm per RATE_LIMIT_POLICY_BACKEND; token_bucket
+# names a token bucket backend, the others a window rate limiter backend
+ALGORITHM_BACKENDS = {
+    "token_bucket": {"memory": "memory", "mongo": "mongo"},
+    "sliding_log": {"memory": "memory", "mongo": "mongo"},
+    "sliding_counter": {"memory": "memory_counter", "mongo": "mongo_counter"},
+    "fixed_window": {"memory": "memory_fixed", "mongo": "mongo_fixed"},
+}
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """Parse a rate such as "60/m" or "5/5m" into (requests, period_seconds)"""
+    match = RATE_REGEX.match(rate)
+    if not match:
+        raise ValueError(f"Invalid rate limit: {rate}")
+
+    count, multiplier, unit = match.groups()
+    return int(count), int(multiplier or 1) * RATE_PERIODS[unit]
+
+
+class RateLimitPolicy:
+    """A rate limit applied to the requests matching a set of path patterns"""
+
+    IDENTITIES = ("ip", "user", "email")
+
+    def __init__(
+        self,
+        name: str,
+        patterns: Iterable[str],
+        rate: str,
+        burst: Optional[int] = None,
+        per: str = "ip",
+        methods: Optional[Iterable[str]] = None,
+        algorithm: str = "token_bucket",
+    ):
+        if per not in self.IDENTITIES:
+            raise ValueError(f"Invalid rate limit identity for '{name}': {per}")
+        if algorithm not in ALGORITHM_BACKENDS:
+            raise ValueError(f"Invalid rate limit algorithm for '{name}': {algorithm}")
+
+        count, period = parse_rate(rate)
+        self.name = name
+        self.patterns = list(patterns)
+        self.per = per
+        self.methods = {m.upper() for m in methods} if methods else None
+        self.algorithm = algorithm
+        self.limit = count
+        self.period = period
+        # Token bucket only; the window algorithms allow limit per period
+        self.refill_rate = count / period  # Tokens per second
+        self.burst = burst or count
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RateLimitPolicy":
+        patterns = data.get("patterns") or [data["pattern"]]
+        return cls(
+            name=data.get("name", patterns[0]),
+            patterns=patterns,
+            rate=data["rate"],
+            burst=data.get("burst"),
+            per=data.get("per", "ip"),
+            methods=data.get("methods"),
+            algorithm=data.get("algorithm", "token_bucket"),
+        )
+
+    def identify(self, context: RequestContext) -> str:
+        """Resolve the identity the bucket is keyed by, falling back to the client IP"""
+        if self.per == "user":
+            if context.user_id:
+                return f"user:{context.user_id}"
+        elif self.per == "email":
+            data = request.get_json(silent=True)
+            if isinstance(data, dict) and isinstance(data.get("email"), str):
+                return f"email:{data['email'].strip().lower()}"
+
+        return f"ip:{context.client_ip}"
+
+    def check(
+        self, limiter, identifier: str, metadata: Optional[Dict[str, Any]] = None
+    ) -> RateLimitResult:
+        """Count one request of identifier on the limiter of this policy's algorithm"""
+        if isinstance(limiter, TokenBucketBackend):
+            return limiter.consume(
+                f"{self.name}|{identifier}", self.refill_rate, self.burst
+            )
+        return limiter.hit(identifier, self.name, self.limit, self.period, metadata)
+
+
+class PolicyTable:
+    """
+    Compiled lookup from request path to policy.
+
+    Exact paths resolve through a dict; wildcard patterns are folded into a
+    single alternation regex, ordered from most to least specific, so every
+    request costs at most one dict lookup and one regex match.
+    """
+
+    def __init__(self, policies: List[RateLimitPolicy]):
+        self.policies = policies
+        self._exact: Dict[str, List[RateLimitPolicy]] = {}
+        wildcards = []
+
+        for policy in policies:
+            for pattern in policy.patterns:
+                if any(c in pattern for c in "*?["):
+                    wildcards.append((pattern, policy))
+                else:
+                    self._exact.setdefault(pattern.rstrip("/") or "/", []).append(
+                        policy
+                    )
+
+        # Longest literal prefix first so "/api/auth/*" wins over "/api/*"
+        wildcards.sort(key=lambda item: len(re.split(r"[*?\[]", item[0])[0]))
+        wildcards.reverse()
+        self._wildcard_policies = [policy for _, policy in wildcards]
+        self._wildcard_regex = (
+            re.compile(
+                "|".join(
+                    f"(?P<p{i}>{fnmatch.translate(pattern)})"
+                    for i, (pattern, _) in enumerate(wildcards)
+                )
+            )
+            if wildcards
+            else None
+        )
+
+    @classmethod
+    def from_config(cls, policies: Iterable[Dict[str, Any]]) -> "PolicyTable":
+        return cls([RateLimitPolicy.from_dict(p) for p in policies])
+
+    def match(self, path: str, method: str) -> Optional[RateLimitPolicy]:
+        """Find the policy for a request, or None if it is not rate limited"""
+        for policy in self._exact.get(path.rstrip("/") or "/", ()):
+            if policy.methods is None or method in policy.methods:
+                return policy
+
+        if self._wildcard_regex is not None:
+            match = self._wildcard_regex.match(path)
+            if match:
+                policy = self._wildcard_policies[int(match.lastgroup[1:])]
+                if policy.methods is None or method in policy.methods:
+                    return policy
+
+        return None
+
+
+def rate_limit_headers(result: RateLimitResult) -> Dict[str, str]:
+    """Standard RateLimit-* headers (plus Retry-After when refused)"""
+    headers = {
+        "RateLimit-Limit": str(result.limit),
+        "RateLimit-Remaining": str(result.remaining),
+        "RateLimit-Reset": str(math.ceil(result.reset_after)),
+    }
+    if not result.allowed:
+        headers["Retry-After"] = str(max(math.ceil(result.reset_after), 1))
+    return headers
+
+
+def create_policy_limiter(
+    algorithm: str,
+    backend: str,
+    collection_getter: Optional[Callable[[], Any]] = None,
+    max_keys: int = 100000,
+    pipeline_updates: bool = True,
+):
+    """
+    Build the engine running algorithm on a RATE_LIMIT_POLICY_BACKEND.
+    Without pipeline_updates, shared algorithms needing them fall back to the
+    fixed window rather than failing open on every request.
+    """
+    backends = ALGORITHM_BACKENDS[algorithm]
+    if backend not in backends:
+        raise ValueError(f"Unknown rate limit policy backend: {backend}")
+
+    name = backends[backend]
+    if algorithm == "token_bucket":
+        if pipeline_updates or not TOKEN_BUCKET_BACKENDS[name].pipeline_updates:
+            return create_token_bucket(
+                name, collection_getter=collection_getter, max_keys=max_keys
+            )
+        logger.warning(
+            f"Token bucket backend '{name}' needs pipeline updates; using fixed_window"
+        )
+        name = ALGORITHM_BACKENDS["fixed_window"][backend]
+
+    return create_rate_limiter(
+        name,
+        collection_getter=collection_getter,
+        max_keys=max_keys,
+        pipeline_updates=pipeline_updates,
+    )
+
+
+def init_rate_limiting(app, collection_getter: Optional[Callable[[], Any]] = None):
+    """
+    Enforce the RATE_LIMIT_POLICIES table on every request of the app.
+    Shared limits live in collection_getter() (default: the app's rate_limits).
+    """
+    config = app.config
+    table = PolicyTable.from_config(config.get("RATE_LIMIT_POLICIES", []))
+    backend = config.get("RATE_LIMIT_POLICY_BACKEND", "memory")
+    collection_getter = collection_getter or (
+        lambda: policy_collection(get_db(), "rate_limits")
+    )
+
+    # One engine per algorithm in use; keys are namespaced by policy name
+    limiters = {}
+    for policy in table.policies:
+        if policy.algorithm not in limiters:
+            limiters[policy.algorithm] = create_policy_limiter(
+                policy.algorithm,
+                backend,
+                collection_getter=collection_getter,
+                max_keys=config.get("RATE_LIMIT_MAX_KEYS", 100000),
+                pipeline_updates=supports_pipeline_updates(config),
+            )
+    app.extensions["rate_limit_policies"] = table
+
+    @app.before_request
+    def enforce_rate_limit_policy():
+        """Apply the matching rate limit policy before the view runs"""
+        if request.method == "OPTIONS":
+            return None
+
+        policy = table.match(request.path, request.method)
+        if policy is None:
+            return None
+
+        try:
+            context = get_request_context()
+            identifier = policy.identify(context)
+            result = policy.check(
+                limiters[policy.algorithm],
+                identifier,
+                metadata={
+                    "ip_address": context.client_ip,
+                    "user_agent": request.headers.get("User-Agent", ""),
+                },
+            )
+        except Exception as e:
+            # On error, allow the request to proceed
+            logger.error(f"Rate limiting error: {str(e)}")
+            return None
+
+        g.rate_limit_result = result
+        if result.allowed:
+            return None
+
+        logger.warning(f"Rate limit '{policy.name}' exceeded for {identifier}")
+        response = jsonify(
+            {
+                "status": "error",
+                "message": "Rate limit exceeded. Please try again later.",
+                "errors": {"rateLimit": "Too many requests"},
+            }
+        )
+        response.status_code = 429
+        return response
+
+    @app.after_request
+    def add_rate_limit_headers(response):
+        """Tell clients how much quota is left so they can back off"""
+        result = g.pop("rate_limit_result", None)
+        if result is not None:
+            response.headers.update(rate_limit_headers(result))
+        return response
+
+    return table
@@ -0,0 +1,548 @@
+"""
+Pluggable rate limiter engines used by the rate limit policy table and the
+authentication middleware
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitResult(NamedTuple):
+    """Outcome of a single rate limit check"""
+
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float  # Seconds until another request would be allowed
+
+
+class RateLimiterBackend:
+    """Base class for rate limiter backends"""
+
+    name = "base"
+    # Runs update pipelines, which the in-process store does not support
+    pipeline_updates = False
+
+    def hit(
+        self,
+        identifier: str,
+        endpoint: str,
+        max_requests: int,
+        window_seconds: int,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> RateLimitResult:
+        """Record a request for (identifier, endpoint) and decide if it is allowed"""
+        raise NotImplementedError
+
+    def reset(self):
+        """Forget all recorded requests"""
+
+
+class _MemoryBackend(RateLimiterBackend):
+    """Shared bookkeeping for the process-local backends"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[tuple, Any]" = OrderedDict()
+
+    def _get_bucket(self, key: tuple, factory: Callable[[], Any]):
+        """Fetch a bucket in LRU order, evicting the coldest keys when full"""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = factory()
+            self._buckets[key] = bucket
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class SlidingWindowLogLimiter(_MemoryBackend):
+    """
+    Exact sliding window kept in process memory.
+    Stores one timestamp per allowed request, at most max_requests per key.
+    """
+
+    name = "memory"
+
+    def hit(
+        self,
+        identifier: str,
+        endpoint: str,
+        max_requests: int,
+        window_seconds: int,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> RateLimitResult:
+        now = time.monotonic()
+        window_start = now - window_seconds
+
+        with self._lock:
+            log = self._get_bucket((identifier, endpoint), deque)
+
+            # Drop requests that fell out of the window
+            while log and log[0] <= window_start:
+                log.popleft()
+
+            if len(log) >= max_requests:
+                reset_after = log[0] + window_seconds - now if log else window_seconds
+                return RateLimitResult(False, max_requests, 0, max(reset_after, 0.0))
+
+            log.append(now)
+            return RateLimitResult(
+                True,
+                max_requests,
+                max_requests - len(log),
+                log[0] + window_seconds - now,
+            )
+
+
+class SlidingWindowCounterLimiter(_MemoryBackend):
+    """
+    Approximate sliding window kept in process memory.
+    Keeps two fixed-window counters per key and weights the previous one by
+    how much of it still overlaps the sliding window.
+    """
+
+    name = "memory_counter"
+
+    def hit(
+        self,
+        identifier: str,
+        endpoint: str,
+        max_requests: int,
+        window_seconds: int,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> RateLimitResult:
+        now = time.monotonic()
+        current_window = int(now // window_seconds)
+        elapsed = now - current_window * window_seconds
+
+        with self._lock:
+            # bucket = [window_index, current_count, previous_count]
+            bucket = self._get_bucket(
+                (identifier, endpoint), lambda: [current_window, 0, 0]
+            )
+
+            if bucket[0] != current_window:
+                bucket[2] = bucket[1] if bucket[0] == current_window - 1 else 0
+                bucket[1] = 0
+                bucket[0] = current_window
+
+            weight = (window_seconds - elapsed) / window_seconds
+            estimated = bucket[2] * weight + bucket[1]
+            reset_after = window_seconds - elapsed
+
+            if estimated >= max_requests:
+                return RateLimitResult(False, max_requests, 0, reset_after)
+
+            bucket[1] += 1
+            remaining = max(int(max_requests - estimated - 1), 0)
+            return RateLimitResult(True, max_requests, remaining, reset_after)
+
+
+class FixedWindowLimiter(_MemoryBackend):
+    """
+    Fixed window counter kept in process memory.
+    Counts requests per key in windows aligned to multiples of their length.
+    """
+
+    name = "memory_fixed"
+
+    def hit(
+        self,
+        identifier: str,
+        endpoint: str,
+        max_requests: int,
+        window_seconds: int,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> RateLimitResult:
+        now = time.monotonic()
+        window = int(now // window_seconds)
+        reset_after = (window + 1) * window_seconds - now
+
+        with self._lock:
+            # bucket = [window_index, count]
+            bucket = self._get_bucket((identifier, endpoint), lambda: [window, 0])
+            if bucket[0] != window:
+                bucket[0] = window
+                bucket[1] = 0
+
+            if bucket[1] >= max_requests:
+                return RateLimitResult(False, max_requests, 0, reset_after)
+
+            bucket[1] += 1
+            return RateLimitResult(
+                True, max_requests, max_requests - bucket[1], reset_after
+            )
+
+
+class MongoRateLimiter(RateLimiterBackend):
+    """Sliding window log stored in the rate_limits collection (one document per request)"""
+
+    name = "mongo"
+
+    def __init__(self, collection_getter: Callable[[], Any]):
+        self._get_collection = collection_getter
+
+    def hit(
+        self,
+        identifier: str,
+        endpoint: str,
+        max_requests: int,
+        window_seconds: int,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> RateLimitResult:
+        now = datetime.now(timezone.utc)
+        window_start = now - timedelta(seconds=window_seconds)
+        rate_limits = self._get_collection()
+
+        # Count requests in current window
+        request_count = rate_limits.count_documents(
+            {
+                "identifier": identifier,
+                "endpoint": endpoint,
+                "timestamp": {"$gte": window_start},
+            }
+        )
+
+        if request_count >= max_requests:
+            return RateLimitResult(False, max_requests, 0, float(window_seconds))
+
+        # Record this request
+        rate_limits.insert_one(
+            {
+                "identifier": identifier,
+                "endpoint": endpoint,
+                "timestamp": now,
+                **(metadata or {}),
+            }
+        )
+
+        # Old records are expired by the TTL index on timestamp
+
+        return RateLimitResult(
+            True, max_requests, max_requests - request_count - 1, float(window_seconds)
+        )
+
+
+def _upsert_counter(collection, key: str, update, projection: Dict[str, int]):
+    """Apply an upserting counter update, retrying once if a concurrent upsert won"""
+    for attempt in range(2):
+        try:
+            return collection.find_one_and_update(
+                {"key": key},
+                update,
+                projection=projection,
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            if attempt:
+                raise
+
+
+class MongoFixedWindowLimiter(RateLimiterBackend):
+    """
+    Fixed window counter stored in the rate_limits collection.
+    Keeps one document per (identifier, endpoint, window) key and updates it
+    with a single atomic find_one_and_update, so every node shares the limit.
+    """
+
+    name = "mongo_fixed"
+
+    def __init__(self, collection_getter: Callable[[], Any]):
+        self._get_collection = collection_getter
+
+    def _upsert_counter(self, key: str, update, projection: Dict[str, int]):
+        return _upsert_counter(self._get_collection(), key, update, projection)
+
+    def hit(
+        self,
+        identifier: str,
+        endpoint: str,
+        max_requests: int,
+        window_seconds: int,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> RateLimitResult:
+        now = time.time()
+        window = int(now // window_seconds)
+        window_end = (window + 1) * window_seconds
+
+        doc = self._upsert_counter(
+            f"{identifier}|{endpoint}|{window_seconds}|{window}",
+            {
+                "$inc": {"count": 1},
+                "$setOnInsert": {
+                    "identifier": identifier,
+                    "endpoint": endpoint,
+                    "reset_time": datetime.fromtimestamp(window_end, timezone.utc),
+                },
+            },
+            {"_id": 0, "count": 1},
+        )
+
+        count = doc["count"]
+        return RateLimitResult(
+            count <= max_requests,
+            max_requests,
+            max(max_requests - count, 0),
+            window_end - now,
+        )
+
+
+class MongoSlidingWindowCounterLimiter(MongoFixedWindowLimiter):
+    """
+    Approximate sliding window stored in the rate_limits collection.
+    Keeps one document per (identifier, endpoint, window length) holding the
+    current and previous window counts; the roll-over, limit check and
+    increment all happen server side in one pipeline update.
+    """
+
+    name = "mongo_counter"
+    pipeline_updates = True
+
+    def hit(
+        self,
+        identifier: str,
+        endpoint: str,
+        max_requests: int,
+        window_seconds: int,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> RateLimitResult:
+        now = time.time()
+        window = int(now // window_seconds)
+        elapsed = now - window * window_seconds
+        weight = (window_seconds - elapsed) / window_seconds
+        # The document is irrelevant once the next window has fully passed
+        expires = datetime.fromtimestamp((window + 2) * window_seconds, timezone.utc)
+
+        pipeline = [
+            {
+                "$set": {
+                    "prev": {
+                        "$cond": [
+                            {"$eq": ["$window", window]},
+                            "$prev",
+                            {
+                                "$cond": [
+                                    {"$eq": ["$window", window - 1]},
+                                    "$count",
+                                    0,
+                                ]
+                            },
+                        ]
+                    },
+                    "count": {"$cond": [{"$eq": ["$window", window]}, "$count", 0]},
+                    "window": window,
+                }
+            },
+            {
+                "$set": {
+                    "allowed": {
+                        "$lt": [
+                            {"$add": [{"$multiply": ["$prev", weight]}, "$count"]},
+                            max_requests,
+                        ]
+                    }
+                }
+            },
+            {
+                "$set": {
+                    "count": {"$cond": ["$allowed", {"$add": ["$count", 1]}, "$count"]},
+                    "identifier": identifier,
+                    "endpoint": endpoint,
+                    "reset_time": expires,
+                }
+            },
+        ]
+
+        doc = self._upsert_counter(
+            f"{identifier}|{endpoint}|{window_seconds}",
+            pipeline,
+            {"_id": 0, "count": 1, "prev": 1, "allowed": 1},
+        )
+
+        estimated = doc["prev"] * weight + doc["count"]
+        return RateLimitResult(
+            doc["allowed"],
+            max_requests,
+            max(int(max_requests - estimated), 0),
+            window_seconds - elapsed,
+        )
+
+
+class TokenBucketBackend:
+    """
+    Base class for token bucket backends used by the rate limit policy table.
+
+    A bucket holds up to burst tokens and refills at rate tokens per second.
+    The reset_after of a result is the time until the next token when the
+    request was refused, and the time until the bucket is full otherwise.
+    """
+
+    name = "base"
+    # Runs update pipelines, which the in-process store does not support
+    pipeline_updates = False
+
+    def consume(self, key: str, rate: float, burst: int) -> RateLimitResult:
+        """Take one token from the bucket for key"""
+        raise NotImplementedError
+
+    def reset(self):
+        """Forget all buckets"""
+
+
+class MemoryTokenBucket(_MemoryBackend, TokenBucketBackend):
+    """Token buckets kept in process memory"""
+
+    name = "memory"
+
+    def consume(self, key: str, rate: float, burst: int) -> RateLimitResult:
+        now = time.monotonic()
+
+        with self._lock:
+            # bucket = [tokens, last_refill]
+            bucket = self._get_bucket(key, lambda: [float(burst), now])
+            tokens = min(float(burst), bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+
+            if tokens < 1:
+                bucket[0] = tokens
+                return RateLimitResult(False, burst, 0, (1 - tokens) / rate)
+
+            tokens -= 1
+            bucket[0] = tokens
+            return RateLimitResult(True, burst, int(tokens), (burst - tokens) / rate)
+
+
+class MongoTokenBucket(TokenBucketBackend):
+    """
+    Token buckets stored in the rate_limits collection.
+    Refill, check and take happen server side in one pipeline update, so the
+    bucket is shared by every node at one round trip per request.
+    """
+
+    name = "mongo"
+    pipeline_updates = True
+
+    def __init__(self, collection_getter: Callable[[], Any]):
+        self._get_collection = collection_getter
+
+    def consume(self, key: str, rate: float, burst: int) -> RateLimitResult:
+        now = datetime.now(timezone.utc)
+        # A bucket left alone this long is full again and can be forgotten
+        expires = now + timedelta(seconds=burst / rate)
+
+        elapsed_seconds = {
+            "$divide": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, 1000]
+        }
+        refilled = {
+            "$add": [
+                {"$ifNull": ["$tokens", burst]},
+                {"$multiply": [elapsed_seconds, rate]},
+            ]
+        }
+
+        pipeline = [
+            {"$set": {"tokens": {"$min": [burst, refilled]}, "updated_at": now}},
+            {"$set": {"allowed": {"$gte": ["$tokens", 1]}}},
+            {
+                "$set": {
+                    "tokens": {
+                        "$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]
+                    },
+                    "reset_time": expires,
+                }
+            },
+        ]
+
+        doc = _upsert_counter(
+            self._get_collection(),
+            f"bucket|{key}",
+            pipeline,
+            {"_id": 0, "tokens": 1, "allowed": 1},
+        )
+
+        tokens = doc["tokens"]
+        if not doc["allowed"]:
+            return RateLimitResult(False, burst, 0, (1 - tokens) / rate)
+        return RateLimitResult(True, burst, int(tokens), (burst - tokens) / rate)
+
+
+RATE_LIMITER_BACKENDS = {
+    SlidingWindowLogLimiter.name: SlidingWindowLogLimiter,
+    SlidingWindowCounterLimiter.name: SlidingWindowCounterLimiter,
+    FixedWindowLimiter.name: FixedWindowLimiter,
+    MongoRateLimiter.name: MongoRateLimiter,
+    MongoFixedWindowLimiter.name: MongoFixedWindowLimiter,
+    MongoSlidingWindowCounterLimiter.name: MongoSlidingWindowCounterLimiter,
+}
+
+
+def create_rate_limiter(
+    backend: str,
+    collection_getter: Optional[Callable[[], Any]] = None,
+    max_keys: int = 100000,
+    pipeline_updates: bool = True,
+) -> RateLimiterBackend:
+    """
+    Build a rate limiter backend by name.
+    Without pipeline_updates, backends needing them are replaced by the shared
+    fixed window, whose $inc counter works on every store.
+    """
+    backend_class = RATE_LIMITER_BACKENDS.get(backend)
+    if backend_class is None:
+        raise ValueError(f"Unknown rate limiter backend: {backend}")
+
+    if backend_class.pipeline_updates and not pipeline_updates:
+        logger.warning(
+            f"Rate limiter backend '{backend}' needs pipeline updates; "
+            f"using {MongoFixedWindowLimiter.name}"
+        )
+        backend_class = MongoFixedWindowLimiter
+
+    if issubclass(backend_class, _MemoryBackend):
+        return backend_class(max_keys=max_keys)
+
+    if collection_getter is None:
+        raise ValueError(f"Rate limiter backend '{backend}' requires a collection")
+    return backend_class(collection_getter)
+
+
+TOKEN_BUCKET_BACKENDS = {
+    MemoryTokenBucket.name: MemoryTokenBucket,
+    MongoTokenBucket.name: MongoTokenBucket,
+}
+
+
+def create_token_bucket(
+    backend: str,
+    collection_getter: Optional[Callable[[], Any]] = None,
+    max_keys: int = 100000,
+) -> TokenBucketBackend:
+    """Build a token bucket backend by name"""
+    backend_class = TOKEN_BUCKET_BACKENDS.get(backend)
+    if backend_class is None:
+        raise ValueError(f"Unknown token bucket backend: {backend}")
+
+    if issubclass(backend_class, _MemoryBackend):
+        return backend_class(max_keys=max_keys)
+
+    if collection_getter is None:
+        raise ValueError(f"Token bucket backend '{backend}' requires a collection")
+    return backend_class(collection_getter)
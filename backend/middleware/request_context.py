@@ -0,0 +1,130 @@
+"""
+Per-request authentication context shared by the middleware and decorators
+"""
+
+import ipaddress
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from flask import current_app, g, request
+
+from utils.auth_utils import verify_token
+
+_UNSET = object()
+
+
+@lru_cache(maxsize=8)
+def _parse_networks(cidrs: Tuple[str, ...]):
+    return tuple(ipaddress.ip_network(cidr, strict=False) for cidr in cidrs)
+
+
+def _is_trusted(address: str, networks) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in networks)
+
+
+def resolve_client_ip(
+    remote_addr: Optional[str],
+    forwarded_for: Optional[str],
+    real_ip: Optional[str],
+    trusted_proxies: Iterable[str],
+) -> str:
+    """
+    Find the client address, trusting forwarding headers only from known proxies.
+
+    X-Forwarded-For is walked from the right, skipping trusted proxies, so a
+    client cannot spoof its address by sending the header itself.
+    """
+    if not remote_addr:
+        return "unknown"
+
+    networks = _parse_networks(tuple(trusted_proxies))
+    if not _is_trusted(remote_addr, networks):
+        return remote_addr
+
+    if forwarded_for:
+        hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+        for hop in reversed(hops):
+            if not _is_trusted(hop, networks):
+                return hop
+        if hops:
+            return hops[0]
+
+    if real_ip:
+        return real_ip.strip()
+
+    return remote_addr
+
+
+class RequestContext:
+    """
+    Client IP, bearer token, verified payload and user of the current request.
+
+    Each value is computed on first access and reused for the rest of the
+    request, so stacked decorators and hooks never parse or verify twice.
+    """
+
+    __slots__ = ("_client_ip", "_bearer_token", "_payload", "_user")
+
+    def __init__(self):
+        self._client_ip = _UNSET
+        self._bearer_token = _UNSET
+        self._payload = _UNSET
+        self._user = _UNSET
+
+    @property
+    def client_ip(self) -> str:
+        if self._client_ip is _UNSET:
+            self._client_ip = resolve_client_ip(
+                request.remote_addr,
+                request.headers.get("X-Forwarded-For"),
+                request.headers.get("X-Real-IP"),
+                current_app.config.get("TRUSTED_PROXIES", ()),
+            )
+        return self._client_ip
+
+    @property
+    def has_authorization(self) -> bool:
+        return "Authorization" in request.headers
+
+    @property
+    def bearer_token(self) -> Optional[str]:
+        """Token from an "Authorization: Bearer <token>" header"""
+        if self._bearer_token is _UNSET:
+            scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+            token = token.strip()
+            self._bearer_token = token if scheme.lower() == "bearer" and token else None
+        return self._bearer_token
+
+    @property
+    def payload(self) -> Optional[Dict[str, Any]]:
+        """Verified JWT payload of the bearer token, or None"""
+        if self._payload is _UNSET:
+            token = self.bearer_token
+            self._payload = verify_token(token) if token else None
+        return self._payload
+
+    @property
+    def user_id(self) -> Optional[str]:
+        payload = self.payload
+        return payload.get("user_id") if payload else None
+
+    def get_user(
+        self, loader: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]
+    ) -> Optional[Dict[str, Any]]:
+        """Resolve the user from the payload with loader, at most once per request"""
+        if self._user is _UNSET:
+            payload = self.payload
+            self._user = loader(payload) if payload else None
+        return self._user
+
+
+def get_request_context() -> RequestContext:
+    """Get the context of the current request, creating it on first use"""
+    context = g.get("request_context")
+    if context is None:
+        context = g.request_context = RequestContext()
+    return context
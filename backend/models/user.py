@@ -2,14 +2,24 @@
 User model for MongoDB with schema validation and user management
 """
 
+import logging
 import re
 from datetime import datetime, timezone
 from typing import Any, Dict, Optional
 
-import bcrypt
 from bson import ObjectId
+from flask import current_app
+from pymongo import ReturnDocument
 
+from core.operation_policy import policy_collection
+from models.user_stats import UserStats
+from utils.cache import recent_user_writes, user_cache
 from utils.database import get_db
+from utils.hashing_pool import HashingPoolBusy
+from utils.password_utils import password_hasher
+from utils.token_epochs import token_epochs
+
+logger = logging.getLogger(__name__)
 
 
 class User:
@@ -18,14 +28,49 @@ class User:
     # Email validation regex
     EMAIL_REGEX = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
 
+    # Projections for the find_by_* lookups; None fetches the whole document.
+    # Authorization checks on each authenticated request
+    AUTH_VIEW = {
+        "_id": 1,
+        "email": 1,
+        "is_active": 1,
+        "is_verified": 1,
+        "role": 1,
+        "token_epoch": 1,
+    }
+    # Addressing the user in verification and reset emails
+    CONTACT_VIEW = {**AUTH_VIEW, "first_name": 1, "last_name": 1, "username": 1}
+    # Everything returned to the client
+    PROFILE_VIEW = {"password_hash": 0, "needs_rehash": 0}
+    # Verifying and replacing the password
+    CREDENTIAL_VIEW = {
+        "_id": 1,
+        "email": 1,
+        "is_active": 1,
+        "password_hash": 1,
+        "needs_rehash": 1,
+    }
+
+    # Views find_by_id_cached can serve, with the operation class (see
+    # core.operation_policy) each is read under; cache entries are kept per
+    # view. Authorization stays on the client default read preference, so a
+    # deactivation is seen at once.
+    CACHED_VIEWS = {"auth": (AUTH_VIEW, None), "profile": (PROFILE_VIEW, "profile")}
+
     def __init__(self):
-        self.db = None
+        self.db = None  # Fixed database (tests, benchmarks); else get_db() per call
+
+    def _get_db(self):
+        # Resolved per call: shared instances outlive forks and app contexts
+        return self.db if self.db is not None else get_db()
+
+    def _get_collection(self, operation: Optional[str] = None):
+        """Get users collection, with the operation class's write and read options"""
+        return policy_collection(self._get_db(), "users", operation)
 
-    def _get_collection(self):
-        """Get users collection from database"""
-        if self.db is None:
-            self.db = get_db()
-        return self.db.users
+    def _stats(self) -> UserStats:
+        """Counters kept in step with is_active and is_verified changes"""
+        return UserStats(self._get_db())
 
     @staticmethod
     def validate_email(email: str) -> bool:
@@ -34,14 +79,13 @@ class User:
 
     @staticmethod
     def hash_password(password: str) -> str:
-        """Hash password using bcrypt"""
-        salt = bcrypt.gensalt()
-        return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
+        """Hash password with the preferred scheme (on the hashing pool)"""
+        return password_hasher.hash_password(password)
 
     @staticmethod
     def verify_password(password: str, hashed: str) -> bool:
-        """Verify password against hash"""
-        return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+        """Verify password against a hash of any registered scheme"""
+        return password_hasher.verify_password(password, hashed)
 
     def create_user(
         self,
@@ -64,12 +108,12 @@ class User:
                 raise ValueError("Password must be at least 6 characters long")
 
             # Check if user already exists
-            existing_email_user = self.find_by_email(email)
+            existing_email_user = self.find_by_email(email, {"_id": 1})
             if existing_email_user is not None:
                 raise ValueError("User with this email already exists")
 
             if username:
-                existing_username_user = self.find_by_username(username)
+                existing_username_user = self.find_by_username(username, {"_id": 1})
                 if existing_username_user is not None:
                     raise ValueError("Username already taken")
 
@@ -95,8 +139,9 @@ class User:
             }
 
             # Insert user
-            collection = self._get_collection()
+            collection = self._get_collection("credentials")
             result = collection.insert_one(user_doc)
+            self._stats().increment(total_users=1, active_users=1)
 
             # Return user without password hash
             user_doc["_id"] = result.inserted_id
@@ -104,36 +149,73 @@ class User:
 
             return user_doc
 
+        except HashingPoolBusy:
+            raise
         except Exception as e:
             raise Exception(f"Failed to create user: {str(e)}")
 
-    def find_by_email(self, email: str) -> Optional[Dict[str, Any]]:
-        """Find user by email"""
+    def find_by_email(
+        self, email: str, projection: Optional[Dict[str, int]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Find user by email, with only the fields in projection if given"""
         try:
             collection = self._get_collection()
-            user = collection.find_one({"email": email.lower().strip()})
+            user = collection.find_one({"email": email.lower().strip()}, projection)
             return user
         except Exception as e:
             raise Exception(f"Failed to find user by email: {str(e)}")
 
-    def find_by_username(self, username: str) -> Optional[Dict[str, Any]]:
-        """Find user by username"""
+    def find_by_username(
+        self, username: str, projection: Optional[Dict[str, int]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Find user by username, with only the fields in projection if given"""
         try:
             collection = self._get_collection()
-            user = collection.find_one({"username": username.lower().strip()})
+            user = collection.find_one(
+                {"username": username.lower().strip()}, projection
+            )
             return user
         except Exception as e:
             raise Exception(f"Failed to find user by username: {str(e)}")
 
-    def find_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
-        """Find user by ID"""
+    def find_by_id(
+        self,
+        user_id: str,
+        projection: Optional[Dict[str, int]] = None,
+        operation: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Find user by ID, with only the fields in projection if given"""
         try:
-            collection = self._get_collection()
-            user = collection.find_one({"_id": ObjectId(user_id)})
+            collection = self._get_collection(operation)
+            user = collection.find_one({"_id": ObjectId(user_id)}, projection)
             return user
         except Exception as e:
             raise Exception(f"Failed to find user by ID: {str(e)}")
 
+    def find_by_id_cached(
+        self, user_id: str, view: str = "profile"
+    ) -> Optional[Dict[str, Any]]:
+        """Find user by ID through the shared user cache ("auth" or "profile")"""
+        projection, operation = self.CACHED_VIEWS[view]
+        if recent_user_writes.get(str(user_id)):
+            # A secondary may not have this worker's write yet
+            operation = None
+        user = user_cache.get_or_load(
+            (str(user_id), view),
+            lambda: self.find_by_id(user_id, projection, operation),
+        )
+        return dict(user) if user is not None else None
+
+    @classmethod
+    def invalidate_cached_user(cls, user_id: str):
+        """
+        Drop every view of a user from the shared user cache after it changed,
+        and reload them from the primary for USER_PRIMARY_AFTER_WRITE seconds
+        """
+        recent_user_writes.set(str(user_id), True)
+        for view in cls.CACHED_VIEWS:
+            user_cache.invalidate((str(user_id), view))
+
     def authenticate(self, email: str, password: str) -> Optional[Dict[str, Any]]:
         """Authenticate user with email and password"""
         try:
@@ -144,6 +226,13 @@ class User:
             if not self.verify_password(password, user["password_hash"]):
                 return None
 
+            self._rehash_if_needed(
+                user["_id"],
+                password,
+                user["password_hash"],
+                flagged=user.get("needs_rehash", False),
+            )
+
             # Update last login
             collection = self._get_collection()
             collection.update_one(
@@ -155,9 +244,46 @@ class User:
             user.pop("password_hash", None)
             return user
 
+        except HashingPoolBusy:
+            raise
         except Exception as e:
             raise Exception(f"Failed to authenticate user: {str(e)}")
 
+    def _rehash_if_needed(
+        self, user_id, password: str, current_hash: str, flagged: bool = False
+    ):
+        """
+        Re-hash with the preferred scheme and cost in the background after a
+        login. flagged users were marked by "python manage.py hash-audit --mark".
+        """
+        if not current_app.config.get("BCRYPT_REHASH_ON_LOGIN", True):
+            return
+        if not flagged and not password_hasher.needs_rehash(current_hash):
+            return
+
+        try:
+            future = password_hasher.submit_hash(password)
+        except HashingPoolBusy:
+            return  # Retried on a later login
+
+        collection = self._get_collection("credentials")
+
+        def store(done):
+            try:
+                # Only replace the hash the password was verified against, so a
+                # concurrent password change is never overwritten
+                collection.update_one(
+                    {"_id": user_id, "password_hash": current_hash},
+                    {
+                        "$set": {"password_hash": done.result()},
+                        "$unset": {"needs_rehash": ""},
+                    },
+                )
+            except Exception as e:
+                logger.error(f"Password rehash failed for {user_id}: {str(e)}")
+
+        future.add_done_callback(store)
+
     def update_user(self, user_id: str, update_data: Dict[str, Any]) -> bool:
         """Update user information"""
         try:
@@ -170,78 +296,169 @@ class User:
             result = collection.update_one(
                 {"_id": ObjectId(user_id)}, {"$set": update_data}
             )
+            self.invalidate_cached_user(user_id)
 
             return result.modified_count > 0
 
         except Exception as e:
             raise Exception(f"Failed to update user: {str(e)}")
 
+    def set_password_hash(self, user_id: str, password_hash: str) -> bool:
+        """Store a new password hash (update_user never accepts one)"""
+        collection = self._get_collection("credentials")
+        result = collection.update_one(
+            {"_id": ObjectId(user_id)},
+            {
+                "$set": {
+                    "password_hash": password_hash,
+                    "updated_at": datetime.now(timezone.utc),
+                },
+                "$unset": {"needs_rehash": ""},
+            },
+        )
+        self.invalidate_cached_user(user_id)
+
+        return result.modified_count > 0
+
     def change_password(
         self, user_id: str, old_password: str, new_password: str
     ) -> bool:
         """Change user password"""
         try:
-            user = self.find_by_id(user_id)
+            user = self.find_by_id(user_id, self.CREDENTIAL_VIEW)
             if not user:
                 raise ValueError("User not found")
 
-            if not self.verify_password(old_password, user["password_hash"]):
-                raise ValueError("Invalid current password")
-
             if len(new_password) < 6:
                 raise ValueError("New password must be at least 6 characters long")
 
-            # Update password
-            collection = self._get_collection()
-            result = collection.update_one(
+            # Hash the new password while the old one is being verified; the
+            # hash is thrown away if verification fails
+            new_hash = password_hasher.submit_hash(new_password)
+            try:
+                verified = self.verify_password(old_password, user["password_hash"])
+            except BaseException:
+                new_hash.cancel()
+                raise
+
+            if not verified:
+                new_hash.cancel()
+                raise ValueError("Invalid current password")
+
+            return self.set_password_hash(user_id, password_hasher.result(new_hash))
+
+        except (ValueError, HashingPoolBusy):
+            raise
+        except Exception as e:
+            raise Exception(f"Failed to change password: {str(e)}")
+
+    def delete_user(self, user_id: str) -> bool:
+        """Delete user (soft delete by setting is_active to False)"""
+        try:
+            collection = self._get_collection("credentials")
+            before = collection.find_one_and_update(
                 {"_id": ObjectId(user_id)},
                 {
                     "$set": {
-                        "password_hash": self.hash_password(new_password),
+                        "is_active": False,
                         "updated_at": datetime.now(timezone.utc),
                     }
                 },
+                projection={"is_active": 1},
             )
+            self.invalidate_cached_user(user_id)
+            if before is not None and before.get("is_active"):
+                self._stats().increment(active_users=-1)
 
-            return result.modified_count > 0
+            # Deactivation must also end any stateless access tokens
+            self.bump_token_epoch(user_id)
+
+            return before is not None
 
         except Exception as e:
-            raise Exception(f"Failed to change password: {str(e)}")
+            raise Exception(f"Failed to delete user: {str(e)}")
 
-    def delete_user(self, user_id: str) -> bool:
-        """Delete user (soft delete by setting is_active to False)"""
+    def reactivate_user(self, user_id: str) -> bool:
+        """Undo delete_user. Returns False if the user was not deactivated"""
         try:
-            collection = self._get_collection()
-            result = collection.update_one(
-                {"_id": ObjectId(user_id)},
+            collection = self._get_collection("credentials")
+            user = collection.find_one_and_update(
+                {"_id": ObjectId(user_id), "is_active": {"$ne": True}},
                 {
                     "$set": {
-                        "is_active": False,
+                        "is_active": True,
                         "updated_at": datetime.now(timezone.utc),
                     }
                 },
+                projection={"_id": 1},
             )
+            self.invalidate_cached_user(user_id)
+            if user is None:
+                return False
 
-            return result.modified_count > 0
+            self._stats().increment(active_users=1)
+            return True
 
         except Exception as e:
-            raise Exception(f"Failed to delete user: {str(e)}")
+            raise Exception(f"Failed to reactivate user: {str(e)}")
 
-    def get_user_stats(self) -> Dict[str, Any]:
-        """Get user statistics"""
+    def mark_verified(self, user_id: str) -> bool:
+        """Set is_verified and revoke older tokens. Returns False if already verified"""
         try:
-            collection = self._get_collection()
+            now = datetime.now(timezone.utc)
+            collection = self._get_collection("credentials")
+            user = collection.find_one_and_update(
+                {"_id": ObjectId(user_id), "is_verified": {"$ne": True}},
+                {
+                    "$set": {
+                        "is_verified": True,
+                        "verified_at": now,
+                        "updated_at": now,
+                        "token_epoch_updated_at": now,
+                    },
+                    # Stateless access tokens issued so far claim is_verified False
+                    "$inc": {"token_epoch": 1},
+                },
+                projection={"token_epoch": 1},
+                return_document=ReturnDocument.AFTER,
+            )
+            self.invalidate_cached_user(user_id)
+            if user is None:
+                return False
 
-            total_users = collection.count_documents({})
-            active_users = collection.count_documents({"is_active": True})
-            verified_users = collection.count_documents({"is_verified": True})
+            token_epochs.record(str(user_id), user["token_epoch"], now)
+            self._stats().increment(verified_users=1)
+            return True
 
-            return {
-                "total_users": total_users,
-                "active_users": active_users,
-                "verified_users": verified_users,
-                "inactive_users": total_users - active_users,
-            }
+        except Exception as e:
+            raise Exception(f"Failed to verify user: {str(e)}")
+
+    def bump_token_epoch(self, user_id: str) -> Optional[int]:
+        """Revoke every stateless access token issued to the user so far"""
+        try:
+            now = datetime.now(timezone.utc)
+            collection = self._get_collection("credentials")
+            user = collection.find_one_and_update(
+                {"_id": ObjectId(user_id)},
+                {"$inc": {"token_epoch": 1}, "$set": {"token_epoch_updated_at": now}},
+                projection={"token_epoch": 1},
+                return_document=ReturnDocument.AFTER,
+            )
+            self.invalidate_cached_user(user_id)
+
+            if not user:
+                return None
+
+            token_epochs.record(str(user_id), user["token_epoch"], now)
+            return user["token_epoch"]
+
+        except Exception as e:
+            raise Exception(f"Failed to bump token epoch: {str(e)}")
+
+    def get_user_stats(self) -> Dict[str, Any]:
+        """Get user statistics from the maintained counters"""
+        try:
+            return self._stats().get()
 
         except Exception as e:
             raise Exception(f"Failed to get user stats: {str(e)}")
@@ -0,0 +1,125 @@
+"""
+Incrementally maintained user counters for /api/stats
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict
+
+from flask import current_app
+
+from config import Config
+from core.operation_policy import policy_collection
+from utils.cache import stats_cache
+from utils.database import get_db
+
+logger = logging.getLogger(__name__)
+
+COUNTERS_COLLECTION = "counters"
+USER_STATS_ID = "users"
+COUNTER_FIELDS = ("total_users", "active_users", "verified_users")
+
+
+def _reconcile_interval() -> float:
+    try:
+        return current_app.config.get(
+            "USER_STATS_RECONCILE_INTERVAL", Config.USER_STATS_RECONCILE_INTERVAL
+        )
+    except RuntimeError:
+        return Config.USER_STATS_RECONCILE_INTERVAL
+
+
+class UserStats:
+    """
+    One counters document, kept current with $inc by User on every state
+    change, so reading the stats is a single _id lookup.
+
+    The counter update is a separate write from the user update, so a crash
+    in between or a write that bypasses User leaves it off by a few. A
+    periodic recount overwrites the counters (see reconcile).
+    """
+
+    def __init__(self, db=None):
+        self.db = db
+
+    def _get_db(self):
+        if self.db is None:
+            self.db = get_db()
+        return self.db
+
+    def _get_collection(self):
+        return policy_collection(self._get_db(), COUNTERS_COLLECTION)
+
+    def increment(self, **deltas: int):
+        """Apply counter deltas, e.g. increment(total_users=1, active_users=1)"""
+        try:
+            self._get_collection().update_one(
+                {"_id": USER_STATS_ID}, {"$inc": deltas}, upsert=True
+            )
+            stats_cache.invalidate(USER_STATS_ID)
+        except Exception as e:
+            # The next reconciliation corrects the counters
+            logger.error(f"User stats update failed: {str(e)}")
+
+    def reconcile(self) -> Dict[str, int]:
+        """Recount the users collection (three full scans) and store the result"""
+        users = policy_collection(self._get_db(), "users", "stats")
+        counts = {
+            "total_users": users.count_documents({}),
+            "active_users": users.count_documents({"is_active": True}),
+            "verified_users": users.count_documents({"is_verified": True}),
+        }
+        self._get_collection().update_one(
+            {"_id": USER_STATS_ID},
+            {"$set": {**counts, "reconciled_at": datetime.now(timezone.utc)}},
+            upsert=True,
+        )
+        stats_cache.invalidate(USER_STATS_ID)
+        logger.info(f"Reconciled user stats: {counts}")
+        return counts
+
+    def _reconcile_in_background(self, reconciled_at: datetime):
+        """
+        Recount in a daemon thread if this process wins the claim.
+
+        Moving reconciled_at forward with the old value in the filter lets
+        exactly one process (or thread) run each periodic recount.
+        """
+        claim = self._get_collection().update_one(
+            {"_id": USER_STATS_ID, "reconciled_at": reconciled_at},
+            {"$set": {"reconciled_at": datetime.now(timezone.utc)}},
+        )
+        if claim.modified_count != 1:
+            return
+
+        def run():
+            try:
+                self.reconcile()
+            except Exception as e:
+                logger.error(f"User stats reconciliation failed: {str(e)}")
+
+        threading.Thread(target=run, name="user-stats-reconcile", daemon=True).start()
+
+    def _load(self) -> Dict[str, int]:
+        doc = self._get_collection().find_one({"_id": USER_STATS_ID})
+        if doc is None or "reconciled_at" not in doc:
+            # Counters were never reconciled, so they only cover recent writes
+            return self.reconcile()
+
+        interval = _reconcile_interval()
+        due = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(
+            seconds=interval
+        )
+        if interval and doc["reconciled_at"].replace(tzinfo=None) <= due:
+            self._reconcile_in_background(doc["reconciled_at"])
+
+        return {field: max(doc.get(field, 0), 0) for field in COUNTER_FIELDS}
+
+    def get(self) -> Dict[str, int]:
+        """Current counters, cached in process for USER_STATS_CACHE_TTL seconds"""
+        counts = stats_cache.get_or_load(USER_STATS_ID, self._load)
+        return {
+            **counts,
+            "inactive_users": counts["total_users"] - counts["active_users"],
+        }
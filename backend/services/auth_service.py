@@ -3,7 +3,6 @@ Authentication service with enhanced security features
 """
 
 import logging
-import re
 import uuid
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, Tuple
@@ -11,8 +10,12 @@ from typing import Any, Dict, Tuple
 import jwt
 from flask import current_app
 
+from core.operation_policy import policy_collection
 from models.user import User
+from utils.auth_utils import decode_token_cached
 from utils.database import get_db
+from utils.hashing_pool import HashingPoolBusy
+from utils.password_policy import password_policy
 
 logger = logging.getLogger(__name__)
 
@@ -22,73 +25,24 @@ class AuthService:
 
     def __init__(self):
         self.user_model = User()
-        self.db = None
-
-        # Password requirements
-        self.PASSWORD_MIN_LENGTH = 8
-        self.PASSWORD_PATTERNS = {
-            "uppercase": re.compile(r"[A-Z]"),
-            "lowercase": re.compile(r"[a-z]"),
-            "digit": re.compile(r"\d"),
-            "special": re.compile(r'[!@#$%^&*(),.?":{}|<>]'),
-        }
-
-        # Common passwords to reject
-        self.COMMON_PASSWORDS = {
-            "password",
-            "password123",
-            "123456",
-            "123456789",
-            "qwerty",
-            "abc123",
-            "password1",
-            "admin",
-            "letmein",
-            "welcome",
-        }
+        self.db = None  # Fixed database (tests, benchmarks); else get_db() per call
 
     def _get_collection(self, collection_name: str):
-        """Get database collection"""
-        if self.db is None:
-            self.db = get_db()
-        return self.db[collection_name]
+        """Get database collection, with its operation class's write concern"""
+        # Resolved per call: this instance outlives forks and app contexts
+        db = self.db if self.db is not None else get_db()
+        return policy_collection(db, collection_name)
 
     def validate_password_strength(self, password: str) -> Tuple[bool, str]:
         """Validate password strength according to security requirements"""
-        if len(password) < self.PASSWORD_MIN_LENGTH:
-            return (
-                False,
-                f"Password must be at least {self.PASSWORD_MIN_LENGTH} characters long",
-            )
-
-        if password.lower() in self.COMMON_PASSWORDS:
-            return False, "Password is too common. Please choose a stronger password"
-
-        missing_requirements = []
-
-        if not self.PASSWORD_PATTERNS["uppercase"].search(password):
-            missing_requirements.append("at least one uppercase letter")
-
-        if not self.PASSWORD_PATTERNS["lowercase"].search(password):
-            missing_requirements.append("at least one lowercase letter")
-
-        if not self.PASSWORD_PATTERNS["digit"].search(password):
-            missing_requirements.append("at least one number")
+        result = password_policy.check(password)
+        return result.valid, result.message
 
-        if not self.PASSWORD_PATTERNS["special"].search(password):
-            missing_requirements.append("at least one special character")
-
-        if missing_requirements:
-            return False, f"Password must contain {', '.join(missing_requirements)}"
-
-        return True, "Password meets all requirements"
-
-    def generate_tokens(self, user_id: str, email: str) -> Dict[str, Any]:
-        """Generate both access and refresh tokens"""
-        now = datetime.now(timezone.utc)
-
-        # Access token (short-lived)
-        access_payload = {
+    def _build_access_payload(
+        self, user_id: str, email: str, now: datetime, user: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
+        """Build the access token payload, embedding authorization claims in stateless mode"""
+        payload = {
             "user_id": str(user_id),
             "email": email,
             "type": "access",
@@ -97,6 +51,27 @@ class AuthService:
             + timedelta(seconds=current_app.config["JWT_ACCESS_TOKEN_EXPIRES"]),
         }
 
+        if user is not None and current_app.config.get("STATELESS_ACCESS_TOKENS"):
+            payload.update(
+                {
+                    "is_active": bool(user.get("is_active")),
+                    "is_verified": bool(user.get("is_verified", False)),
+                    "role": user.get("role", "user"),
+                    "token_epoch": user.get("token_epoch", 0),
+                }
+            )
+
+        return payload
+
+    def generate_tokens(
+        self, user_id: str, email: str, user: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
+        """Generate both access and refresh tokens"""
+        now = datetime.now(timezone.utc)
+
+        # Access token (short-lived)
+        access_payload = self._build_access_payload(user_id, email, now, user)
+
         access_token = jwt.encode(
             access_payload, current_app.config["JWT_SECRET_KEY"], algorithm="HS256"
         )
@@ -180,7 +155,7 @@ class AuthService:
             )
 
             # Generate tokens
-            tokens = self.generate_tokens(str(user["_id"]), user["email"])
+            tokens = self.generate_tokens(str(user["_id"]), user["email"], user)
 
             # Generate email verification token (will be implemented with email service)
             verification_token = self._generate_verification_token(str(user["_id"]))
@@ -206,7 +181,7 @@ class AuthService:
                 "verification_token": verification_token,  # For testing; in production, this would be sent via email
             }
 
-        except ValueError as e:
+        except (ValueError, HashingPoolBusy) as e:
             raise e
         except Exception as e:
             logger.error(f"Registration error: {str(e)}")
@@ -242,19 +217,14 @@ class AuthService:
             self._clear_failed_attempts(email)
 
             # Generate tokens
-            tokens = self.generate_tokens(str(user["_id"]), user["email"])
-
-            # Update last login
-            self.user_model.update_user(
-                str(user["_id"]), {"last_login": datetime.now(timezone.utc)}
-            )
+            tokens = self.generate_tokens(str(user["_id"]), user["email"], user)
 
             # Remove sensitive data
             user.pop("password_hash", None)
 
             return {"user": user, "tokens": tokens}
 
-        except ValueError as e:
+        except (ValueError, HashingPoolBusy) as e:
             raise e
         except Exception as e:
             logger.error(f"Login error: {str(e)}")
@@ -264,10 +234,8 @@ class AuthService:
         """Generate new access token using refresh token"""
         try:
             # Verify refresh token
-            payload = jwt.decode(
-                refresh_token,
-                current_app.config["JWT_SECRET_KEY"],
-                algorithms=["HS256"],
+            payload = decode_token_cached(
+                refresh_token, current_app.config["JWT_SECRET_KEY"]
             )
 
             if payload.get("type") != "refresh":
@@ -283,7 +251,7 @@ class AuthService:
                 raise ValueError("Refresh token is invalid or revoked")
 
             # Verify user still exists and is active
-            user = self.user_model.find_by_id(payload["user_id"])
+            user = self.user_model.find_by_id(payload["user_id"], User.AUTH_VIEW)
             if not user or not user.get("is_active"):
                 # Revoke the refresh token
                 refresh_tokens.update_one(
@@ -293,14 +261,9 @@ class AuthService:
 
             # Generate new access token
             now = datetime.now(timezone.utc)
-            access_payload = {
-                "user_id": payload["user_id"],
-                "email": payload["email"],
-                "type": "access",
-                "iat": now,
-                "exp": now
-                + timedelta(seconds=current_app.config["JWT_ACCESS_TOKEN_EXPIRES"]),
-            }
+            access_payload = self._build_access_payload(
+                payload["user_id"], payload["email"], now, user
+            )
 
             access_token = jwt.encode(
                 access_payload, current_app.config["JWT_SECRET_KEY"], algorithm="HS256"
@@ -361,11 +324,7 @@ class AuthService:
                 return False
 
             # Mark user as verified
-            user_id = token_doc["user_id"]
-            self.user_model.update_user(
-                user_id,
-                {"is_verified": True, "verified_at": datetime.now(timezone.utc)},
-            )
+            self.user_model.mark_verified(token_doc["user_id"])
 
             # Mark token as used
             verification_tokens.update_one(
@@ -433,6 +392,9 @@ class AuthService:
             refresh_tokens.update_many(
                 {"user_id": str(user_id)}, {"$set": {"is_revoked": True}}
             )
+
+            # Access tokens that authorize without a user lookup end here too
+            self.user_model.bump_token_epoch(str(user_id))
             return True
         except Exception as e:
             logger.error(f"Error revoking tokens: {str(e)}")
@@ -0,0 +1,87 @@
+"""
+Tests for the buffered access log writer
+"""
+
+import threading
+
+from middleware.access_log import AccessLogWriter
+
+
+class RecordingCollection:
+    """Collects insert_many batches; can be blocked to simulate a slow database"""
+
+    def __init__(self):
+        self.batches = []
+        self.unblocked = threading.Event()
+        self.unblocked.set()
+
+    def insert_many(self, documents, ordered=True):
+        self.unblocked.wait(5)
+        assert ordered is False
+        self.batches.append(list(documents))
+
+
+class TestAccessLogWriter:
+    """Test batching, overload handling and shutdown flushing"""
+
+    def test_entries_are_written_in_batches(self):
+        collection = RecordingCollection()
+        writer = AccessLogWriter(lambda: collection, batch_size=10, flush_interval=0.05)
+
+        for i in range(25):
+            assert writer.write({"n": i})
+
+        assert writer.flush()
+        written = [doc["n"] for batch in collection.batches for doc in batch]
+        assert sorted(written) == list(range(25))
+        assert all(len(batch) <= 10 for batch in collection.batches)
+        assert writer.stats()["written"] == 25
+        writer.close()
+
+    def test_close_flushes_pending_entries(self):
+        collection = RecordingCollection()
+        writer = AccessLogWriter(lambda: collection, batch_size=100, flush_interval=10)
+
+        for i in range(5):
+            writer.write({"n": i})
+        writer.close()
+
+        assert sum(len(batch) for batch in collection.batches) == 5
+
+    def test_overload_is_sampled_then_dropped(self):
+        collection = RecordingCollection()
+        collection.unblocked.clear()
+        writer = AccessLogWriter(
+            lambda: collection,
+            max_queue=10,
+            batch_size=1,
+            flush_interval=0.01,
+            high_watermark=0.5,
+            sample_rate=2,
+        )
+
+        results = [writer.write({"n": i}) for i in range(40)]
+        stats = writer.stats()
+
+        assert not all(results)
+        assert stats["sampled_out"] > 0
+        assert stats["dropped"] > 0
+        assert stats["enqueued"] + stats["sampled_out"] + stats["dropped"] == 40
+
+        collection.unblocked.set()
+        assert writer.flush()
+        writer.close()
+
+    def test_write_failures_are_counted(self):
+        class FailingCollection:
+            def insert_many(self, documents, ordered=True):
+                raise RuntimeError("database unavailable")
+
+        writer = AccessLogWriter(FailingCollection, batch_size=5, flush_interval=0.01)
+
+        for i in range(3):
+            writer.write({"n": i})
+
+        assert writer.flush()
+        assert writer.stats()["failed"] == 3
+        writer.close()
@@ -0,0 +1,92 @@
+"""
+Tests for the benchmark harness and its in-memory collection stand-in
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ReturnDocument
+
+from benchmarks.auth_benchmarks import parse_count, percentile, run_benchmarks
+from core.memory_store import MemoryCollection
+
+
+class TestMemoryCollection:
+    """Test the query subset the auth code relies on"""
+
+    def test_count_and_delete_with_range(self):
+        collection = MemoryCollection(indexed_fields=("email",))
+        now = datetime.now(timezone.utc)
+        collection.insert_many(
+            [
+                {"email": "a@x.com", "attempted_at": now},
+                {"email": "a@x.com", "attempted_at": now - timedelta(hours=2)},
+                {"email": "b@x.com", "attempted_at": now},
+            ]
+        )
+        query = {"email": "a@x.com", "attempted_at": {"$gte": now - timedelta(hours=1)}}
+
+        assert collection.count_documents(query) == 1
+        collection.delete_many(query)
+        assert collection.count_documents({"email": "a@x.com"}) == 1
+        assert len(collection) == 2
+
+    def test_upsert_counter(self):
+        collection = MemoryCollection(indexed_fields=("key",))
+        update = {"$inc": {"count": 1}, "$setOnInsert": {"endpoint": "login"}}
+
+        after = {"projection": {"_id": 0}, "return_document": ReturnDocument.AFTER}
+
+        collection.find_one_and_update({"key": "k"}, update, upsert=True, **after)
+        doc = collection.find_one_and_update({"key": "k"}, update, upsert=True, **after)
+
+        assert doc == {"key": "k", "endpoint": "login", "count": 2}
+        assert collection.find_one_and_update({"key": "x"}, update) is None
+
+
+class TestHarness:
+    """Test the benchmark runner end to end on the memory store"""
+
+    def test_parse_count(self):
+        assert parse_count("1000") == 1000
+        assert parse_count("10k") == 10000
+        assert parse_count("1.5M") == 1500000
+
+    def test_percentile(self):
+        values = [float(i) for i in range(1, 101)]
+
+        assert percentile(values, 0.5) == 51.0
+        assert percentile(values, 0.99) == 100.0
+        assert percentile([], 0.5) == 0.0
+
+    def test_run_benchmarks(self):
+        results = run_benchmarks(
+            targets=["baseline", "rate_limit", "lockout_check", "lockout_record"],
+            backends=[
+                "memory",
+                "mongo",
+                "memory:sliding_log",
+                "mongo:sliding_log",
+                "mongo:sliding_counter",
+                "mongo:fixed_window",
+            ],
+            stores=["memory"],
+            sizes=[100],
+            concurrency_levels=[2],
+            operations=20,
+            hot_keys=5,
+        )
+
+        # Pipeline updates are skipped on the memory store
+        assert [(r.target, r.backend) for r in results] == [
+            ("baseline", "-"),
+            ("rate_limit", "memory"),
+            ("rate_limit", "memory:sliding_log"),
+            ("rate_limit", "mongo:sliding_log"),
+            ("rate_limit", "mongo:fixed_window"),
+            ("lockout_check", "auth_service"),
+            ("lockout_record", "auth_service"),
+        ]
+        for result in results:
+            assert result.errors == 0
+            assert result.ops_per_sec > 0
+            assert result.p99_ms >= result.p50_ms
@@ -0,0 +1,98 @@
+"""
+Tests for the breached password filter and its build command
+"""
+
+import pytest
+
+import manage
+from utils.breached_passwords import (
+    BloomFilter,
+    BreachedPasswords,
+    bloom_parameters,
+    build_bloom_filter,
+)
+
+PASSWORDS = [f"leaked-{i}" for i in range(2000)] + ["Tr0ub4dor&3"]
+
+
+@pytest.fixture
+def filter_path(tmp_path):
+    path = str(tmp_path / "breached.bloom")
+    build_bloom_filter(PASSWORDS, path, expected_entries=len(PASSWORDS))
+    return path
+
+
+class TestBloomFilter:
+    """Test filter sizing, building and lookups"""
+
+    def test_parameters(self):
+        num_bits, num_hashes = bloom_parameters(1000000, 0.001)
+
+        # About 1.8 MB and 10 hashes for a million entries at 0.1%
+        assert 14000000 < num_bits < 15000000
+        assert num_hashes == 10
+
+    def test_members_are_found(self, filter_path):
+        bloom = BloomFilter.open(filter_path)
+
+        assert bloom.entries == len(PASSWORDS)
+        assert all(password in bloom for password in PASSWORDS)
+        assert "tr0ub4dor&3" in bloom
+        bloom.close()
+
+    def test_false_positive_rate(self, filter_path):
+        bloom = BloomFilter.open(filter_path)
+
+        false_positives = sum(f"unseen-{i}" in bloom for i in range(20000))
+
+        assert false_positives / 20000 < 0.005
+        bloom.close()
+
+    def test_rejects_other_files(self, tmp_path):
+        path = tmp_path / "not-a-filter"
+        path.write_bytes(b"x" * 64)
+
+        with pytest.raises(ValueError):
+            BloomFilter.open(str(path))
+
+
+class TestBreachedPasswords:
+    """Test the lazily loaded filter with its built-in fallback"""
+
+    def test_builtin_list_without_filter(self, tmp_path):
+        breached = BreachedPasswords(str(tmp_path / "missing.bloom"))
+
+        assert "Password123" in breached
+        assert "leaked-1" not in breached
+        assert breached.stats()["loaded"] is False
+
+    def test_filter_is_loaded_on_first_use(self, tmp_path):
+        path = str(tmp_path / "later.bloom")
+        breached = BreachedPasswords(path)
+        build_bloom_filter(PASSWORDS, path, expected_entries=len(PASSWORDS))
+
+        assert "leaked-1" in breached
+        assert "qwerty" in breached
+        assert "a fresh passphrase" not in breached
+        assert breached.stats()["entries"] == len(PASSWORDS)
+
+
+class TestBuildCommand:
+    """Test python manage.py build-breached-filter"""
+
+    def test_build_from_list(self, tmp_path, capsys):
+        source = tmp_path / "list.txt"
+        source.write_bytes(b"hunter2\r\nsecret\xff\n\ncorrect horse\n")
+        output = str(tmp_path / "out.bloom")
+
+        assert (
+            manage.main(["build-breached-filter", str(source), "--output", output]) == 0
+        )
+
+        bloom = BloomFilter.open(output)
+        assert bloom.entries == 3
+        assert "hunter2" in bloom
+        assert "secret" in bloom
+        assert "correct horse" in bloom
+        assert "3 entries" in capsys.readouterr().out
+        bloom.close()
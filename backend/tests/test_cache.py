@@ -0,0 +1,154 @@
+"""
+Tests for the in-process TTL/LRU cache
+"""
+
+import time
+
+import jwt
+import pytest
+
+from utils import auth_utils
+from utils import cache as cache_module
+from utils.auth_utils import decode_token_cached, token_cache
+from utils.cache import TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Freeze the cache clock"""
+    now = [100.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+class TestTTLCache:
+    """Test expiry, eviction and statistics"""
+
+    def test_hit_and_miss(self, clock):
+        cache = TTLCache(max_size=10, ttl=60)
+        cache.set("user-1", {"email": "a@example.com"})
+
+        assert cache.get("user-1") == {"email": "a@example.com"}
+        assert cache.get("user-2") is None
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_entries_expire(self, clock):
+        cache = TTLCache(max_size=10, ttl=60)
+        cache.set("user-1", "value")
+
+        clock[0] += 61
+
+        assert cache.get("user-1") is None
+        assert cache.stats()["expirations"] == 1
+        assert len(cache) == 0
+
+    def test_per_entry_ttl(self, clock):
+        cache = TTLCache(max_size=10, ttl=60)
+        cache.set("short", "value", ttl=5)
+
+        clock[0] += 6
+
+        assert cache.get("short") is None
+
+    def test_least_recently_used_is_evicted(self, clock):
+        cache = TTLCache(max_size=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+    def test_invalidate(self, clock):
+        cache = TTLCache(max_size=10, ttl=60)
+        cache.set("user-1", "value")
+
+        assert cache.invalidate("user-1") is True
+        assert cache.invalidate("user-1") is False
+        assert cache.get("user-1") is None
+
+    def test_get_or_load_skips_none(self, clock):
+        cache = TTLCache(max_size=10, ttl=60)
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return None
+
+        assert cache.get_or_load("missing", loader) is None
+        assert cache.get_or_load("missing", loader) is None
+        assert len(calls) == 2
+
+        assert cache.get_or_load("found", lambda: "value") == "value"
+        assert cache.get_or_load("found", lambda: "other") == "value"
+
+    def test_disabled_cache_stores_nothing(self, clock):
+        cache = TTLCache(max_size=10, ttl=0)
+        cache.set("user-1", "value")
+
+        assert cache.get("user-1") is None
+
+
+class TestDecodeTokenCached:
+    """Test the verified JWT decode cache"""
+
+    SECRET = "test-secret"
+
+    def make_token(self, lifetime=60, **claims):
+        payload = {"user_id": "user-1", "exp": int(time.time()) + lifetime, **claims}
+        return jwt.encode(payload, self.SECRET, algorithm="HS256")
+
+    def test_second_decode_skips_verification(self, monkeypatch):
+        token_cache.clear()
+        token = self.make_token()
+        calls = []
+        real_decode = auth_utils.jwt.decode
+
+        def counting_decode(*args, **kwargs):
+            calls.append(1)
+            return real_decode(*args, **kwargs)
+
+        monkeypatch.setattr(auth_utils.jwt, "decode", counting_decode)
+
+        first = decode_token_cached(token, self.SECRET)
+        second = decode_token_cached(token, self.SECRET)
+
+        assert first == second
+        assert first["user_id"] == "user-1"
+        assert len(calls) == 1
+
+    def test_returned_payload_is_a_copy(self):
+        token_cache.clear()
+        token = self.make_token()
+
+        decode_token_cached(token, self.SECRET)["user_id"] = "tampered"
+
+        assert decode_token_cached(token, self.SECRET)["user_id"] == "user-1"
+
+    def test_invalid_tokens_are_not_cached(self):
+        token_cache.clear()
+        token = self.make_token()
+
+        for _ in range(2):
+            with pytest.raises(jwt.InvalidSignatureError):
+                decode_token_cached(token, "wrong-secret")
+        assert len(token_cache) == 0
+
+    def test_cached_token_still_expires(self, monkeypatch):
+        token_cache.clear()
+        token = self.make_token(lifetime=5)
+        decode_token_cached(token, self.SECRET)
+
+        # The entry is still in the cache, but the wall clock has passed exp
+        later = time.time() + 10
+        monkeypatch.setattr(auth_utils.time, "time", lambda: later)
+
+        with pytest.raises(jwt.ExpiredSignatureError):
+            decode_token_cached(token, self.SECRET)
@@ -0,0 +1,250 @@
+"""
+Tests for the off-thread password hashing pool
+"""
+
+import time
+from types import SimpleNamespace
+
+import bcrypt
+import pytest
+from bson import ObjectId
+from flask import Flask
+
+from models.user import User
+from utils.hashing_pool import (
+    HashingPool,
+    HashingPoolBusy,
+    calibrate_bcrypt_rounds,
+    init_password_hashing,
+    rounds_for_target,
+)
+
+
+@pytest.fixture
+def pool():
+    pool = HashingPool(workers=1, max_queue=0, retry_after=3)
+    yield pool
+    pool.shutdown()
+
+
+class TestHashingPool:
+    """Test hashing on the pool and load shedding"""
+
+    def test_hash_and_verify_round_trip(self, pool):
+        hashed = pool.hash_password("Secr3t!pass", rounds=4)
+
+        assert hashed.startswith("$2b$04$")
+        assert pool.verify_password("Secr3t!pass", hashed)
+        assert not pool.verify_password("wrong", hashed)
+
+    def test_workers_are_not_forked_from_the_app(self, pool):
+        pool.hash_password("Secr3t!pass", rounds=4)
+
+        assert pool._executor._mp_context.get_start_method() != "fork"
+
+    def test_full_pool_rejects_immediately(self, pool):
+        busy = pool.submit(time.sleep, 0.5)
+
+        with pytest.raises(HashingPoolBusy) as excinfo:
+            pool.submit_hash("Secr3t!pass", rounds=4)
+
+        assert excinfo.value.retry_after == 3
+        assert pool.stats()["rejected"] == 1
+        assert pool.stats()["in_flight"] == 1
+
+        busy.result(timeout=5)
+        assert pool.hash_password("Secr3t!pass", rounds=4)
+        assert pool.stats()["in_flight"] == 0
+
+    def test_worker_errors_propagate(self, pool):
+        with pytest.raises(ValueError):
+            pool.verify_password("Secr3t!pass", "not-a-bcrypt-hash")
+        assert pool.stats()["in_flight"] == 0
+
+    def test_disabled_pool_runs_inline(self):
+        pool = HashingPool(enabled=False)
+        hashed = pool.hash_password("Secr3t!pass", rounds=4)
+
+        assert pool.verify_password("Secr3t!pass", hashed)
+        assert pool._executor is None
+
+
+class TestBcryptCost:
+    """Test cost calibration"""
+
+    def test_rounds_for_target_extrapolates(self):
+        # 15ms at cost 8 doubles to 240ms at cost 12, 480ms at 13
+        assert rounds_for_target(15, 8, 250, 10, 14) == 12
+        assert rounds_for_target(15, 8, 480, 10, 14) == 13
+
+    def test_rounds_for_target_is_clamped(self):
+        assert rounds_for_target(100, 8, 250, 10, 14) == 10
+        assert rounds_for_target(0.01, 8, 250, 10, 14) == 14
+        assert rounds_for_target(0, 8, 250, 10, 14) == 14
+
+    def test_calibrate_on_this_machine(self):
+        rounds = calibrate_bcrypt_rounds(50, 4, 10, sample_rounds=4, samples=1)
+
+        assert 4 <= rounds <= 10
+
+    def test_only_uncalibrated_rounds_are_pinned(self, monkeypatch):
+        pool = HashingPool(enabled=False)
+        monkeypatch.setattr("utils.hashing_pool.hashing_pool", pool)
+        app = Flask(__name__)
+        app.config.update(BCRYPT_ROUNDS=11, BCRYPT_CALIBRATE=False)
+
+        assert init_password_hashing(app) == 11
+        assert pool.rounds == 11 and pool.pin_rounds
+
+        app.config.update(
+            BCRYPT_CALIBRATE=True,
+            BCRYPT_TARGET_MS=50,
+            BCRYPT_MIN_ROUNDS=4,
+            BCRYPT_MAX_ROUNDS=6,
+        )
+        init_password_hashing(app)
+        assert not pool.pin_rounds
+
+
+class FakeUsers:
+    """Users collection holding a single document"""
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.updates = []
+
+    def find_one(self, query, projection=None):
+        return dict(self.doc)
+
+    def update_one(self, query, update):
+        self.updates.append((query, update))
+        if query.get("password_hash", self.doc["password_hash"]) == (
+            self.doc["password_hash"]
+        ):
+            self.doc.update(update["$set"])
+            return SimpleNamespace(modified_count=1)
+        return SimpleNamespace(modified_count=0)
+
+
+class TestRehashOnLogin:
+    """Test transparent upgrade of the bcrypt cost after authentication"""
+
+    @pytest.fixture
+    def users(self, monkeypatch):
+        monkeypatch.setattr(
+            "utils.password_utils.hashing_pool", HashingPool(rounds=5, enabled=False)
+        )
+        app = Flask(__name__)
+        with app.app_context():
+            yield app
+
+    def _authenticate(self, stored_hash):
+        collection = FakeUsers(
+            {"_id": "u1", "email": "a@x.com", "password_hash": stored_hash}
+        )
+        model = User()
+        model._get_collection = lambda operation=None: collection
+        return model.authenticate("a@x.com", "Secr3t!pass"), collection
+
+    def test_outdated_cost_is_rehashed(self, users):
+        old_hash = bcrypt.hashpw(b"Secr3t!pass", bcrypt.gensalt(rounds=4)).decode()
+
+        user, collection = self._authenticate(old_hash)
+
+        assert user is not None
+        new_hash = collection.doc["password_hash"]
+        assert new_hash.startswith("$2b$05$")
+        assert bcrypt.checkpw(b"Secr3t!pass", new_hash.encode())
+        assert {"_id": "u1", "password_hash": old_hash} in [
+            query for query, _ in collection.updates
+        ]
+
+    def test_current_cost_is_left_alone(self, users):
+        current = bcrypt.hashpw(b"Secr3t!pass", bcrypt.gensalt(rounds=5)).decode()
+
+        _, collection = self._authenticate(current)
+
+        assert collection.doc["password_hash"] == current
+
+    def test_pinned_downgrade_is_rehashed(self, users, monkeypatch):
+        monkeypatch.setattr("utils.password_utils.hashing_pool.pin_rounds", True)
+        dearer = bcrypt.hashpw(b"Secr3t!pass", bcrypt.gensalt(rounds=6)).decode()
+
+        _, collection = self._authenticate(dearer)
+
+        assert collection.doc["password_hash"].startswith("$2b$05$")
+
+    def test_unpinned_downgrade_is_kept_up_to_max_rounds(self, users):
+        dearer = bcrypt.hashpw(b"Secr3t!pass", bcrypt.gensalt(rounds=6)).decode()
+
+        _, collection = self._authenticate(dearer)
+
+        assert collection.doc["password_hash"] == dearer
+
+    def test_disabled_by_config(self, users):
+        users.config["BCRYPT_REHASH_ON_LOGIN"] = False
+        old_hash = bcrypt.hashpw(b"Secr3t!pass", bcrypt.gensalt(rounds=4)).decode()
+
+        _, collection = self._authenticate(old_hash)
+
+        assert collection.doc["password_hash"] == old_hash
+
+
+class TestChangePassword:
+    """Test hashing the new password alongside the old password check"""
+
+    @pytest.fixture
+    def model(self, monkeypatch):
+        pool = HashingPool(rounds=4, enabled=False)
+        monkeypatch.setattr("utils.password_utils.hashing_pool", pool)
+        old_hash = bcrypt.hashpw(b"Old!pass1", bcrypt.gensalt(rounds=4)).decode()
+        collection = FakeUsers(
+            {"_id": ObjectId(), "email": "a@x.com", "password_hash": old_hash}
+        )
+        model = User()
+        model._get_collection = lambda operation=None: collection
+        return model, collection, pool
+
+    def test_new_hash_is_stored(self, model):
+        model, collection, pool = model
+        user_id = str(collection.doc["_id"])
+
+        assert model.change_password(user_id, "Old!pass1", "New!pass2") is True
+
+        new_hash = collection.doc["password_hash"]
+        assert bcrypt.checkpw(b"New!pass2", new_hash.encode())
+        assert pool.stats()["in_flight"] == 0
+
+    def test_wrong_password_discards_new_hash(self, model):
+        model, collection, pool = model
+        old_hash = collection.doc["password_hash"]
+
+        with pytest.raises(ValueError, match="Invalid current password"):
+            model.change_password(str(collection.doc["_id"]), "wrong", "New!pass2")
+
+        assert collection.doc["password_hash"] == old_hash
+        assert collection.updates == []
+        assert pool.stats()["in_flight"] == 0
+
+
+class TestResetPassword:
+    """Test that a reset hashes the new password only for a signed token"""
+
+    def test_invalid_token_starts_no_hash(self, monkeypatch):
+        import app as app_module
+
+        submitted = []
+        monkeypatch.setattr(
+            "api.auth.password_hasher.submit_hash",
+            lambda password: submitted.append(password),
+        )
+        client = app_module.create_app("testing").test_client()
+
+        response = client.post(
+            "/api/auth/reset-password",
+            json={"token": "garbage", "newPassword": "New!pass2word"},
+        )
+
+        assert response.status_code == 400
+        assert response.get_json()["message"] == "Invalid reset token"
+        assert submitted == []
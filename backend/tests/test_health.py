@@ -0,0 +1,130 @@
+"""
+Tests for the background database health monitor and probe endpoints
+"""
+
+import time
+
+from flask import Flask
+
+from config import Config
+from core.health import HealthMonitor
+
+
+class FakeManager:
+    """DatabaseManager counting pings and server_info calls"""
+
+    database_name = "coreconnect_test"
+
+    def __init__(self):
+        self.up = True
+        self.pings = 0
+        self.version_calls = 0
+
+    def get_database(self):
+        return object() if self.up else None
+
+    def ping(self):
+        self.pings += 1
+
+    def server_version(self):
+        self.version_calls += 1
+        return "7.0.0"
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestHealthMonitor:
+    """Test that probes are answered from the monitor's last check"""
+
+    def test_snapshots_do_not_touch_the_database(self):
+        manager = FakeManager()
+        monitor = HealthMonitor(manager, interval=60)
+
+        first = monitor.snapshot()
+        for _ in range(100):
+            monitor.snapshot()
+
+        assert first["connected"] and first["server_version"] == "7.0.0"
+        assert "latency_ms" in first
+        assert manager.pings == 1
+        monitor.close()
+
+    def test_background_checks_and_version_once(self):
+        manager = FakeManager()
+        monitor = HealthMonitor(manager, interval=0.02)
+
+        monitor.snapshot()
+        assert wait_for(lambda: manager.pings >= 5)
+        assert manager.version_calls == 1
+
+        manager.up = False
+        assert wait_for(lambda: not monitor.snapshot()["connected"])
+        assert not monitor.ready()
+
+        manager.up = True
+        assert wait_for(monitor.ready)
+        assert manager.version_calls == 2
+        monitor.close()
+
+    def test_stale_state_is_not_ready(self):
+        monitor = HealthMonitor(FakeManager(), interval=60)
+        monitor.check()
+        monitor._thread = object()  # A monitor thread that stopped checking
+        monitor._checked_at -= 600
+
+        state = monitor.snapshot()
+
+        assert state["connected"] and state["stale"]
+        assert not monitor.ready(state)
+
+    def test_interval_zero_checks_every_time(self):
+        manager = FakeManager()
+        monitor = HealthMonitor(manager, interval=0)
+
+        monitor.snapshot()
+        monitor.snapshot()
+
+        assert manager.pings == 2
+        assert monitor._thread is None
+
+
+class TestProbeEndpoints:
+    """Test the liveness and readiness routes"""
+
+    def test_liveness_and_readiness(self, monkeypatch):
+        import app as app_module
+
+        manager = FakeManager()
+        monitor = HealthMonitor(manager, interval=60)
+        monkeypatch.setattr(app_module, "health_monitor", monitor)
+        client = app_module.create_app("testing").test_client()
+
+        assert client.get("/health/live").status_code == 200
+        assert client.get("/health/ready").status_code == 200
+
+        manager.up = False
+        monitor.check()
+        pings = manager.pings
+        live = client.get("/health/live")
+        ready = client.get("/health/ready")
+
+        assert live.status_code == 200
+        assert ready.status_code == 503
+        assert ready.get_json()["details"]["database"]["connected"] is False
+        assert manager.pings == pings
+        monitor.close()
+
+    def test_init_app_reads_the_interval(self):
+        app = Flask(__name__)
+        app.config.from_object(Config)
+        app.config["HEALTH_CHECK_INTERVAL"] = 5
+        monitor = HealthMonitor(FakeManager())
+
+        monitor.init_app(app)
+
+        assert monitor.interval == 5
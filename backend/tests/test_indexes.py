@@ -0,0 +1,302 @@
+"""
+Tests for the declarative index spec and query plan verification
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from pymongo.errors import OperationFailure
+
+import manage
+from core.indexes import (
+    INDEXES,
+    TTL_FIELDS,
+    IndexSpec,
+    QueryShape,
+    create_ttl_indexes,
+    ensure_index,
+    ensure_ttl_index,
+    plan_stages,
+    query_shapes,
+    verify_query_plans,
+)
+from core.memory_store import MemoryDatabase
+from middleware.rate_limiter import MongoRateLimiter
+
+
+class TestIndexSpec:
+    """Test that every query shape has an index led by one of its fields"""
+
+    @pytest.mark.parametrize(
+        "shape",
+        [shape for shape in query_shapes() if not shape.full_scan],
+        ids=lambda shape: shape.name,
+    )
+    def test_query_has_index(self, shape):
+        fields = set(shape.filter)
+        if "_id" in fields:
+            return
+
+        leading = [
+            spec.keys
+            for spec in INDEXES
+            if spec.collection == shape.collection and spec.keys[0][0] in fields
+        ]
+        assert leading, f"No index for {shape.name}"
+
+    def test_compound_indexes_match_range_queries(self):
+        keys = {(spec.collection, spec.keys) for spec in INDEXES}
+
+        assert ("failed_attempts", (("email", 1), ("attempted_at", 1))) in keys
+        assert (
+            "rate_limits",
+            (("identifier", 1), ("endpoint", 1), ("timestamp", 1)),
+        ) in keys
+        assert ("access_logs", (("user_id", 1), ("timestamp", -1))) in keys
+
+
+class FakeCollection:
+    """Collection whose first create_index call conflicts"""
+
+    def __init__(self):
+        self.indexes = {"_id_": {"key": [("_id", 1)]}, "jti_1": {"key": [("jti", 1)]}}
+        self.created = []
+        self.dropped = []
+
+    def create_index(self, keys, **options):
+        if not self.created and not self.dropped:
+            self.created.append(None)
+            raise OperationFailure("conflict", code=86)
+        self.created.append((keys, options))
+
+    def index_information(self):
+        return self.indexes
+
+    def drop_index(self, name):
+        self.dropped.append(name)
+
+
+class TestEnsureIndex:
+    """Test replacing an index declared with other options"""
+
+    def test_conflicting_index_is_replaced(self):
+        collection = FakeCollection()
+        spec = IndexSpec("refresh_tokens", (("jti", 1),), {"unique": True})
+
+        ensure_index({"refresh_tokens": collection}, spec)
+
+        assert collection.dropped == ["jti_1"]
+        assert collection.created[-1] == ([("jti", 1)], {"unique": True})
+
+
+class FakeTTLCollection:
+    """Collection recording index changes; its database records commands"""
+
+    def __init__(self, indexes=None):
+        self.name = "failed_attempts"
+        self.database = self
+        self.indexes = {"_id_": {"key": [("_id", 1)]}, **(indexes or {})}
+        self.calls = []
+
+    def index_information(self):
+        return self.indexes
+
+    def drop_index(self, name):
+        self.calls.append(("drop_index", name))
+
+    def create_index(self, keys, **options):
+        self.calls.append(("create_index", keys, options))
+
+    def command(self, command, value, **kwargs):
+        self.calls.append((command, value, kwargs))
+
+
+class FakeTTLDatabase:
+    """Database creating FakeTTLCollections on access"""
+
+    def __init__(self):
+        self.collections = {}
+
+    def __getitem__(self, name):
+        return self.collections.setdefault(name, FakeTTLCollection())
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+
+class TestEnsureTtlIndex:
+    """Test converting and updating TTL indexes in place"""
+
+    def test_missing_index_is_created(self):
+        collection = FakeTTLCollection()
+
+        ensure_ttl_index(collection, "attempted_at", 3600)
+
+        assert collection.calls == [
+            ("create_index", "attempted_at", {"expireAfterSeconds": 3600})
+        ]
+
+    def test_plain_index_is_converted(self):
+        collection = FakeTTLCollection(
+            {"attempted_at_1": {"key": [("attempted_at", 1)]}}
+        )
+
+        ensure_ttl_index(collection, "attempted_at", 3600)
+
+        assert collection.calls == [
+            ("drop_index", "attempted_at_1"),
+            ("create_index", "attempted_at", {"expireAfterSeconds": 3600}),
+        ]
+
+    def test_retention_change_uses_coll_mod(self):
+        collection = FakeTTLCollection(
+            {
+                "attempted_at_1": {
+                    "key": [("attempted_at", 1)],
+                    "expireAfterSeconds": 3600,
+                }
+            }
+        )
+
+        ensure_ttl_index(collection, "attempted_at", 7200)
+
+        assert collection.calls == [
+            (
+                "collMod",
+                "failed_attempts",
+                {
+                    "index": {
+                        "keyPattern": {"attempted_at": 1},
+                        "expireAfterSeconds": 7200,
+                    }
+                },
+            )
+        ]
+
+    def test_same_retention_is_left_alone(self):
+        collection = FakeTTLCollection(
+            {
+                "attempted_at_1": {
+                    "key": [("attempted_at", 1)],
+                    "expireAfterSeconds": 3600,
+                }
+            }
+        )
+
+        ensure_ttl_index(collection, "attempted_at", 3600)
+
+        assert collection.calls == []
+
+    def test_compound_index_on_the_field_is_kept(self):
+        collection = FakeTTLCollection(
+            {"email_1_attempted_at_1": {"key": [("email", 1), ("attempted_at", 1)]}}
+        )
+
+        ensure_ttl_index(collection, "attempted_at", 3600)
+
+        assert collection.calls == [
+            ("create_index", "attempted_at", {"expireAfterSeconds": 3600})
+        ]
+
+    def test_create_ttl_indexes_skips_unset_retention(self):
+        db = FakeTTLDatabase()
+
+        create_ttl_indexes(db, {"failed_attempts": 60})
+
+        collections = db.collections
+        assert set(collections) == {"failed_attempts", "rate_limits"}
+        assert collections["failed_attempts"].calls == [
+            ("create_index", "attempted_at", {"expireAfterSeconds": 60})
+        ]
+        assert collections["rate_limits"].calls == [
+            ("create_index", "reset_time", {"expireAfterSeconds": 0})
+        ]
+
+    def test_sliding_log_documents_expire(self):
+        db = MemoryDatabase()
+        create_ttl_indexes(db, {"rate_limits": 60})
+        limiter = MongoRateLimiter(lambda: db.rate_limits)
+
+        limiter.hit("ip", "login", 5, 60)
+        doc = db.rate_limits.find_one({"endpoint": "login"})
+        assert isinstance(doc[TTL_FIELDS["rate_limits"]], datetime)
+
+        # Past the retention, the TTL monitor removes the old request log
+        db.rate_limits.update_one(
+            {"_id": doc["_id"]},
+            {"$set": {"timestamp": datetime.now(timezone.utc) - timedelta(hours=1)}},
+        )
+        db.rate_limits._next_ttl_run = 0
+        limiter.hit("ip", "login", 5, 60)
+
+        assert db.rate_limits.find_one({"_id": doc["_id"]}) is None
+        assert db.rate_limits.count_documents({"endpoint": "login"}) == 1
+
+
+class FakeDatabase:
+    """Database answering explain with a scan on unindexed collections"""
+
+    def __init__(self, scanned):
+        self.scanned = scanned
+        self.commands = []
+
+    def command(self, name, value, verbosity=None):
+        self.commands.append((name, value, verbosity))
+        collection = next(iter(value.values()))
+        stage = "COLLSCAN" if collection in self.scanned else "IXSCAN"
+        return {
+            "queryPlanner": {
+                "winningPlan": {"stage": "FETCH", "inputStage": {"stage": stage}}
+            }
+        }
+
+
+class TestVerifyQueryPlans:
+    """Test explain-based COLLSCAN detection"""
+
+    def test_plan_stages_walks_nested_plans(self):
+        plan = {
+            "stage": "SHARD_MERGE",
+            "shards": [
+                {"winningPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}},
+                {"winningPlan": {"stage": "COLLSCAN"}},
+            ],
+        }
+
+        assert list(plan_stages(plan)) == ["SHARD_MERGE", "FETCH", "IXSCAN", "COLLSCAN"]
+
+    def test_collscan_fails_unless_full_scan(self):
+        shapes = [
+            QueryShape("indexed", "users", "find", {"email": "a@x.com"}),
+            QueryShape("scanned", "rate_limits", "count", {"identifier": "x"}),
+            QueryShape("audit", "rate_limits", "find", {}, True),
+        ]
+        db = FakeDatabase(scanned={"rate_limits"})
+
+        checks = verify_query_plans(db, shapes)
+
+        assert [check.ok for check in checks] == [True, False, True]
+        assert checks[0].stages == ["FETCH", "IXSCAN"]
+        assert db.commands[1] == (
+            "explain",
+            {"count": "rate_limits", "query": {"identifier": "x"}},
+            "queryPlanner",
+        )
+
+    def test_every_operation_explains(self):
+        checks = verify_query_plans(FakeDatabase(scanned=set()))
+
+        assert len(checks) == len(query_shapes())
+        assert all(check.ok for check in checks)
+
+
+class TestVerifyIndexesCommand:
+    """Test the manage.py verify-indexes arguments"""
+
+    def test_parser(self):
+        args = manage.build_parser().parse_args(["verify-indexes", "--create"])
+
+        assert args.func is manage.verify_indexes
+        assert args.create is True
@@ -0,0 +1,172 @@
+"""
+Tests for the in-memory database backend
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson import ObjectId
+from flask import Flask
+from pymongo import InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from config import Config
+from core import memory_store
+from core.database import open_database
+from core.indexes import create_ttl_indexes
+from core.memory_store import MemoryDatabase, get_memory_database
+from utils.database import get_db
+
+
+@pytest.fixture
+def db():
+    return MemoryDatabase()
+
+
+class TestMemoryCollection:
+    """Test the pymongo behaviour the stores rely on"""
+
+    def test_insert_assigns_id_and_find_returns_copies(self, db):
+        doc = {"email": "a@x.com", "profile": {"bio": None}}
+        result = db.users.insert_one(doc)
+
+        assert isinstance(result.inserted_id, ObjectId)
+        assert doc["_id"] == result.inserted_id
+
+        found = db.users.find_one({"_id": result.inserted_id})
+        found["profile"]["bio"] = "changed"
+        assert db.users.find_one({"email": "a@x.com"})["profile"] == {"bio": None}
+
+    def test_datetimes_round_trip_like_bson(self, db):
+        now = datetime.now(timezone.utc)
+        db.reset_tokens.insert_one({"token": "t", "expires_at": now})
+
+        stored = db.reset_tokens.find_one({"expires_at": {"$gt": now - timedelta(1)}})
+        assert stored["expires_at"].tzinfo is None
+        assert stored["expires_at"].microsecond % 1000 == 0
+
+    def test_projections(self, db):
+        db.users.insert_one({"email": "a@x.com", "password_hash": "h", "role": "user"})
+
+        assert set(db.users.find_one({}, {"email": 1})) == {"_id", "email"}
+        assert set(db.users.find_one({}, {"_id": 0, "role": 1})) == {"role"}
+        assert "password_hash" not in db.users.find_one({}, {"password_hash": 0})
+
+    def test_unique_indexes_from_core_indexes(self, db):
+        db.users.insert_one({"email": "a@x.com", "username": None})
+        db.users.insert_one({"email": "b@x.com", "username": None})
+
+        with pytest.raises(DuplicateKeyError):
+            db.users.insert_one({"email": "a@x.com"})
+        with pytest.raises(DuplicateKeyError):
+            db.users.update_one({"email": "b@x.com"}, {"$set": {"email": "a@x.com"}})
+        assert db.users.count_documents({}) == 2
+
+    def test_update_results(self, db):
+        ids = db.refresh_tokens.insert_many(
+            [{"jti": str(i), "user_id": "u", "is_revoked": False} for i in range(3)]
+        ).inserted_ids
+
+        revoked = db.refresh_tokens.update_many(
+            {"user_id": "u"}, {"$set": {"is_revoked": True}}
+        )
+        again = db.refresh_tokens.update_one(
+            {"_id": ids[0]}, {"$set": {"is_revoked": True}}
+        )
+        upserted = db.refresh_tokens.update_one(
+            {"jti": "new"}, {"$set": {"user_id": "v"}}, upsert=True
+        )
+
+        assert (revoked.matched_count, revoked.modified_count) == (3, 3)
+        assert (again.matched_count, again.modified_count) == (1, 0)
+        assert upserted.upserted_id is not None
+        assert db.refresh_tokens.find_one({"jti": "new"})["user_id"] == "v"
+
+    def test_find_one_and_update_return_document(self, db):
+        db.users.insert_one({"email": "a@x.com", "token_epoch": 1})
+        query, update = {"email": "a@x.com"}, {"$inc": {"token_epoch": 1}}
+
+        before = db.users.find_one_and_update(query, update)
+        after = db.users.find_one_and_update(
+            query, update, return_document=ReturnDocument.AFTER
+        )
+
+        assert before["token_epoch"] == 1
+        assert after["token_epoch"] == 3
+
+    def test_unset_and_unsupported_updates(self, db):
+        db.users.insert_one({"email": "a@x.com", "needs_rehash": True})
+        db.users.update_one({"email": "a@x.com"}, {"$unset": {"needs_rehash": ""}})
+
+        assert db.users.find_one({"needs_rehash": {"$exists": True}}) is None
+        with pytest.raises(NotImplementedError):
+            db.users.update_one({}, [{"$set": {"x": 1}}])
+
+    def test_bulk_write(self, db):
+        db.users.insert_one({"_id": 1, "email": "a@x.com", "password_hash": "old"})
+
+        result = db.users.bulk_write(
+            [
+                UpdateOne(
+                    {"_id": 1, "password_hash": "old"}, {"$set": {"needs_rehash": True}}
+                ),
+                UpdateOne(
+                    {"_id": 1, "password_hash": "new"}, {"$set": {"needs_rehash": True}}
+                ),
+                InsertOne({"_id": 2, "email": "b@x.com"}),
+            ],
+            ordered=False,
+        )
+
+        assert result.modified_count == 1
+        assert result.inserted_count == 1
+
+    def test_ttl_indexes_expire_documents(self, db, monkeypatch):
+        create_ttl_indexes(db, {"failed_attempts": 60})
+        now = datetime.now(timezone.utc)
+        db.failed_attempts.insert_many(
+            [
+                {"email": "a@x.com", "attempted_at": now - timedelta(minutes=5)},
+                {"email": "a@x.com", "attempted_at": now},
+            ]
+        )
+
+        monkeypatch.setattr(memory_store, "TTL_MONITOR_SECONDS", 0)
+        db.failed_attempts._next_ttl_run = 0
+        db.failed_attempts.insert_one({"email": "b@x.com", "attempted_at": now})
+
+        assert db.failed_attempts.count_documents({"email": "a@x.com"}) == 1
+
+    def test_ttl_retention_is_modified_in_place(self, db):
+        create_ttl_indexes(db, {"failed_attempts": 60})
+        create_ttl_indexes(db, {"failed_attempts": 120})
+
+        ttl = [
+            info["expireAfterSeconds"]
+            for info in db.failed_attempts.index_information().values()
+            if info["key"] == [("attempted_at", 1)]
+        ]
+        assert ttl == [120]
+
+
+class TestBackendSelection:
+    """Test that DB_BACKEND picks the store behind get_db"""
+
+    def test_open_database(self):
+        config = {**vars(Config), "DB_BACKEND": "memory", "MONGO_DBNAME": "selected"}
+
+        assert open_database(config) is get_memory_database("selected")
+        with pytest.raises(ValueError):
+            open_database({**config, "DB_BACKEND": "redis"})
+
+    def test_get_db_uses_the_memory_store(self):
+        app = Flask(__name__)
+        app.config.from_object(Config)
+        app.config["DB_BACKEND"] = "memory"
+        app.config["MONGO_DBNAME"] = "memory_get_db"
+        app.config["DB_AUTO_MIGRATE"] = False
+
+        with app.app_context():
+            get_db().users.insert_one({"email": "a@x.com"})
+        with app.app_context():
+            assert get_db().users.count_documents({}) == 1
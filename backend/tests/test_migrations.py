@@ -0,0 +1,145 @@
+"""
+Tests for lazy database setup and the schema migration marker
+"""
+
+import pytest
+
+import core.database
+import manage
+from config import Config
+from core.database import (
+    MIGRATION_MARKER_ID,
+    SCHEMA_VERSION,
+    applied_schema_version,
+    ensure_migrated,
+    migrate,
+)
+
+
+class FakeCollection:
+    """Collection recording index creation and holding marker documents"""
+
+    def __init__(self, db, name):
+        self.database = db
+        self.name = name
+        self.docs = {}
+
+    def create_index(self, keys, **kwargs):
+        self.database.index_calls += 1
+
+    def index_information(self):
+        return {}
+
+    def find_one(self, query):
+        return self.docs.get(query["_id"])
+
+    def update_one(self, query, update, upsert=False):
+        self.docs.setdefault(query["_id"], {"_id": query["_id"]}).update(update["$set"])
+
+
+class FakeDatabase:
+    """Database creating fake collections on access"""
+
+    def __init__(self):
+        self.collections = {}
+        self.index_calls = 0
+
+    def __getitem__(self, name):
+        if name not in self.collections:
+            self.collections[name] = FakeCollection(self, name)
+        return self.collections[name]
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+
+@pytest.fixture(autouse=True)
+def fresh_process(monkeypatch):
+    monkeypatch.setattr(core.database, "_migration_checked", False)
+    monkeypatch.setattr(core.database, "_migration_retry_at", 0.0)
+
+
+class TestMigrate:
+    """Test that indexes are applied once per schema version"""
+
+    def test_first_run_creates_indexes_and_marker(self):
+        db = FakeDatabase()
+
+        assert migrate(db) is True
+        assert db.index_calls > 10
+        assert applied_schema_version(db) == SCHEMA_VERSION
+        marker = db.schema_migrations.docs[MIGRATION_MARKER_ID]
+        assert marker["host"]
+
+    def test_marker_skips_later_runs(self):
+        db = FakeDatabase()
+        migrate(db)
+        calls = db.index_calls
+
+        assert migrate(db) is False
+        assert db.index_calls == calls
+        assert migrate(db, force=True) is True
+        assert db.index_calls == calls * 2
+
+    def test_failed_indexes_leave_no_marker(self, monkeypatch):
+        monkeypatch.setattr(core.database, "create_auth_indexes", lambda db: False)
+        db = FakeDatabase()
+
+        with pytest.raises(RuntimeError):
+            migrate(db)
+        assert applied_schema_version(db) == 0
+
+
+class TestEnsureMigrated:
+    """Test the once-per-process check on first database use"""
+
+    def test_checks_once_per_process(self, monkeypatch):
+        lookups = []
+        monkeypatch.setattr(
+            core.database, "migrate", lambda db: lookups.append(db) or False
+        )
+
+        ensure_migrated(FakeDatabase())
+        ensure_migrated(FakeDatabase())
+
+        assert len(lookups) == 1
+
+    def test_failure_is_retried_later(self, monkeypatch):
+        attempts = []
+
+        def unavailable(db):
+            attempts.append(db)
+            raise ConnectionError("no server")
+
+        monkeypatch.setattr(core.database, "migrate", unavailable)
+        for _ in range(5):
+            ensure_migrated(FakeDatabase())  # Logged, not raised
+
+        assert core.database._migration_checked is False
+        assert len(attempts) == 1
+
+        core.database._migration_retry_at -= Config.DB_MIGRATE_RETRY_INTERVAL
+        ensure_migrated(FakeDatabase())
+        assert len(attempts) == 2
+
+    def test_disabled_by_config(self, monkeypatch):
+        monkeypatch.setattr(
+            core.database, "_current_config", lambda: {"DB_AUTO_MIGRATE": False}
+        )
+        db = FakeDatabase()
+
+        ensure_migrated(db)
+
+        assert db.index_calls == 0
+
+
+class TestMigrateCommand:
+    """Test the manage.py migrate arguments"""
+
+    def test_parser(self):
+        args = manage.build_parser().parse_args(["migrate", "--force"])
+
+        assert args.func is manage.migrate_database
+        assert args.force is True
@@ -0,0 +1,119 @@
+"""
+Tests for the process-wide MongoClient factory
+"""
+
+import pytest
+from flask import Flask
+
+from config import Config
+from core.database import (
+    DatabaseManager,
+    MongoClientFactory,
+    available_compressors,
+    mongo_clients,
+)
+from middleware.auth_middleware import AuthMiddleware
+from utils.database import get_db
+
+
+@pytest.fixture
+def factory():
+    factory = MongoClientFactory()
+    yield factory
+    factory.close()
+
+
+def config(**overrides):
+    return {**vars(Config), "MONGO_URI": "mongodb://localhost:1/test", **overrides}
+
+
+class TestMongoClientFactory:
+    """Test client sharing, pool options and fork handling"""
+
+    def test_same_settings_share_a_client(self, factory):
+        assert factory.get_client(config()) is factory.get_client(config())
+
+    def test_other_uri_or_pool_gets_its_own_client(self, factory):
+        client = factory.get_client(config())
+
+        assert factory.get_client(config(MONGO_URI="mongodb://other:1")) is not client
+        assert factory.get_client(config(MONGO_MAX_POOL_SIZE=5)) is not client
+
+    def test_pool_options(self, factory):
+        client = factory.get_client(
+            config(
+                MONGO_MAX_POOL_SIZE=7,
+                MONGO_MIN_POOL_SIZE=2,
+                MONGO_MAX_IDLE_TIME_MS=1000,
+                MONGO_WAIT_QUEUE_TIMEOUT_MS=250,
+                MONGO_COMPRESSORS="zlib",
+            )
+        )
+        pool = client.options.pool_options
+
+        assert pool.max_pool_size == 7
+        assert pool.min_pool_size == 2
+        assert pool.max_idle_time_seconds == 1
+        assert pool.wait_queue_timeout == 0.25
+        assert client.options.pool_options._compression_settings.compressors == ["zlib"]
+
+    def test_child_after_fork_starts_fresh(self, factory):
+        client = factory.get_client(config())
+
+        factory._reset()  # What os.register_at_fork runs in the child
+
+        assert factory.get_client(config()) is not client
+        client.close()
+
+    def test_unavailable_compressors_are_skipped(self, monkeypatch):
+        monkeypatch.setattr(
+            "core.database.importlib.util.find_spec", lambda module: None
+        )
+
+        assert available_compressors("zstd, snappy, zlib, bogus") == ["zlib"]
+
+
+class TestGetDb:
+    """Test that app contexts reuse the shared client"""
+
+    def test_app_contexts_share_the_client(self):
+        app = Flask(__name__)
+        app.config.from_object(Config)
+        app.config["MONGO_URI"] = "mongodb://localhost:1/test"
+        app.config["MONGO_DBNAME"] = "coreconnect_test"
+        app.config["DB_AUTO_MIGRATE"] = False
+
+        with app.app_context():
+            first = get_db()
+        with app.app_context():
+            second = get_db()
+
+        assert first.client is second.client
+        assert first.name == "coreconnect_test"
+        assert mongo_clients.get_client(app.config) is first.client
+
+
+class TestForkSafety:
+    """Test that process-wide objects do not keep the parent's database"""
+
+    def test_manager_child_after_fork_starts_fresh(self):
+        manager = DatabaseManager()
+        manager._client, manager._database = object(), object()
+
+        manager._reset()  # What os.register_at_fork runs in the child
+
+        assert manager._client is None and manager._database is None
+
+    def test_singletons_resolve_the_database_per_call(self, monkeypatch):
+        databases = iter([{"access_logs": "first"}, {"access_logs": "second"}])
+        monkeypatch.setattr(
+            "middleware.auth_middleware.get_db", lambda: next(databases)
+        )
+        monkeypatch.setattr(
+            "middleware.auth_middleware.policy_collection",
+            lambda db, name: db[name],
+        )
+        middleware = AuthMiddleware()
+
+        assert middleware._get_collection("access_logs") == "first"
+        assert middleware._get_collection("access_logs") == "second"
@@ -0,0 +1,179 @@
+"""
+Tests for the per-operation-class write concern and read preference policies
+"""
+
+import pytest
+from bson import ObjectId
+from flask import Flask
+from pymongo import MongoClient
+from pymongo.read_preferences import Primary, SecondaryPreferred
+from pymongo.write_concern import WriteConcern
+
+from config import Config
+from core.memory_store import MemoryDatabase
+from core.operation_policy import (
+    OperationPolicies,
+    OperationPolicy,
+    get_operation_policies,
+    policy_collection,
+)
+from models.user import User
+from utils.auth_utils import token_required
+from utils.cache import TTLCache
+
+
+@pytest.fixture(scope="module")
+def mongo_db():
+    client = MongoClient("mongodb://localhost:1", connect=False)
+    yield client.coreconnect_test
+    client.close()
+
+
+class TestOperationPolicy:
+    """Test building policies from DB_OPERATION_POLICIES entries"""
+
+    def test_from_spec(self):
+        policy = OperationPolicy.from_spec(
+            {
+                "w": 1,
+                "read_preference": "secondaryPreferred",
+                "max_staleness_seconds": 120,
+            }
+        )
+
+        assert policy.write_concern == WriteConcern(w=1)
+        assert policy.read_preference == SecondaryPreferred(max_staleness=120)
+
+    def test_empty_spec_keeps_client_defaults(self):
+        assert OperationPolicy.from_spec({}) == OperationPolicy()
+
+    @pytest.mark.parametrize(
+        "spec",
+        [
+            {"read_preference": "fastest"},
+            {"read_preference": "secondary", "max_staleness_seconds": 30},
+            {"read_preference": "primary", "max_staleness_seconds": 90},
+            {"w": 0, "j": True},
+        ],
+    )
+    def test_invalid_specs(self, spec):
+        with pytest.raises(Exception):
+            OperationPolicy.from_spec(spec)
+
+    def test_apply_sets_collection_options(self, mongo_db):
+        policy = OperationPolicy.from_spec({"w": 0, "read_preference": "primary"})
+
+        collection = policy.apply(mongo_db.access_logs)
+
+        assert collection.write_concern == WriteConcern(w=0)
+        assert collection.read_preference == Primary()
+        assert mongo_db.access_logs.write_concern == WriteConcern()
+
+    def test_memory_store_is_unchanged(self):
+        db = MemoryDatabase()
+        policy = OperationPolicy.from_spec({"w": 1})
+
+        assert policy.apply(db.access_logs) is db.access_logs
+
+
+class TestOperationPolicies:
+    """Test which collections and operations get which policy"""
+
+    def test_collection_classes(self, mongo_db):
+        policies = OperationPolicies(Config.DB_OPERATION_POLICIES)
+
+        assert policies.collection(mongo_db, "access_logs").write_concern.document == {
+            "w": 1
+        }
+        assert policies.collection(mongo_db, "rate_limits").write_concern.document == {
+            "w": 1
+        }
+        reset_tokens = policies.collection(mongo_db, "reset_tokens")
+        assert reset_tokens.write_concern.document == {"w": "majority"}
+        assert reset_tokens.read_preference == Primary()
+        assert policies.collection(
+            mongo_db, "counters"
+        ).read_preference == SecondaryPreferred(max_staleness=90)
+
+    def test_unlisted_operations_use_client_defaults(self, mongo_db):
+        policies = OperationPolicies(Config.DB_OPERATION_POLICIES)
+
+        assert policies.collection(mongo_db, "users") == mongo_db.users
+        assert policies.collection(mongo_db, "users").write_concern == WriteConcern()
+
+    def test_reads_the_app_config(self, mongo_db):
+        app = Flask(__name__)
+        app.config["DB_OPERATION_POLICIES"] = {"audit": {"w": 0}}
+
+        with app.app_context():
+            policies = get_operation_policies()
+            assert policies is get_operation_policies()
+            rate_limits = policy_collection(mongo_db, "rate_limits")
+
+        assert rate_limits.write_concern == WriteConcern(w=0)
+        assert policy_collection(mongo_db, "rate_limits").write_concern.acknowledged
+
+
+class TestUserOperations:
+    """Test the operation classes of user model reads and writes"""
+
+    def test_cached_views(self, mongo_db):
+        model = User()
+        model.db = mongo_db
+
+        auth_view, auth_operation = User.CACHED_VIEWS["auth"]
+        profile_view, profile_operation = User.CACHED_VIEWS["profile"]
+
+        assert model._get_collection(auth_operation).read_preference == Primary()
+        assert model._get_collection(
+            profile_operation
+        ).read_preference == SecondaryPreferred(max_staleness=90)
+        assert model._get_collection("credentials").write_concern.document == {
+            "w": "majority"
+        }
+
+    def test_profile_reads_primary_after_a_write(self, monkeypatch):
+        monkeypatch.setattr("models.user.user_cache", TTLCache(max_size=10, ttl=60))
+        monkeypatch.setattr(
+            "models.user.recent_user_writes", TTLCache(max_size=10, ttl=60)
+        )
+        operations = []
+
+        def find_by_id(user_id, projection, operation):
+            operations.append(operation)
+            return {"_id": user_id}
+
+        model = User()
+        model.find_by_id = find_by_id
+        user_id = str(ObjectId())
+
+        model.find_by_id_cached(user_id)
+        model.invalidate_cached_user(user_id)
+        model.find_by_id_cached(user_id)
+
+        assert operations == ["profile", None]
+
+    def test_token_required_authorizes_on_the_auth_view(self, monkeypatch):
+        app = Flask(__name__)
+        app.config.from_object(Config)
+        views = []
+        users = {
+            "auth": {"_id": "u1", "is_active": False},
+            "profile": {"_id": "u1", "is_active": True},
+        }
+
+        def find_by_id_cached(self, user_id, view="profile"):
+            views.append(view)
+            return dict(users[view])
+
+        monkeypatch.setattr(User, "find_by_id_cached", find_by_id_cached)
+        monkeypatch.setattr(
+            "middleware.request_context.RequestContext.payload", {"user_id": "u1"}
+        )
+        view = token_required(lambda: "ok")
+
+        with app.test_request_context(headers={"Authorization": "Bearer t"}):
+            response, status = view()
+
+        assert status == 401
+        assert views == ["auth"]
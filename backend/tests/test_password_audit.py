@@ -0,0 +1,129 @@
+"""
+Tests for the password hash audit and the hash-audit command
+"""
+
+from types import SimpleNamespace
+
+import bcrypt
+import pytest
+
+import manage
+from utils.hashing_pool import HashingPool
+from utils.password_audit import (
+    LoginCostEstimator,
+    audit_password_hashes,
+    parse_hash,
+)
+from utils.password_utils import _scrypt_hash
+
+
+def bcrypt_hash(rounds):
+    return bcrypt.hashpw(b"Secr3t!pass", bcrypt.gensalt(rounds=rounds)).decode()
+
+
+class FakeUsers:
+    """Users collection recording finds and bulk writes"""
+
+    def __init__(self, docs):
+        self.docs = {doc["_id"]: doc for doc in docs}
+        self.finds = []
+        self.bulk_writes = []
+
+    def find(self, query, projection, batch_size=None):
+        self.finds.append((query, projection, batch_size))
+        return [
+            {key: doc[key] for key in projection if key in doc}
+            for doc in self.docs.values()
+        ]
+
+    def bulk_write(self, requests, ordered=True):
+        self.bulk_writes.append(len(requests))
+        modified = 0
+        for request in requests:
+            doc = self.docs[request._filter["_id"]]
+            if doc["password_hash"] == request._filter["password_hash"]:
+                doc.update(request._doc["$set"])
+                modified += 1
+        return SimpleNamespace(modified_count=modified)
+
+
+@pytest.fixture
+def users(monkeypatch):
+    monkeypatch.setattr("utils.password_utils.hashing_pool", HashingPool(rounds=5))
+    monkeypatch.setattr("utils.password_audit.hashing_pool", HashingPool(rounds=5))
+    docs = [{"_id": i, "password_hash": bcrypt_hash(4)} for i in range(5)]
+    docs += [{"_id": i, "password_hash": bcrypt_hash(5)} for i in range(5, 8)]
+    docs += [
+        {"_id": 8, "password_hash": _scrypt_hash(b"Secr3t!pass", 1024, 8, 1, 32)},
+        {"_id": 9, "email": "no-hash@x.com"},
+    ]
+    return FakeUsers(docs)
+
+
+class TestParseHash:
+    """Test scheme and cost detection"""
+
+    def test_bcrypt_and_scrypt(self):
+        assert parse_hash(bcrypt_hash(4)) == ("bcrypt", 4)
+        assert parse_hash(_scrypt_hash(b"x", 2048, 8, 1, 32)) == ("scrypt", 11)
+
+    def test_unparseable(self):
+        assert parse_hash(None) == ("missing", None)
+        assert parse_hash("plaintext") == ("unknown", None)
+        assert parse_hash("$2b$xx$abc") == ("unknown", None)
+
+
+class TestAuditPasswordHashes:
+    """Test the histogram and marking outdated hashes"""
+
+    def test_histogram_only_reads_hashes(self, users):
+        report = audit_password_hashes(users, batch_size=2)
+
+        assert users.finds == [({}, {"_id": 1, "password_hash": 1}, 2)]
+        assert report["users"] == 10
+        assert report["histogram"] == {
+            ("bcrypt", 4): 5,
+            ("bcrypt", 5): 3,
+            ("scrypt", 10): 1,
+            ("missing", None): 1,
+        }
+        assert report["needs_rehash"] == {("bcrypt", 4): 5, ("scrypt", 10): 1}
+        assert report["marked"] == 0
+        assert users.bulk_writes == []
+
+    def test_mark_in_batches(self, users):
+        report = audit_password_hashes(users, mark=True, batch_size=4)
+
+        assert report["marked"] == 6
+        assert users.bulk_writes == [4, 2]
+        flagged = [_id for _id, doc in users.docs.items() if doc.get("needs_rehash")]
+        assert flagged == [0, 1, 2, 3, 4, 8]
+
+
+class TestLoginCostEstimator:
+    """Test extrapolation of the login cost"""
+
+    def test_each_round_doubles(self):
+        estimator = LoginCostEstimator()
+
+        assert estimator.seconds("bcrypt", 10) == pytest.approx(
+            estimator.seconds("bcrypt", 8) * 4
+        )
+        assert estimator.seconds("scrypt", 11) == pytest.approx(
+            estimator.seconds("scrypt", 10) * 2
+        )
+        assert estimator.seconds("unknown", None) is None
+
+
+class TestHashAuditCommand:
+    """Test the manage.py hash-audit arguments"""
+
+    def test_parser(self):
+        args = manage.build_parser().parse_args(
+            ["hash-audit", "--mark", "--rounds", "13", "--batch-size", "500"]
+        )
+
+        assert args.func is manage.hash_audit
+        assert args.mark is True
+        assert args.rounds == 13
+        assert args.batch_size == 500
@@ -0,0 +1,123 @@
+"""
+Tests for the shared password policy and the validators built on it
+"""
+
+import pytest
+
+from core.security import PasswordManager
+from services.auth_service import AuthService
+from utils.password_policy import PasswordPolicy, password_policy
+from utils.password_utils import password_validator
+
+
+class TestPasswordPolicy:
+    """Test the rules, errors and score produced by one check"""
+
+    def test_strong_password(self):
+        result = password_policy.check("StrongP@ss123!")
+
+        assert result.valid is True
+        assert result.errors == []
+        assert result.score == 100
+        assert result.strength == "Very Strong"
+        assert result.character_classes == {
+            "uppercase",
+            "lowercase",
+            "digit",
+            "special",
+        }
+
+    @pytest.mark.parametrize(
+        "password, error",
+        [
+            ("Sh0rt!", "at least 8 characters"),
+            ("Abc1!" + "x1Y!" * 40, "no more than 128"),
+            ("nouppercase123!", "uppercase letter"),
+            ("NOLOWERCASE123!", "lowercase letter"),
+            ("NoNumbers!", "at least one number"),
+            ("NoSpecialChars123", "special character"),
+            ("Password123", "too common"),
+            ("MyAdmin!Pass9", "common sequences"),
+            ("Goood!!!Pass1", "repeated characters"),
+        ],
+    )
+    def test_rule_errors(self, password, error):
+        result = password_policy.check(password)
+
+        assert result.valid is False
+        assert any(error in message for message in result.errors)
+
+    def test_missing_classes_are_one_error(self):
+        result = password_policy.check("lowercaseonly")
+
+        assert result.errors == [
+            "Password must contain at least one uppercase letter, "
+            "at least one number, at least one special character"
+        ]
+        assert result.message == result.errors[0]
+
+    def test_score_penalties(self):
+        strong = password_policy.check("Tr0ub4dor&3x")
+        repeated = password_policy.check("Tr000ub4dor&3x")
+        common = password_policy.check("Password123")
+
+        assert repeated.score == strong.score - 10
+        assert common.score < 50
+        assert common.strength in ("Very Weak", "Weak")
+
+    def test_from_config(self):
+        policy = PasswordPolicy.from_config(
+            {
+                "PASSWORD_MIN_LENGTH": 4,
+                "PASSWORD_REQUIRED_CLASSES": "lowercase, digit",
+                "PASSWORD_FORBIDDEN_SEQUENCES": "123",
+                "PASSWORD_MAX_REPEATS": 0,
+            }
+        )
+
+        assert policy.check("abc9").valid is True
+        assert policy.check("zzzz9").valid is True
+        assert policy.check("abc123").errors == [
+            "Password is too common. Please choose a more secure password",
+            "Password contains common sequences. Please choose a more complex password",
+        ]
+
+    def test_unknown_class_rejected(self):
+        with pytest.raises(ValueError):
+            PasswordPolicy(required_classes=["uppercase", "emoji"])
+
+
+class TestPasswordPolicyCallers:
+    """Test that every validator reports the policy's verdict"""
+
+    @pytest.mark.parametrize(
+        "password", ["StrongP@ss123!", "weakpass", "Password123", "aaaAAA111!!!"]
+    )
+    def test_callers_agree(self, password):
+        expected = password_policy.check(password)
+
+        assert AuthService().validate_password_strength(password) == (
+            expected.valid,
+            expected.message,
+        )
+        assert password_validator.validate_password(password) == (
+            expected.valid,
+            expected.errors,
+        )
+        assert password_validator.get_password_strength_score(password) == (
+            expected.score,
+            expected.strength,
+        )
+
+        result = PasswordManager.validate_password_strength(password)
+        assert result["is_valid"] is expected.valid
+        assert result["requirements"] == expected.errors
+
+    def test_password_manager_strength_score(self):
+        assert (
+            PasswordManager.validate_password_strength("StrongP@ss123!")[
+                "strength_score"
+            ]
+            == 4
+        )
+        assert PasswordManager.validate_password_strength("abc")["strength_score"] == 1
@@ -0,0 +1,105 @@
+"""
+Tests for the password hash scheme registry
+"""
+
+import bcrypt
+import pytest
+
+from utils.hashing_pool import HashingPool
+from utils.password_utils import BcryptScheme, PasswordHasher, ScryptScheme
+
+
+@pytest.fixture(autouse=True)
+def inline_pool(monkeypatch):
+    """Hash on the calling thread at a cheap bcrypt cost"""
+    pool = HashingPool(rounds=4, enabled=False)
+    monkeypatch.setattr("utils.password_utils.hashing_pool", pool)
+    return pool
+
+
+def make_hasher(preferred, n=1024):
+    return PasswordHasher(
+        schemes=[BcryptScheme(), ScryptScheme(n=n, r=8, p=1)], preferred=preferred
+    )
+
+
+class TestScryptScheme:
+    """Test the stdlib scrypt scheme"""
+
+    def test_hash_format_and_verify(self):
+        hasher = make_hasher("scrypt")
+
+        hashed = hasher.hash_password("Secr3t!pass")
+
+        assert hashed.startswith("$scrypt$ln=10,r=8,p=1$")
+        assert hasher.verify_password("Secr3t!pass", hashed)
+        assert not hasher.verify_password("Secr3t!pasS", hashed)
+
+    def test_salts_are_unique(self):
+        hasher = make_hasher("scrypt")
+
+        assert hasher.hash_password("Secr3t!pass") != hasher.hash_password(
+            "Secr3t!pass"
+        )
+
+    def test_verifies_with_the_hash_parameters(self):
+        old = make_hasher("scrypt", n=1024).hash_password("Secr3t!pass")
+        hasher = make_hasher("scrypt", n=2048)
+
+        assert hasher.verify_password("Secr3t!pass", old)
+        assert hasher.needs_rehash(old)
+        assert not hasher.needs_rehash(hasher.hash_password("Secr3t!pass"))
+
+    def test_n_must_be_power_of_two(self):
+        with pytest.raises(ValueError):
+            ScryptScheme(n=1000)
+
+
+class TestPasswordHasher:
+    """Test scheme identification, verification and upgrade decisions"""
+
+    def test_verifies_every_registered_scheme(self):
+        bcrypt_hash = make_hasher("bcrypt").hash_password("Secr3t!pass")
+        scrypt_hash = make_hasher("scrypt").hash_password("Secr3t!pass")
+        hasher = make_hasher("scrypt")
+
+        assert hasher.identify(bcrypt_hash).name == "bcrypt"
+        assert hasher.identify(scrypt_hash).name == "scrypt"
+        assert hasher.verify_password("Secr3t!pass", bcrypt_hash)
+        assert hasher.verify_password("Secr3t!pass", scrypt_hash)
+
+    def test_non_preferred_scheme_needs_rehash(self):
+        bcrypt_hash = make_hasher("bcrypt").hash_password("Secr3t!pass")
+
+        assert make_hasher("scrypt").needs_rehash(bcrypt_hash)
+        assert not make_hasher("bcrypt").needs_rehash(bcrypt_hash)
+
+    def test_cheaper_bcrypt_cost_needs_rehash(self, inline_pool):
+        hashed = bcrypt.hashpw(b"Secr3t!pass", bcrypt.gensalt(rounds=4)).decode()
+
+        assert not make_hasher("bcrypt").needs_rehash(hashed)
+        inline_pool.rounds = 5
+        assert make_hasher("bcrypt").needs_rehash(hashed)
+
+    def test_dearer_bcrypt_cost_is_kept_up_to_max_rounds(self, inline_pool):
+        hashed = bcrypt.hashpw(b"Secr3t!pass", bcrypt.gensalt(rounds=6)).decode()
+
+        # A node calibrated lower leaves hashes from faster nodes alone
+        assert not make_hasher("bcrypt").needs_rehash(hashed)
+
+        capped = PasswordHasher(schemes=[BcryptScheme(max_rounds=5)])
+        assert capped.needs_rehash(hashed)
+        inline_pool.rounds = 6
+        assert not capped.needs_rehash(hashed)
+
+    def test_unknown_or_malformed_hashes(self):
+        hasher = make_hasher("bcrypt")
+
+        for hashed in ("plaintext", "$argon2id$v=19$xyz", "$scrypt$broken", None):
+            assert hasher.identify(hashed) is None or hashed.startswith("$scrypt$")
+            assert not hasher.verify_password("Secr3t!pass", hashed)
+            assert hasher.needs_rehash(hashed)
+
+    def test_unknown_preferred_scheme(self):
+        with pytest.raises(ValueError):
+            make_hasher("argon2").hash_password("Secr3t!pass")
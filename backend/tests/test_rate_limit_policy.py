@@ -0,0 +1,260 @@
+"""
+Tests for the rate limit policy table and its before_request dispatcher
+"""
+
+import pytest
+from flask import Flask, jsonify
+
+from core.memory_store import MemoryDatabase
+from middleware import rate_limiter
+from middleware.rate_limit_policy import (
+    PolicyTable,
+    RateLimitPolicy,
+    create_policy_limiter,
+    init_rate_limiting,
+    parse_rate,
+)
+from middleware.rate_limiter import (
+    FixedWindowLimiter,
+    MemoryTokenBucket,
+    MongoFixedWindowLimiter,
+    MongoRateLimiter,
+    MongoTokenBucket,
+    SlidingWindowCounterLimiter,
+)
+
+POLICIES = [
+    {"name": "login", "pattern": "/api/auth/login", "per": "ip", "rate": "2/m"},
+    {
+        "name": "reset",
+        "pattern": "/api/auth/forgot-password",
+        "per": "email",
+        "rate": "1/h",
+    },
+    {"name": "auth", "pattern": "/api/auth/*", "rate": "10/m", "methods": ["POST"]},
+    {"name": "api", "pattern": "/api/*", "rate": "100/m", "burst": 3},
+]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Freeze the token bucket clock"""
+    now = [1000.0]
+    monkeypatch.setattr(rate_limiter.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def client(clock):
+    app = Flask(__name__)
+    app.config.update(JWT_SECRET_KEY="test-secret", RATE_LIMIT_POLICIES=POLICIES)
+    init_rate_limiting(app)
+
+    @app.route("/api/auth/login", methods=["POST"])
+    @app.route("/api/auth/forgot-password", methods=["POST"])
+    @app.route("/api/items")
+    @app.route("/health")
+    def view():
+        return jsonify({"status": "success"})
+
+    return app.test_client()
+
+
+class TestParseRate:
+    """Test rate string parsing"""
+
+    def test_valid_rates(self):
+        assert parse_rate("60/m") == (60, 60)
+        assert parse_rate("5/5m") == (5, 300)
+        assert parse_rate("3 / 10m") == (3, 600)
+        assert parse_rate("1000/d") == (1000, 86400)
+
+    def test_invalid_rate(self):
+        with pytest.raises(ValueError):
+            parse_rate("fast")
+
+
+class TestPolicyTable:
+    """Test policy matching"""
+
+    def test_exact_path_wins(self):
+        table = PolicyTable.from_config(POLICIES)
+
+        assert table.match("/api/auth/login", "POST").name == "login"
+        assert table.match("/api/auth/login/", "POST").name == "login"
+
+    def test_most_specific_wildcard_wins(self):
+        table = PolicyTable.from_config(POLICIES)
+
+        assert table.match("/api/auth/refresh", "POST").name == "auth"
+        assert table.match("/api/stats", "GET").name == "api"
+
+    def test_methods_filter(self):
+        table = PolicyTable.from_config(POLICIES)
+
+        # The auth policy only covers POST, and the catch-all is not consulted
+        assert table.match("/api/auth/verify", "GET") is None
+
+    def test_unmatched_path(self):
+        table = PolicyTable.from_config(POLICIES)
+
+        assert table.match("/health", "GET") is None
+
+
+class TestMemoryTokenBucket:
+    """Test token bucket refill and burst"""
+
+    def test_burst_then_refill(self, clock):
+        buckets = MemoryTokenBucket()
+
+        results = [buckets.consume("k", rate=1.0, burst=3) for _ in range(4)]
+        assert [r.allowed for r in results] == [True, True, True, False]
+        assert results[-1].reset_after == pytest.approx(1.0)
+
+        clock[0] += 1
+        assert buckets.consume("k", rate=1.0, burst=3).allowed
+        assert not buckets.consume("k", rate=1.0, burst=3).allowed
+
+    def test_bucket_never_exceeds_burst(self, clock):
+        buckets = MemoryTokenBucket()
+        buckets.consume("k", rate=1.0, burst=2)
+
+        clock[0] += 3600
+
+        results = [buckets.consume("k", rate=1.0, burst=2) for _ in range(3)]
+        assert [r.allowed for r in results] == [True, True, False]
+
+
+class TestPolicyAlgorithms:
+    """Test the engine each policy algorithm runs on"""
+
+    @pytest.mark.parametrize(
+        "algorithm,backend,engine",
+        [
+            ("token_bucket", "memory", MemoryTokenBucket),
+            ("token_bucket", "mongo", MongoTokenBucket),
+            ("sliding_log", "mongo", MongoRateLimiter),
+            ("sliding_counter", "memory", SlidingWindowCounterLimiter),
+            ("fixed_window", "memory", FixedWindowLimiter),
+            ("fixed_window", "mongo", MongoFixedWindowLimiter),
+        ],
+    )
+    def test_engines(self, algorithm, backend, engine):
+        limiter = create_policy_limiter(algorithm, backend, lambda: None)
+
+        assert isinstance(limiter, engine)
+
+    def test_invalid_algorithm_and_backend(self):
+        with pytest.raises(ValueError):
+            RateLimitPolicy("login", ["/login"], "5/m", algorithm="leaky_bucket")
+        with pytest.raises(ValueError):
+            create_policy_limiter("fixed_window", "redis")
+
+    def test_window_algorithm_ignores_burst(self, clock):
+        clock[0] = 630.0
+        app = Flask(__name__)
+        app.config["RATE_LIMIT_POLICIES"] = [
+            {
+                "pattern": "/login",
+                "rate": "2/m",
+                "burst": 10,
+                "algorithm": "fixed_window",
+            }
+        ]
+        init_rate_limiting(app)
+        app.add_url_rule("/login", "login", lambda: "ok")
+        client = app.test_client()
+
+        statuses = [client.get("/login").status_code for _ in range(3)]
+
+        assert statuses == [200, 200, 429]
+
+    def test_shared_sliding_log(self):
+        db = MemoryDatabase()
+        app = Flask(__name__)
+        app.config.update(
+            RATE_LIMIT_POLICY_BACKEND="mongo",
+            RATE_LIMIT_POLICIES=[
+                {
+                    "name": "login",
+                    "pattern": "/login",
+                    "rate": "1/m",
+                    "algorithm": "sliding_log",
+                }
+            ],
+        )
+        init_rate_limiting(app, collection_getter=lambda: db.rate_limits)
+        app.add_url_rule("/login", "login", lambda: "ok")
+        client = app.test_client()
+
+        assert client.get("/login").status_code == 200
+        response = client.get("/login")
+
+        assert response.status_code == 429
+        assert response.headers["RateLimit-Limit"] == "1"
+        doc = db.rate_limits.find_one({"endpoint": "login"})
+        assert doc["identifier"] == "ip:127.0.0.1"
+        assert doc["ip_address"] == "127.0.0.1"
+
+    def test_shared_policies_on_the_memory_store(self, monkeypatch):
+        monkeypatch.setattr(rate_limiter.time, "time", lambda: 630.0)
+        db = MemoryDatabase()
+        app = Flask(__name__)
+        app.config.update(
+            DB_BACKEND="memory",
+            RATE_LIMIT_POLICY_BACKEND="mongo",
+            RATE_LIMIT_POLICIES=[
+                {"name": "login", "pattern": "/login", "rate": "2/m"},
+                {"pattern": "/api/*", "rate": "1/m", "algorithm": "sliding_counter"},
+            ],
+        )
+        init_rate_limiting(app, collection_getter=lambda: db.rate_limits)
+        app.add_url_rule("/login", "login", lambda: "ok")
+        app.add_url_rule("/api/items", "items", lambda: "ok")
+        client = app.test_client()
+
+        # Pipeline updates are unsupported, so both count on the $inc fixed window
+        logins = [client.get("/login").status_code for _ in range(3)]
+        items = [client.get("/api/items").status_code for _ in range(2)]
+
+        assert logins == [200, 200, 429]
+        assert items == [200, 429]
+        assert db.rate_limits.find_one({"endpoint": "login"})["count"] == 3
+
+
+class TestRateLimitDispatcher:
+    """Test enforcement and headers through a Flask app"""
+
+    def test_headers_on_allowed_request(self, client):
+        response = client.get("/api/items")
+
+        assert response.status_code == 200
+        assert response.headers["RateLimit-Limit"] == "3"
+        assert response.headers["RateLimit-Remaining"] == "2"
+        assert "RateLimit-Reset" in response.headers
+
+    def test_refused_request_has_retry_after(self, client):
+        for _ in range(2):
+            assert client.post("/api/auth/login").status_code == 200
+
+        response = client.post("/api/auth/login")
+
+        assert response.status_code == 429
+        assert response.get_json()["errors"] == {"rateLimit": "Too many requests"}
+        assert response.headers["RateLimit-Remaining"] == "0"
+        assert int(response.headers["Retry-After"]) >= 1
+
+    def test_email_identity(self, client):
+        first = client.post("/api/auth/forgot-password", json={"email": "A@x.com"})
+        same = client.post("/api/auth/forgot-password", json={"email": "a@x.com"})
+        other = client.post("/api/auth/forgot-password", json={"email": "b@x.com"})
+
+        assert first.status_code == 200
+        assert same.status_code == 429
+        assert other.status_code == 200
+
+    def test_unmatched_routes_are_untouched(self, client):
+        response = client.get("/health")
+
+        assert response.status_code == 200
+        assert "RateLimit-Limit" not in response.headers
@@ -0,0 +1,242 @@
+"""
+Tests for the rate limiter and token bucket backends
+"""
+
+import pytest
+
+from middleware import rate_limiter
+from middleware.rate_limiter import (
+    FixedWindowLimiter,
+    MemoryTokenBucket,
+    MongoFixedWindowLimiter,
+    MongoRateLimiter,
+    MongoTokenBucket,
+    SlidingWindowCounterLimiter,
+    SlidingWindowLogLimiter,
+    create_rate_limiter,
+    create_token_bucket,
+)
+
+
+class FakeClock:
+    """Controllable replacement for time.monotonic"""
+
+    def __init__(self, start: float = 1000.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Freeze the limiter clock"""
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", fake)
+    return fake
+
+
+class TestSlidingWindowLogLimiter:
+    """Test the exact in-memory sliding window"""
+
+    def test_allows_up_to_limit(self, clock):
+        limiter = SlidingWindowLogLimiter()
+
+        results = [limiter.hit("1.2.3.4", "auth.login", 5, 300) for _ in range(6)]
+
+        assert [r.allowed for r in results] == [True] * 5 + [False]
+        assert [r.remaining for r in results] == [4, 3, 2, 1, 0, 0]
+
+    def test_window_slides(self, clock):
+        limiter = SlidingWindowLogLimiter()
+
+        limiter.hit("ip", "auth.login", 2, 60)
+        clock.now += 30
+        limiter.hit("ip", "auth.login", 2, 60)
+        assert not limiter.hit("ip", "auth.login", 2, 60).allowed
+
+        # First request leaves the window, freeing exactly one slot
+        clock.now += 31
+        assert limiter.hit("ip", "auth.login", 2, 60).allowed
+        assert not limiter.hit("ip", "auth.login", 2, 60).allowed
+
+    def test_keys_are_independent(self, clock):
+        limiter = SlidingWindowLogLimiter()
+
+        assert limiter.hit("a", "auth.login", 1, 60).allowed
+        assert limiter.hit("b", "auth.login", 1, 60).allowed
+        assert limiter.hit("a", "auth.register", 1, 60).allowed
+        assert not limiter.hit("a", "auth.login", 1, 60).allowed
+
+    def test_reset_after_reports_oldest_request(self, clock):
+        limiter = SlidingWindowLogLimiter()
+
+        limiter.hit("ip", "auth.login", 1, 60)
+        clock.now += 20
+        result = limiter.hit("ip", "auth.login", 1, 60)
+
+        assert not result.allowed
+        assert result.reset_after == pytest.approx(40)
+
+    def test_max_keys_evicts_coldest(self, clock):
+        limiter = SlidingWindowLogLimiter(max_keys=2)
+
+        limiter.hit("a", "e", 1, 60)
+        limiter.hit("b", "e", 1, 60)
+        limiter.hit("c", "e", 1, 60)
+
+        # "a" was evicted, so it starts with a fresh window
+        assert limiter.hit("a", "e", 1, 60).allowed
+        assert not limiter.hit("c", "e", 1, 60).allowed
+
+
+class TestSlidingWindowCounterLimiter:
+    """Test the approximate in-memory sliding window"""
+
+    def test_allows_up_to_limit(self, clock):
+        clock.now = 600.0  # Start of a window
+        limiter = SlidingWindowCounterLimiter()
+
+        results = [limiter.hit("ip", "auth.login", 3, 60) for _ in range(4)]
+
+        assert [r.allowed for r in results] == [True, True, True, False]
+
+    def test_previous_window_is_weighted(self, clock):
+        clock.now = 600.0
+        limiter = SlidingWindowCounterLimiter()
+
+        for _ in range(4):
+            limiter.hit("ip", "auth.login", 4, 60)
+
+        # Halfway through the next window half of the old hits still count
+        clock.now = 690.0
+        assert limiter.hit("ip", "auth.login", 4, 60).allowed
+        assert limiter.hit("ip", "auth.login", 4, 60).allowed
+        assert not limiter.hit("ip", "auth.login", 4, 60).allowed
+
+    def test_old_windows_are_forgotten(self, clock):
+        clock.now = 600.0
+        limiter = SlidingWindowCounterLimiter()
+
+        for _ in range(2):
+            limiter.hit("ip", "auth.login", 2, 60)
+
+        clock.now = 800.0
+        assert limiter.hit("ip", "auth.login", 2, 60).allowed
+
+
+class TestFixedWindowLimiter:
+    """Test the in-memory fixed window counter"""
+
+    def test_allows_up_to_limit_per_window(self, clock):
+        clock.now = 630.0  # Halfway through a window
+        limiter = FixedWindowLimiter()
+
+        results = [limiter.hit("ip", "auth.login", 2, 60) for _ in range(3)]
+
+        assert [r.allowed for r in results] == [True, True, False]
+        assert [r.remaining for r in results] == [1, 0, 0]
+        assert results[-1].reset_after == pytest.approx(30)
+
+    def test_next_window_starts_over(self, clock):
+        clock.now = 630.0
+        limiter = FixedWindowLimiter()
+
+        limiter.hit("ip", "auth.login", 1, 60)
+        assert not limiter.hit("ip", "auth.login", 1, 60).allowed
+
+        clock.now = 660.0
+        assert limiter.hit("ip", "auth.login", 1, 60).allowed
+
+
+class FakeCounterCollection:
+    """Minimal stand-in for the $inc upsert issued by the fixed window backend"""
+
+    def __init__(self):
+        self.docs = {}
+        self.calls = 0
+
+    def find_one_and_update(self, query, update, **kwargs):
+        self.calls += 1
+        doc = self.docs.setdefault(query["key"], dict(update["$setOnInsert"]))
+        doc["count"] = doc.get("count", 0) + update["$inc"]["count"]
+        return {"count": doc["count"]}
+
+
+class TestMongoFixedWindowLimiter:
+    """Test the shared fixed window counter"""
+
+    def test_one_round_trip_per_request(self, monkeypatch):
+        monkeypatch.setattr(rate_limiter.time, "time", lambda: 600.0)
+        collection = FakeCounterCollection()
+        limiter = MongoFixedWindowLimiter(lambda: collection)
+
+        results = [limiter.hit("ip", "auth.login", 2, 60) for _ in range(3)]
+
+        assert [r.allowed for r in results] == [True, True, False]
+        assert [r.remaining for r in results] == [1, 0, 0]
+        assert collection.calls == 3
+        assert list(collection.docs) == ["ip|auth.login|60|10"]
+
+    def test_new_window_uses_new_key(self, monkeypatch):
+        now = [600.0]
+        monkeypatch.setattr(rate_limiter.time, "time", lambda: now[0])
+        collection = FakeCounterCollection()
+        limiter = MongoFixedWindowLimiter(lambda: collection)
+
+        limiter.hit("ip", "auth.login", 1, 60)
+        assert not limiter.hit("ip", "auth.login", 1, 60).allowed
+
+        now[0] = 660.0
+        assert limiter.hit("ip", "auth.login", 1, 60).allowed
+        assert len(collection.docs) == 2
+
+
+class TestCreateRateLimiter:
+    """Test backend selection"""
+
+    def test_memory_backends(self):
+        assert isinstance(create_rate_limiter("memory"), SlidingWindowLogLimiter)
+        assert isinstance(
+            create_rate_limiter("memory_counter"), SlidingWindowCounterLimiter
+        )
+        assert isinstance(create_rate_limiter("memory_fixed"), FixedWindowLimiter)
+
+    def test_mongo_requires_collection(self):
+        for backend in ("mongo", "mongo_fixed", "mongo_counter"):
+            with pytest.raises(ValueError):
+                create_rate_limiter(backend)
+
+    def test_pipeline_backend_falls_back_to_fixed_window(self):
+        limiter = create_rate_limiter(
+            "mongo_counter", lambda: None, pipeline_updates=False
+        )
+
+        assert type(limiter) is MongoFixedWindowLimiter
+        assert isinstance(create_rate_limiter("mongo", lambda: None), MongoRateLimiter)
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            create_rate_limiter("redis")
+
+
+class TestCreateTokenBucket:
+    """Test backend selection"""
+
+    def test_memory_backend(self):
+        buckets = create_token_bucket("memory", max_keys=10)
+
+        assert isinstance(buckets, MemoryTokenBucket)
+        assert buckets.max_keys == 10
+
+    def test_mongo_backend(self):
+        assert isinstance(create_token_bucket("mongo", lambda: None), MongoTokenBucket)
+
+    def test_mongo_requires_collection(self):
+        with pytest.raises(ValueError):
+            create_token_bucket("mongo")
+
+    def test_unknown_backend(self):
+        for backend in ("redis", "mongo_fixed", "memory_counter"):
+            with pytest.raises(ValueError):
+                create_token_bucket(backend)
@@ -0,0 +1,103 @@
+"""
+Tests for the per-request authentication context
+"""
+
+import pytest
+from flask import Flask
+
+from middleware import request_context
+from middleware.request_context import get_request_context, resolve_client_ip
+
+TRUSTED = ["127.0.0.0/8", "10.0.0.0/8"]
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(JWT_SECRET_KEY="test-secret", TRUSTED_PROXIES=TRUSTED)
+    return app
+
+
+class TestResolveClientIp:
+    """Test proxy-aware client address resolution"""
+
+    def test_untrusted_peer_ignores_headers(self):
+        ip = resolve_client_ip("203.0.113.9", "1.1.1.1", "2.2.2.2", TRUSTED)
+
+        assert ip == "203.0.113.9"
+
+    def test_trusted_peer_uses_rightmost_untrusted_hop(self):
+        ip = resolve_client_ip(
+            "10.0.0.2", "6.6.6.6, 198.51.100.7, 10.0.0.5", None, TRUSTED
+        )
+
+        assert ip == "198.51.100.7"
+
+    def test_trusted_peer_falls_back_to_real_ip(self):
+        assert resolve_client_ip("127.0.0.1", None, "198.51.100.7", TRUSTED) == (
+            "198.51.100.7"
+        )
+        assert resolve_client_ip("127.0.0.1", None, None, TRUSTED) == "127.0.0.1"
+
+    def test_missing_peer(self):
+        assert resolve_client_ip(None, None, None, TRUSTED) == "unknown"
+
+
+class TestRequestContext:
+    """Test that request values are computed once and shared"""
+
+    def test_token_is_verified_once(self, app, monkeypatch):
+        calls = []
+
+        def fake_verify(token):
+            calls.append(token)
+            return {"user_id": "u1", "type": "access"}
+
+        monkeypatch.setattr(request_context, "verify_token", fake_verify)
+
+        with app.test_request_context(headers={"Authorization": "Bearer abc"}):
+            context = get_request_context()
+            assert get_request_context() is context
+            assert context.bearer_token == "abc"
+            assert context.user_id == "u1"
+            assert context.payload["type"] == "access"
+
+        assert calls == ["abc"]
+
+    def test_user_is_loaded_once(self, app, monkeypatch):
+        monkeypatch.setattr(
+            request_context, "verify_token", lambda token: {"user_id": "u1"}
+        )
+        loads = []
+
+        def loader(payload):
+            loads.append(payload["user_id"])
+            return {"_id": payload["user_id"]}
+
+        with app.test_request_context(headers={"Authorization": "Bearer abc"}):
+            context = get_request_context()
+            assert context.get_user(loader) == {"_id": "u1"}
+            assert context.get_user(loader) == {"_id": "u1"}
+
+        assert loads == ["u1"]
+
+    def test_non_bearer_header(self, app):
+        with app.test_request_context(headers={"Authorization": "Basic abc"}):
+            context = get_request_context()
+            assert context.has_authorization
+            assert context.bearer_token is None
+            assert context.payload is None
+            assert context.get_user(lambda payload: {"_id": "x"}) is None
+
+    def test_client_ip_from_trusted_proxy(self, app):
+        with app.test_request_context(
+            headers={"X-Forwarded-For": "198.51.100.7"},
+            environ_base={"REMOTE_ADDR": "10.1.2.3"},
+        ):
+            assert get_request_context().client_ip == "198.51.100.7"
+
+    def test_each_request_gets_a_new_context(self, app):
+        with app.test_request_context():
+            first = get_request_context()
+        with app.test_request_context():
+            assert get_request_context() is not first
@@ -0,0 +1,162 @@
+"""
+Tests for stateless access token claims and revocation epochs
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from flask import Flask
+
+from core.memory_store import MemoryDatabase
+from models.user import User
+from services.auth_service import AuthService
+from utils import token_epochs as token_epochs_module
+from utils.token_epochs import TokenEpochTable
+
+
+class FakeUsers:
+    """Answers the epoch refresh query from a fixed list of documents"""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.queries = 0
+
+    def find(self, query, projection=None):
+        self.queries += 1
+        cutoff = query["token_epoch_updated_at"]["$gte"]
+        return [d for d in self.docs if d["token_epoch_updated_at"] >= cutoff]
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(
+        JWT_SECRET_KEY="test-secret",
+        JWT_ACCESS_TOKEN_EXPIRES=900,
+        JWT_REFRESH_TOKEN_EXPIRES=3600,
+        TOKEN_EPOCH_REFRESH_INTERVAL=30,
+        STATELESS_ACCESS_TOKENS=True,
+    )
+    with app.app_context():
+        yield app
+
+
+def use_users(monkeypatch, users):
+    class FakeDb:
+        pass
+
+    db = FakeDb()
+    db.users = users
+    monkeypatch.setattr(token_epochs_module, "get_db", lambda: db)
+
+
+class TestTokenEpochTable:
+    """Test revocation checks against the in-memory epoch map"""
+
+    def test_unknown_user_is_current(self, app, monkeypatch):
+        use_users(monkeypatch, FakeUsers([]))
+        table = TokenEpochTable()
+
+        assert table.is_current("user-1", 0)
+
+    def test_bumped_user_rejects_older_epochs(self, app, monkeypatch):
+        now = datetime.now(timezone.utc)
+        use_users(
+            monkeypatch,
+            FakeUsers(
+                [{"_id": "user-1", "token_epoch": 2, "token_epoch_updated_at": now}]
+            ),
+        )
+        table = TokenEpochTable()
+
+        assert not table.is_current("user-1", 1)
+        assert table.is_current("user-1", 2)
+
+    def test_old_bumps_are_not_loaded(self, app, monkeypatch):
+        long_ago = datetime.now(timezone.utc) - timedelta(hours=2)
+        use_users(
+            monkeypatch,
+            FakeUsers(
+                [
+                    {
+                        "_id": "user-1",
+                        "token_epoch": 5,
+                        "token_epoch_updated_at": long_ago,
+                    }
+                ]
+            ),
+        )
+        table = TokenEpochTable()
+
+        # Every token from before that bump has expired already
+        assert table.is_current("user-1", 0)
+        assert len(table) == 0
+
+    def test_refresh_is_rate_limited(self, app, monkeypatch):
+        users = FakeUsers([])
+        use_users(monkeypatch, users)
+        table = TokenEpochTable()
+
+        for _ in range(10):
+            table.is_current("user-1", 0)
+
+        assert users.queries == 1
+
+    def test_local_record_applies_immediately(self, app, monkeypatch):
+        use_users(monkeypatch, FakeUsers([]))
+        table = TokenEpochTable()
+
+        table.record("user-1", 1)
+
+        assert not table.is_current("user-1", 0)
+
+
+class TestStatelessAccessPayload:
+    """Test the authorization claims embedded in access tokens"""
+
+    def test_claims_are_embedded(self, app):
+        user = {"is_active": True, "is_verified": True, "role": "admin"}
+        payload = AuthService()._build_access_payload(
+            "user-1", "a@example.com", datetime.now(timezone.utc), user
+        )
+
+        assert payload["is_active"] is True
+        assert payload["is_verified"] is True
+        assert payload["role"] == "admin"
+        assert payload["token_epoch"] == 0
+
+    def test_claims_are_omitted_when_disabled(self, app):
+        app.config["STATELESS_ACCESS_TOKENS"] = False
+        payload = AuthService()._build_access_payload(
+            "user-1", "a@example.com", datetime.now(timezone.utc), {"is_active": True}
+        )
+
+        assert "token_epoch" not in payload
+
+
+class TestEmailVerification:
+    """Test that verifying an address revokes the tokens claiming it is not"""
+
+    def test_old_token_loses_its_verified_claim(self, app, monkeypatch):
+        db = MemoryDatabase()
+        use_users(monkeypatch, db.users)
+        table = TokenEpochTable()
+        monkeypatch.setattr("models.user.token_epochs", table)
+        monkeypatch.setattr(User, "hash_password", staticmethod(lambda password: "h"))
+        model = User()
+        model.db = db
+        user = model.create_user("new@example.com", "Secr3t!pass")
+        user_id = str(user["_id"])
+        service = AuthService()
+        now = datetime.now(timezone.utc)
+        old = service._build_access_payload(user_id, user["email"], now, user)
+
+        assert model.mark_verified(user_id)
+
+        fresh = service._build_access_payload(
+            user_id, user["email"], now, model.find_by_id(user_id)
+        )
+        assert old["is_verified"] is False
+        assert not table.is_current(user_id, old["token_epoch"])
+        assert fresh["is_verified"] is True
+        assert table.is_current(user_id, fresh["token_epoch"])
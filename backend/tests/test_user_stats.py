@@ -0,0 +1,137 @@
+"""
+Tests for the incrementally maintained user statistics
+"""
+
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import manage
+from core.memory_store import MemoryDatabase
+from models.user import User
+from models.user_stats import USER_STATS_ID, UserStats
+from utils.cache import stats_cache
+
+
+@pytest.fixture
+def user_model(monkeypatch):
+    monkeypatch.setattr(User, "hash_password", staticmethod(lambda password: "hash"))
+    stats_cache.clear()
+    model = User()
+    model.db = MemoryDatabase()
+    yield model
+    stats_cache.clear()
+
+
+def create(model, email):
+    return str(model.create_user(email, "Secr3t!pass")["_id"])
+
+
+def counters(model):
+    return model.db.counters.find_one({"_id": USER_STATS_ID}, {"_id": 0})
+
+
+class TestCounters:
+    """Test that user state changes keep the counters exact"""
+
+    def test_transitions_match_a_recount(self, user_model):
+        ids = [create(user_model, f"user{i}@example.com") for i in range(4)]
+
+        assert user_model.mark_verified(ids[0])
+        assert not user_model.mark_verified(ids[0])
+        user_model.delete_user(ids[1])
+        user_model.delete_user(ids[1])
+        user_model.delete_user(ids[2])
+        assert user_model.reactivate_user(ids[2])
+        assert not user_model.reactivate_user(ids[3])
+
+        stored = counters(user_model)
+        assert stored == {"total_users": 4, "active_users": 3, "verified_users": 1}
+        assert UserStats(user_model.db).reconcile() == stored
+
+    def test_get_user_stats(self, user_model):
+        for i in range(3):
+            create(user_model, f"user{i}@example.com")
+        user_model.delete_user(create(user_model, "gone@example.com"))
+
+        assert user_model.get_user_stats() == {
+            "total_users": 4,
+            "active_users": 3,
+            "verified_users": 0,
+            "inactive_users": 1,
+        }
+
+
+class TestReads:
+    """Test that reads do not scan the users collection"""
+
+    def test_first_read_reconciles(self, user_model):
+        user_model.db.users.insert_many(
+            [
+                {"email": "a@example.com", "is_active": True},
+                {"email": "b@example.com", "is_active": False},
+            ]
+        )
+
+        assert user_model.get_user_stats()["total_users"] == 2
+        assert "reconciled_at" in user_model.db.counters.find_one({})
+
+    def test_reads_are_cached_and_never_count(self, user_model, monkeypatch):
+        create(user_model, "a@example.com")
+        UserStats(user_model.db).reconcile()
+
+        def count_documents(query):
+            raise AssertionError("stats read scanned users")
+
+        monkeypatch.setattr(user_model.db.users, "count_documents", count_documents)
+        first = user_model.get_user_stats()
+        user_model.db.counters.update_one(
+            {"_id": USER_STATS_ID}, {"$inc": {"total_users": 5}}
+        )
+
+        assert user_model.get_user_stats() == first
+        stats_cache.clear()
+        assert user_model.get_user_stats()["total_users"] == 6
+
+    def test_stale_counters_reconcile_once_in_background(self, user_model, monkeypatch):
+        create(user_model, "a@example.com")
+        stats = UserStats(user_model.db)
+        stats.reconcile()
+        user_model.db.counters.update_one(
+            {"_id": USER_STATS_ID},
+            {
+                "$set": {
+                    "total_users": 7,
+                    "reconciled_at": datetime.now(timezone.utc) - timedelta(days=1),
+                }
+            },
+        )
+        stale = user_model.db.counters.find_one({})["reconciled_at"]
+
+        threads, thread_class = [], threading.Thread
+
+        def start_thread(**kwargs):
+            threads.append(thread_class(**kwargs))
+            return threads[-1]
+
+        monkeypatch.setattr("models.user_stats.threading.Thread", start_thread)
+        stats_cache.clear()
+        assert stats.get()["total_users"] == 7
+        stats._reconcile_in_background(stale)  # A second process loses the claim
+
+        assert len(threads) == 1
+        threads[0].join()
+        assert counters(user_model)["total_users"] == 1
+
+
+class TestReconcileStatsCommand:
+    """Test the manage.py reconcile-stats arguments"""
+
+    def test_parser(self):
+        args = manage.build_parser().parse_args(
+            ["reconcile-stats", "--mongo-db", "coreconnect_test"]
+        )
+
+        assert args.func is manage.reconcile_stats
+        assert args.mongo_db == "coreconnect_test"
@@ -0,0 +1,133 @@
+"""
+Tests for User lookup projections and the per-view user cache
+"""
+
+import pytest
+from bson import ObjectId
+
+from models.user import User
+from services.auth_service import AuthService
+from utils.cache import TTLCache
+
+
+class FakeUsers:
+    """Users collection applying and recording find_one projections"""
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.projections = []
+
+    def find_one(self, query, projection=None):
+        self.projections.append(projection)
+        if projection is None:
+            return dict(self.doc)
+        if any(projection.values()):
+            return {key: self.doc[key] for key in projection if key in self.doc}
+        return {key: value for key, value in self.doc.items() if key not in projection}
+
+
+@pytest.fixture
+def user_doc():
+    return {
+        "_id": ObjectId(),
+        "email": "view@example.com",
+        "username": "viewer",
+        "password_hash": "$2b$12$hash",
+        "needs_rehash": True,
+        "first_name": "View",
+        "last_name": "Er",
+        "is_active": True,
+        "is_verified": True,
+        "role": "user",
+        "token_epoch": 2,
+        "profile": {"bio": "Hello"},
+        "settings": {"privacy_level": "public"},
+    }
+
+
+@pytest.fixture
+def users(user_doc, monkeypatch):
+    monkeypatch.setattr("models.user.user_cache", TTLCache(max_size=10, ttl=60))
+    monkeypatch.setattr("models.user.recent_user_writes", TTLCache(max_size=10, ttl=60))
+    model = User()
+    model.db = type("FakeDb", (), {"users": FakeUsers(user_doc)})()
+    return model
+
+
+class TestViews:
+    """Test which fields each view fetches"""
+
+    def test_auth_view_is_slim(self, users, user_doc):
+        user = users.find_by_id(str(user_doc["_id"]), User.AUTH_VIEW)
+
+        assert set(user) == {
+            "_id",
+            "email",
+            "is_active",
+            "is_verified",
+            "role",
+            "token_epoch",
+        }
+
+    def test_profile_view_never_has_credentials(self, users, user_doc):
+        user = users.find_by_email(user_doc["email"], User.PROFILE_VIEW)
+
+        assert "password_hash" not in user
+        assert "needs_rehash" not in user
+        assert user["profile"] == {"bio": "Hello"}
+
+    def test_credential_view(self, users, user_doc):
+        user = users.find_by_username("viewer", User.CREDENTIAL_VIEW)
+
+        assert user["password_hash"] == "$2b$12$hash"
+        assert "profile" not in user and "settings" not in user
+
+    def test_default_is_whole_document(self, users, user_doc):
+        assert users.find_by_id(str(user_doc["_id"])) == user_doc
+
+
+class TestFindByIdCached:
+    """Test that cache entries are kept and invalidated per view"""
+
+    def test_views_are_cached_separately(self, users, user_doc):
+        user_id = str(user_doc["_id"])
+
+        auth = users.find_by_id_cached(user_id, "auth")
+        profile = users.find_by_id_cached(user_id)
+        users.find_by_id_cached(user_id, "auth")
+        users.find_by_id_cached(user_id)
+
+        assert "profile" not in auth
+        assert "profile" in profile and "password_hash" not in profile
+        assert users.db.users.projections == [User.AUTH_VIEW, User.PROFILE_VIEW]
+
+    def test_invalidate_drops_every_view(self, users, user_doc):
+        user_id = str(user_doc["_id"])
+        users.find_by_id_cached(user_id, "auth")
+        users.find_by_id_cached(user_id)
+
+        users.invalidate_cached_user(user_id)
+        users.find_by_id_cached(user_id, "auth")
+        users.find_by_id_cached(user_id)
+
+        assert len(users.db.users.projections) == 4
+
+    def test_login_keeps_cached_views(self, users, user_doc, monkeypatch):
+        user_id = str(user_doc["_id"])
+        users.find_by_id_cached(user_id)
+        service = AuthService()
+        service.user_model = users
+        monkeypatch.setattr(users, "authenticate", lambda email, pw: dict(user_doc))
+        monkeypatch.setattr(service, "_is_email_locked", lambda email: False)
+        monkeypatch.setattr(service, "_clear_failed_attempts", lambda email: None)
+        monkeypatch.setattr(service, "generate_tokens", lambda *args: {})
+
+        service.login_user({"email": user_doc["email"], "password": "pw"})
+        users.find_by_id_cached(user_id)
+
+        # authenticate records last_login; no read-your-writes window follows
+        assert users.db.users.projections == [User.PROFILE_VIEW]
+
+    def test_unknown_view(self, users, user_doc):
+        with pytest.raises(KeyError):
+            users.find_by_id_cached(str(user_doc["_id"]), "credential")
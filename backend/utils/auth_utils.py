@@ -2,13 +2,59 @@
 JWT utilities for authentication and token management
 """
 
+import hashlib
+import time
 from datetime import datetime, timedelta, timezone
 from functools import wraps
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Sequence
 
 import jwt
 from flask import current_app
 
+from config import Config
+from utils.cache import TTLCache
+
+# Verified payloads keyed by token digest; each entry lives until the token's exp
+token_cache = TTLCache(
+    max_size=Config.TOKEN_CACHE_SIZE, ttl=Config.JWT_REFRESH_TOKEN_EXPIRES
+)
+
+
+def decode_token_cached(
+    token: str,
+    key: str,
+    algorithms: Sequence[str] = ("HS256",),
+    issuer: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Decode and verify a JWT, reusing the verified payload on later calls.
+
+    Raises the same jwt exceptions as jwt.decode. Only successfully verified
+    tokens that carry an exp claim are cached.
+    """
+    cache_key = (
+        hashlib.sha256(token.encode("utf-8")).digest(),
+        key,
+        tuple(algorithms),
+        issuer,
+    )
+
+    payload = token_cache.get(cache_key)
+    if payload is not None:
+        if payload["exp"] <= time.time():
+            token_cache.invalidate(cache_key)
+            raise jwt.ExpiredSignatureError("Signature has expired")
+        return dict(payload)
+
+    options = {"issuer": issuer} if issuer else {}
+    payload = jwt.decode(token, key, algorithms=list(algorithms), **options)
+
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        token_cache.set(cache_key, payload, ttl=exp - time.time())
+
+    return dict(payload)
+
 
 def generate_token(user_id: str, email: str) -> str:
     """Generate JWT access token"""
@@ -34,9 +80,7 @@ def generate_token(user_id: str, email: str) -> str:
 def verify_token(token: str) -> Optional[Dict[str, Any]]:
     """Verify JWT token and return payload"""
     try:
-        payload = jwt.decode(
-            token, current_app.config["JWT_SECRET_KEY"], algorithms=["HS256"]
-        )
+        payload = decode_token_cached(token, current_app.config["JWT_SECRET_KEY"])
         return payload
 
     except jwt.ExpiredSignatureError:
@@ -54,42 +98,45 @@ def token_required(f):
     def decorated_function(*args, **kwargs):
         from flask import jsonify, request
 
+        from middleware.request_context import get_request_context
         from models.user import User
 
-        token = None
+        context = get_request_context()
 
         # Get token from Authorization header
-        auth_header = request.headers.get("Authorization")
-        if auth_header:
-            try:
-                token = auth_header.split(" ")[1]  # Bearer <token>
-            except IndexError:
-                return (
-                    jsonify(
-                        {
-                            "error": "Invalid authorization header format",
-                            "status": "error",
-                        }
-                    ),
-                    401,
-                )
+        if context.has_authorization and not context.bearer_token:
+            return (
+                jsonify(
+                    {
+                        "error": "Invalid authorization header format",
+                        "status": "error",
+                    }
+                ),
+                401,
+            )
 
-        if not token:
+        if not context.bearer_token:
             return jsonify({"error": "Token is missing", "status": "error"}), 401
 
         # Verify token
-        payload = verify_token(token)
+        payload = context.payload
         if not payload:
             return (
                 jsonify({"error": "Token is invalid or expired", "status": "error"}),
                 401,
             )
 
-        # Get user from database
+        # Authorize on the primary-read auth view, then load the profile
         try:
             user_model = User()
-            user = user_model.find_by_id(payload["user_id"])
-            if not user or not user.get("is_active"):
+            user = context.get_user(
+                lambda p: user_model.find_by_id_cached(p["user_id"], "auth")
+            )
+            if user and user.get("is_active"):
+                user = user_model.find_by_id_cached(str(user["_id"]))
+            else:
+                user = None
+            if not user:
                 return (
                     jsonify({"error": "User not found or inactive", "status": "error"}),
                     401,
@@ -113,31 +160,24 @@ def optional_token(f):
     def decorated_function(*args, **kwargs):
         from flask import request
 
+        from middleware.request_context import get_request_context
         from models.user import User
 
-        token = None
-
-        # Get token from Authorization header
-        auth_header = request.headers.get("Authorization")
-        if auth_header:
-            try:
-                token = auth_header.split(" ")[1]  # Bearer <token>
-            except IndexError:
-                token = None
-
+        context = get_request_context()
         request.current_user = None
 
-        if token:
-            # Verify token
-            payload = verify_token(token)
-            if payload:
-                try:
-                    user_model = User()
-                    user = user_model.find_by_id(payload["user_id"])
-                    if user and user.get("is_active"):
-                        request.current_user = user
-                except Exception:
-                    pass  # Ignore errors for optional token
+        if context.payload:
+            try:
+                user_model = User()
+                user = context.get_user(
+                    lambda p: user_model.find_by_id_cached(p["user_id"], "auth")
+                )
+                if user and user.get("is_active"):
+                    request.current_user = user_model.find_by_id_cached(
+                        str(user["_id"])
+                    )
+            except Exception:
+                pass  # Ignore errors for optional token
 
         return f(*args, **kwargs)
 
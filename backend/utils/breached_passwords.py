@@ -0,0 +1,228 @@
+"""
+Memory-mapped Bloom filter of breached passwords
+"""
+
+import hashlib
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"CCBLOOM1"
+# magic, number of bits, number of hash functions, number of entries
+HEADER = struct.Struct("<8sQIQ")
+
+# Always rejected, even when no filter file has been built
+COMMON_PASSWORDS = frozenset(
+    {
+        "password",
+        "password1",
+        "password123",
+        "passw0rd",
+        "123456",
+        "12345678",
+        "123456789",
+        "1234567890",
+        "654321",
+        "123123",
+        "qwerty",
+        "qwerty123",
+        "qwertyuiop",
+        "asdfghjkl",
+        "zxcvbnm",
+        "abc123",
+        "admin",
+        "letmein",
+        "welcome",
+        "iloveyou",
+        "princess",
+        "rockyou",
+        "nicole",
+        "daniel",
+        "babygirl",
+        "monkey",
+        "lovely",
+        "jessica",
+        "michael",
+        "ashley",
+        "hello",
+        "amanda",
+        "superman",
+        "baseball",
+    }
+)
+
+
+def normalize(password: str) -> bytes:
+    """Passwords are matched case-insensitively"""
+    return password.lower().encode("utf-8", "ignore")
+
+
+def bloom_parameters(entries: int, false_positive_rate: float) -> Tuple[int, int]:
+    """Optimal (number of bits, number of hash functions) for a filter"""
+    entries = max(entries, 1)
+    num_bits = math.ceil(-entries * math.log(false_positive_rate) / math.log(2) ** 2)
+    num_hashes = max(1, round(num_bits / entries * math.log(2)))
+    return num_bits, num_hashes
+
+
+def _positions(key: bytes, num_bits: int, num_hashes: int) -> Iterator[int]:
+    # Double hashing: k positions from two independent 64-bit hashes
+    digest = hashlib.blake2b(key, digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:], "little") | 1
+    for i in range(num_hashes):
+        yield (h1 + i * h2) % num_bits
+
+
+class BloomFilter:
+    """Read-only Bloom filter over a buffer laid out as HEADER + bit array"""
+
+    def __init__(self, buffer, path: Optional[str] = None):
+        magic, num_bits, num_hashes, entries = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not a breached password filter: {path or 'buffer'}")
+        if len(buffer) < HEADER.size + (num_bits + 7) // 8:
+            raise ValueError(f"Truncated breached password filter: {path or 'buffer'}")
+
+        self._buffer = buffer
+        self.path = path
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.entries = entries
+
+    @classmethod
+    def open(cls, path: str) -> "BloomFilter":
+        """Map a filter file read-only; pages are shared by every process"""
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer, path)
+
+    def __contains__(self, password: str) -> bool:
+        buffer = self._buffer
+        for position in _positions(normalize(password), self.num_bits, self.num_hashes):
+            if not buffer[HEADER.size + (position >> 3)] & (1 << (position & 7)):
+                return False
+        return True
+
+    @property
+    def size_bytes(self) -> int:
+        return HEADER.size + (self.num_bits + 7) // 8
+
+    def close(self):
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+
+def read_password_list(path: str) -> Iterator[str]:
+    """Yield the non-empty lines of a password list, tolerating bad encodings"""
+    with open(path, "rb") as f:
+        for line in f:
+            password = line.rstrip(b"\r\n").decode("utf-8", "ignore")
+            if password:
+                yield password
+
+
+def build_bloom_filter(
+    passwords: Iterable[str],
+    output_path: str,
+    expected_entries: int,
+    false_positive_rate: float = 0.001,
+) -> Dict[str, Any]:
+    """
+    Write a filter for passwords sized for expected_entries.
+
+    The file is written next to output_path and renamed into place, so
+    running workers never map a partially written filter.
+    """
+    num_bits, num_hashes = bloom_parameters(expected_entries, false_positive_rate)
+    bits = bytearray((num_bits + 7) // 8)
+
+    entries = 0
+    for password in passwords:
+        for position in _positions(normalize(password), num_bits, num_hashes):
+            bits[position >> 3] |= 1 << (position & 7)
+        entries += 1
+
+    directory = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, num_bits, num_hashes, entries))
+        f.write(bits)
+    os.replace(tmp_path, output_path)
+
+    return {
+        "path": output_path,
+        "entries": entries,
+        "num_bits": num_bits,
+        "num_hashes": num_hashes,
+        "size_bytes": HEADER.size + len(bits),
+        "false_positive_rate": false_positive_rate,
+    }
+
+
+class BreachedPasswords:
+    """
+    Membership test against the built-in common list and, when present, the
+    breached password filter file.
+
+    The file is mapped on first use rather than at import, so a filter built
+    after startup is picked up by workers that have not checked a password yet.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self._filter: Optional[BloomFilter] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _get_filter(self) -> Optional[BloomFilter]:
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._filter = self._load()
+                    self._loaded = True
+        return self._filter
+
+    def _load(self) -> Optional[BloomFilter]:
+        if not self.path or not os.path.exists(self.path):
+            logger.info(
+                "No breached password filter found, using the built-in common list"
+            )
+            return None
+        try:
+            bloom = BloomFilter.open(self.path)
+            logger.info(
+                f"Loaded breached password filter with {bloom.entries} entries "
+                f"({bloom.size_bytes // 1024} KiB)"
+            )
+            return bloom
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load breached password filter: {str(e)}")
+            return None
+
+    def __contains__(self, password: str) -> bool:
+        if password.lower() in COMMON_PASSWORDS:
+            return True
+        bloom = self._get_filter()
+        return bloom is not None and password in bloom
+
+    def stats(self) -> Dict[str, Any]:
+        bloom = self._get_filter()
+        return {
+            "path": self.path,
+            "loaded": bloom is not None,
+            "entries": bloom.entries if bloom else 0,
+            "size_bytes": bloom.size_bytes if bloom else 0,
+        }
+
+
+breached_passwords = BreachedPasswords(Config.BREACHED_PASSWORDS_PATH)
@@ -5,23 +5,19 @@ Database utilities and connection management for MongoDB
 import logging
 
 from flask import current_app, g
-from pymongo import MongoClient
+
+from core.database import ensure_migrated, migrate, open_database
 
 logger = logging.getLogger(__name__)
 
 
 def get_db():
-    """Get database connection from Flask application context"""
+    """Get the DB_BACKEND database (process-wide client or store) for this app context"""
     if "db" not in g:
-        try:
-            client = MongoClient(current_app.config["MONGO_URI"])
-            g.db = client[current_app.config["MONGO_DBNAME"]]
-            # Test the connection
-            g.db.command("ping")
-            logger.info("Successfully connected to MongoDB")
-        except Exception as e:
-            logger.error(f"Failed to connect to MongoDB: {str(e)}")
-            raise e
+        # No per-request ping: the shared pool reconnects on demand and
+        # operations fail with a clear error if the server is unreachable
+        g.db = open_database(current_app.config)
+        ensure_migrated(g.db)
     return g.db
 
 
@@ -34,25 +30,12 @@ def close_db(error):
 
 
 def init_db(app):
-    """Initialize database with Flask app"""
+    """Initialize database with Flask app (indexes come from core.indexes)"""
     app.teardown_appcontext(close_db)
 
     with app.app_context():
         try:
-            db = get_db()
-            # Create indexes for user collection (ignore if they already exist)
-            try:
-                db.users.create_index("email", unique=True)
-            except Exception as e:
-                if "already exists" not in str(e) and "duplicate key" not in str(e):
-                    logger.warning(f"Could not create email index: {str(e)}")
-
-            try:
-                db.users.create_index("username", unique=True, sparse=True)
-            except Exception as e:
-                if "already exists" not in str(e) and "duplicate key" not in str(e):
-                    logger.warning(f"Could not create username index: {str(e)}")
-
+            migrate(get_db())
             logger.info("Database initialization completed successfully")
         except Exception as e:
             logger.error(f"Failed to initialize database: {str(e)}")
@@ -0,0 +1,248 @@
+"""
+Bounded process pool that keeps bcrypt off the request threads, and the
+per-node choice of bcrypt cost
+"""
+
+import logging
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+import bcrypt
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def _worker_context():
+    """
+    Start workers from a clean server process (spawn where forkserver is
+    unavailable): the pool is created on first login, when the app already
+    runs threads (pymongo monitors, access log writer, health monitor) that
+    make a plain fork deadlock-prone.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context(
+        "forkserver" if "forkserver" in methods else "spawn"
+    )
+
+
+class HashingPoolBusy(Exception):
+    """Raised when the hashing queue is full; surfaced as 503 with Retry-After"""
+
+    def __init__(self, retry_after: int = 1):
+        super().__init__("Password hashing capacity exhausted")
+        self.retry_after = retry_after
+
+
+def _hashpw(password: bytes, rounds: int) -> str:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds)).decode("utf-8")
+
+
+def _checkpw(password: bytes, hashed: bytes) -> bool:
+    return bcrypt.checkpw(password, hashed)
+
+
+def rounds_for_target(
+    sample_ms: float,
+    sample_rounds: int,
+    target_ms: float,
+    min_rounds: int,
+    max_rounds: int,
+) -> int:
+    """
+    Highest bcrypt cost expected to stay within target_ms, clamped to the bounds.
+
+    Each extra round doubles the work, so the cost is extrapolated from a
+    single cheap measurement at sample_rounds.
+    """
+    if sample_ms <= 0:
+        return max_rounds
+    rounds = sample_rounds + math.floor(math.log2(target_ms / sample_ms))
+    return max(min_rounds, min(rounds, max_rounds))
+
+
+def calibrate_bcrypt_rounds(
+    target_ms: float,
+    min_rounds: int,
+    max_rounds: int,
+    sample_rounds: int = 8,
+    samples: int = 3,
+) -> int:
+    """Time bcrypt on this machine and pick the cost that meets target_ms"""
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        _hashpw(b"calibration-password", sample_rounds)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    # The fastest run is the least disturbed by other load
+    return rounds_for_target(
+        min(timings), sample_rounds, target_ms, min_rounds, max_rounds
+    )
+
+
+class HashingPool:
+    """
+    Runs password hashing in a process pool sized to the CPU count.
+
+    At most workers + max_queue jobs are admitted at once; further submissions
+    fail immediately with HashingPoolBusy instead of queueing behind a login
+    storm, so requests that do not hash keep their worker threads. When
+    disabled, jobs run inline on the calling thread.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_queue: int = 32,
+        rounds: int = 12,
+        retry_after: int = 1,
+        timeout: Optional[float] = 30.0,
+        enabled: bool = True,
+        pin_rounds: bool = False,
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        self.rounds = rounds
+        # rounds is a fleet-wide target rather than this node's calibration
+        self.pin_rounds = pin_rounds
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.timeout = timeout
+        self.enabled = enabled
+        self._reset_state()
+
+        if hasattr(os, "register_at_fork"):
+            # Worker processes belong to the parent; children start their own
+            os.register_at_fork(after_in_child=self._reset_state)
+
+    def _reset_state(self):
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+        self._in_flight = 0
+        self._rejected = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=_worker_context()
+                    )
+        return self._executor
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def submit(self, fn: Callable, *args) -> Future:
+        """Queue fn(*args) on the pool, or raise HashingPoolBusy if it is full"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise HashingPoolBusy(self.retry_after)
+
+        with self._lock:
+            self._in_flight += 1
+
+        try:
+            if self.enabled:
+                future = self._submit_to_executor(fn, *args)
+            else:
+                future = Future()
+                try:
+                    future.set_result(fn(*args))
+                except Exception as e:
+                    future.set_exception(e)
+        except BaseException:
+            self._release()
+            raise
+
+        future.add_done_callback(self._release)
+        return future
+
+    def _submit_to_executor(self, fn: Callable, *args) -> Future:
+        try:
+            return self._get_executor().submit(fn, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM killed); replace the pool once
+            logger.warning("Hashing pool was broken, restarting it")
+            with self._lock:
+                self._executor = None
+            return self._get_executor().submit(fn, *args)
+
+    def run(self, fn: Callable, *args) -> Any:
+        """Submit fn(*args) and wait for its result"""
+        return self.submit(fn, *args).result(timeout=self.timeout)
+
+    def submit_hash(self, password: str, rounds: Optional[int] = None) -> Future:
+        return self.submit(_hashpw, password.encode("utf-8"), rounds or self.rounds)
+
+    def submit_verify(self, password: str, hashed: str) -> Future:
+        return self.submit(_checkpw, password.encode("utf-8"), hashed.encode("utf-8"))
+
+    def hash_password(self, password: str, rounds: Optional[int] = None) -> str:
+        """Hash a password with bcrypt on the pool, at the node's cost by default"""
+        return self.submit_hash(password, rounds).result(timeout=self.timeout)
+
+    def verify_password(self, password: str, hashed: str) -> bool:
+        """Check a password against a bcrypt hash on the pool"""
+        return self.submit_verify(password, hashed).result(timeout=self.timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+hashing_pool = HashingPool(
+    workers=Config.HASHING_POOL_WORKERS,
+    max_queue=Config.HASHING_POOL_QUEUE_SIZE,
+    rounds=Config.BCRYPT_ROUNDS,
+    retry_after=Config.HASHING_POOL_RETRY_AFTER,
+    timeout=Config.HASHING_POOL_TIMEOUT,
+    enabled=Config.HASHING_POOL_ENABLED,
+    pin_rounds=not Config.BCRYPT_CALIBRATE,
+)
+
+
+def init_password_hashing(app) -> int:
+    """Set the bcrypt cost used for new hashes, calibrating it if configured"""
+    config = app.config
+    rounds = config.get("BCRYPT_ROUNDS", 12)
+    calibrate = bool(config.get("BCRYPT_CALIBRATE"))
+
+    if calibrate:
+        rounds = calibrate_bcrypt_rounds(
+            config.get("BCRYPT_TARGET_MS", 250),
+            config.get("BCRYPT_MIN_ROUNDS", 10),
+            config.get("BCRYPT_MAX_ROUNDS", 14),
+        )
+        logger.info(
+            f"Calibrated bcrypt cost to {rounds} rounds "
+            f"for a {config.get('BCRYPT_TARGET_MS', 250)}ms target"
+        )
+
+    hashing_pool.rounds = rounds
+    hashing_pool.pin_rounds = not calibrate
+    config["BCRYPT_ROUNDS"] = rounds
+    return rounds
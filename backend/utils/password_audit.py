@@ -0,0 +1,145 @@
+"""
+Audit of stored password hashes: cost histogram, login CPU estimate and
+marking of users to rehash on their next login
+"""
+
+import os
+import time
+from collections import Counter
+from typing import Any, Dict, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from utils.hashing_pool import _hashpw, hashing_pool
+from utils.password_utils import PasswordHasher, _scrypt, password_hasher
+
+# Cost factors are timed at these cheap settings and extrapolated, since each
+# bcrypt round and each doubling of scrypt's n doubles the work
+BCRYPT_SAMPLE_ROUNDS = 4
+SCRYPT_SAMPLE_LN = 10
+
+
+def parse_hash(hashed: Any) -> Tuple[str, Optional[int]]:
+    """(scheme, cost) of a stored hash; cost is bcrypt rounds or scrypt log2(n)"""
+    if not isinstance(hashed, str):
+        return "missing", None
+
+    scheme = password_hasher.identify(hashed)
+    parts = hashed.split("$")
+    try:
+        if scheme is not None and scheme.name == "bcrypt":
+            return "bcrypt", int(parts[2])
+        if scheme is not None and scheme.name == "scrypt":
+            settings = dict(item.split("=") for item in parts[2].split(","))
+            return "scrypt", int(settings["ln"])
+    except (ValueError, IndexError, KeyError):
+        pass
+    return "unknown", None
+
+
+def _best_of(fn, samples: int = 3) -> float:
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+class LoginCostEstimator:
+    """CPU seconds one login costs at a scheme and cost factor, on this machine"""
+
+    def __init__(self, scrypt_r: int = 8, scrypt_p: int = 1):
+        self.scrypt_r = scrypt_r
+        self.scrypt_p = scrypt_p
+        self._samples: Dict[str, float] = {}
+
+    def _sample(self, scheme: str) -> float:
+        if scheme not in self._samples:
+            if scheme == "bcrypt":
+                self._samples[scheme] = _best_of(
+                    lambda: _hashpw(b"hash-audit", BCRYPT_SAMPLE_ROUNDS)
+                )
+            else:
+                salt = os.urandom(16)
+                self._samples[scheme] = _best_of(
+                    lambda: _scrypt(
+                        b"hash-audit",
+                        salt,
+                        1 << SCRYPT_SAMPLE_LN,
+                        self.scrypt_r,
+                        self.scrypt_p,
+                        32,
+                    )
+                )
+        return self._samples[scheme]
+
+    def seconds(self, scheme: str, cost: Optional[int]) -> Optional[float]:
+        if cost is None or scheme not in ("bcrypt", "scrypt"):
+            return None
+        sample_cost = BCRYPT_SAMPLE_ROUNDS if scheme == "bcrypt" else SCRYPT_SAMPLE_LN
+        return self._sample(scheme) * 2 ** (cost - sample_cost)
+
+
+def target_cost(hasher: PasswordHasher = password_hasher) -> Tuple[str, int]:
+    """(scheme, cost) new hashes are made with"""
+    scheme = hasher.preferred_scheme
+    if scheme.name == "scrypt":
+        return "scrypt", scheme.n.bit_length() - 1
+    return scheme.name, hashing_pool.rounds
+
+
+def audit_password_hashes(
+    collection,
+    mark: bool = False,
+    batch_size: int = 1000,
+    hasher: PasswordHasher = password_hasher,
+) -> Dict[str, Any]:
+    """
+    Stream every user's _id and password_hash and count them per (scheme, cost).
+
+    With mark, users whose hash is not at the preferred scheme and cost get
+    needs_rehash set in unordered bulk writes of batch_size, and are rehashed
+    on their next login. The filter includes the audited hash, so a password
+    changed during the audit is not flagged.
+    """
+    histogram: Counter = Counter()
+    outdated: Counter = Counter()
+    users = marked = 0
+    pending = []
+
+    def flush():
+        nonlocal marked
+        if pending:
+            result = collection.bulk_write(pending, ordered=False)
+            marked += result.modified_count
+            pending.clear()
+
+    cursor = collection.find({}, {"_id": 1, "password_hash": 1}, batch_size=batch_size)
+    for user in cursor:
+        users += 1
+        hashed = user.get("password_hash")
+        key = parse_hash(hashed)
+        histogram[key] += 1
+
+        if key[1] is None or not hasher.needs_rehash(hashed):
+            continue
+        outdated[key] += 1
+
+        if mark:
+            pending.append(
+                UpdateOne(
+                    {"_id": user["_id"], "password_hash": hashed},
+                    {"$set": {"needs_rehash": True}},
+                )
+            )
+            if len(pending) >= batch_size:
+                flush()
+
+    flush()
+    return {
+        "users": users,
+        "histogram": dict(histogram),
+        "needs_rehash": dict(outdated),
+        "marked": marked,
+    }
@@ -0,0 +1,193 @@
+"""
+Password policy compiled from configuration and evaluated in one pass
+"""
+
+import re
+import string
+from typing import Any, FrozenSet, Iterable, List, Mapping, NamedTuple, Tuple
+
+from config import Config
+from utils.breached_passwords import breached_passwords
+
+CHARACTER_CLASSES = ("uppercase", "lowercase", "digit", "special")
+
+CLASS_REQUIREMENTS = {
+    "uppercase": "at least one uppercase letter",
+    "lowercase": "at least one lowercase letter",
+    "digit": "at least one number",
+    "special": "at least one special character",
+}
+
+STRENGTH_LABELS = (
+    (30, "Very Weak"),
+    (50, "Weak"),
+    (70, "Fair"),
+    (90, "Strong"),
+)
+
+
+class PasswordCheck(NamedTuple):
+    valid: bool
+    errors: List[str]
+    score: int
+    strength: str
+    character_classes: FrozenSet[str]
+
+    @property
+    def message(self) -> str:
+        return self.errors[0] if self.errors else "Password meets all requirements"
+
+
+def _csv(value: Any) -> Tuple[str, ...]:
+    if isinstance(value, str):
+        value = value.split(",")
+    return tuple(item.strip() for item in value if item.strip())
+
+
+class PasswordPolicy:
+    """
+    Length, character class, breached password, sequence and repetition rules.
+
+    check() classifies every character in a single loop (collecting character
+    classes, distinct characters and the longest run together) and returns
+    validity, errors and the strength score from that one pass.
+    """
+
+    def __init__(
+        self,
+        min_length: int = 8,
+        max_length: int = 128,
+        required_classes: Iterable[str] = CHARACTER_CLASSES,
+        special_characters: str = string.punctuation,
+        forbidden_sequences: Iterable[str] = (),
+        max_repeats: int = 3,
+    ):
+        self.min_length = min_length
+        self.max_length = max_length
+        self.required_classes = tuple(required_classes)
+        self.max_repeats = max_repeats
+
+        unknown = set(self.required_classes) - set(CHARACTER_CLASSES)
+        if unknown:
+            raise ValueError(f"Unknown character classes: {', '.join(unknown)}")
+
+        # One dict lookup classifies a character
+        self._classes = {c: "uppercase" for c in string.ascii_uppercase}
+        self._classes.update({c: "lowercase" for c in string.ascii_lowercase})
+        self._classes.update({c: "digit" for c in string.digits})
+        self._classes.update({c: "special" for c in special_characters})
+
+        sequences = [s for s in forbidden_sequences if s]
+        self._sequence_regex = (
+            re.compile("|".join(map(re.escape, sequences)), re.IGNORECASE)
+            if sequences
+            else None
+        )
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> "PasswordPolicy":
+        return cls(
+            min_length=config.get("PASSWORD_MIN_LENGTH", 8),
+            max_length=config.get("PASSWORD_MAX_LENGTH", 128),
+            required_classes=_csv(
+                config.get("PASSWORD_REQUIRED_CLASSES", CHARACTER_CLASSES)
+            ),
+            special_characters=config.get(
+                "PASSWORD_SPECIAL_CHARACTERS", string.punctuation
+            ),
+            forbidden_sequences=_csv(config.get("PASSWORD_FORBIDDEN_SEQUENCES", ())),
+            max_repeats=config.get("PASSWORD_MAX_REPEATS", 3),
+        )
+
+    def check(self, password: str) -> PasswordCheck:
+        """Evaluate every rule and the strength score for a password"""
+        length = len(password)
+        classify = self._classes.get
+        present = set()
+        seen = set()
+        longest_run = run = 0
+        previous = None
+
+        for char in password:
+            char_class = classify(char)
+            if char_class is not None:
+                present.add(char_class)
+            seen.add(char)
+            run = run + 1 if char == previous else 1
+            if run > longest_run:
+                longest_run = run
+            previous = char
+
+        breached = password in breached_passwords
+        repeated = self.max_repeats > 0 and longest_run >= self.max_repeats
+
+        errors = []
+        if length < self.min_length:
+            errors.append(
+                f"Password must be at least {self.min_length} characters long"
+            )
+        if length > self.max_length:
+            errors.append(
+                f"Password must be no more than {self.max_length} characters long"
+            )
+        if breached:
+            errors.append(
+                "Password is too common. Please choose a more secure password"
+            )
+
+        missing = [
+            CLASS_REQUIREMENTS[name]
+            for name in self.required_classes
+            if name not in present
+        ]
+        if missing:
+            errors.append(f"Password must contain {', '.join(missing)}")
+
+        if self._sequence_regex is not None and self._sequence_regex.search(password):
+            errors.append(
+                "Password contains common sequences. Please choose a more complex password"
+            )
+        if repeated:
+            errors.append("Password contains too many repeated characters")
+
+        score = self._score(length, present, len(seen), breached, repeated)
+        return PasswordCheck(
+            valid=not errors,
+            errors=errors,
+            score=score,
+            strength=self._strength(score),
+            character_classes=frozenset(present),
+        )
+
+    def _score(
+        self, length: int, present, distinct: int, breached: bool, repeated: bool
+    ) -> int:
+        """Score out of 100 from the facts gathered by check()"""
+        score = 0
+        if length >= self.min_length:
+            score += 20
+            if length >= 12:
+                score += 10
+            if length >= 16:
+                score += 10
+
+        score += 15 * len(present)
+
+        if length and distinct >= length * 0.7:  # 70% unique characters
+            score += 10
+        if breached:
+            score -= 30
+        if repeated:
+            score -= 10
+
+        return max(0, min(100, score))
+
+    @staticmethod
+    def _strength(score: int) -> str:
+        for threshold, label in STRENGTH_LABELS:
+            if score < threshold:
+                return label
+        return "Very Strong"
+
+
+password_policy = PasswordPolicy.from_config(vars(Config))
@@ -2,190 +2,41 @@
 Enhanced password utilities and validation
 """
 
-import re
-from typing import List, Tuple
+import base64
+import hashlib
+import hmac
+import os
+from concurrent.futures import Future
+from typing import Dict, Iterable, List, Optional, Tuple
 
-import bcrypt
+from config import Config
+from utils.hashing_pool import hashing_pool
+from utils.password_policy import PasswordPolicy, password_policy
 
 
 class PasswordValidator:
     """Enhanced password validation with security requirements"""
 
-    def __init__(self):
-        self.MIN_LENGTH = 8
-        self.MAX_LENGTH = 128
-
-        # Password patterns
-        self.patterns = {
-            "uppercase": re.compile(r"[A-Z]"),
-            "lowercase": re.compile(r"[a-z]"),
-            "digit": re.compile(r"\d"),
-            "special": re.compile(r'[!@#$%^&*(),.?":{}|<>_\-+=\[\]\\\/~`]'),
-            "common_sequences": [
-                re.compile(r"123"),
-                re.compile(r"abc", re.IGNORECASE),
-                re.compile(r"qwe", re.IGNORECASE),
-                re.compile(r"password", re.IGNORECASE),
-                re.compile(r"admin", re.IGNORECASE),
-            ],
-        }
-
-        # Common passwords to reject
-        self.common_passwords = {
-            "password",
-            "password123",
-            "123456",
-            "123456789",
-            "qwerty",
-            "abc123",
-            "password1",
-            "admin",
-            "letmein",
-            "welcome",
-            "1234567890",
-            "qwertyuiop",
-            "asdfghjkl",
-            "zxcvbnm",
-            "iloveyou",
-            "princess",
-            "rockyou",
-            "nicole",
-            "daniel",
-            "babygirl",
-            "monkey",
-            "lovely",
-            "jessica",
-            "654321",
-            "michael",
-            "ashley",
-            "qwerty123",
-            "hello",
-            "amanda",
-            "passw0rd",
-            "12345678",
-            "superman",
-            "baseball",
-        }
+    def __init__(self, policy: Optional[PasswordPolicy] = None):
+        self.policy = policy or password_policy
+        self.MIN_LENGTH = self.policy.min_length
+        self.MAX_LENGTH = self.policy.max_length
 
     def validate_password(self, password: str) -> Tuple[bool, List[str]]:
         """
         Validate password strength
         Returns: (is_valid, list_of_errors)
         """
-        errors = []
-
-        # Length check
-        if len(password) < self.MIN_LENGTH:
-            errors.append(
-                f"Password must be at least {self.MIN_LENGTH} characters long"
-            )
-
-        if len(password) > self.MAX_LENGTH:
-            errors.append(
-                f"Password must be no more than {self.MAX_LENGTH} characters long"
-            )
-
-        # Character requirements
-        if not self.patterns["uppercase"].search(password):
-            errors.append("Password must contain at least one uppercase letter")
-
-        if not self.patterns["lowercase"].search(password):
-            errors.append("Password must contain at least one lowercase letter")
-
-        if not self.patterns["digit"].search(password):
-            errors.append("Password must contain at least one number")
-
-        if not self.patterns["special"].search(password):
-            errors.append("Password must contain at least one special character")
-
-        # Common password check
-        if password.lower() in self.common_passwords:
-            errors.append(
-                "Password is too common. Please choose a more secure password"
-            )
-
-        # Common sequence check
-        for pattern in self.patterns["common_sequences"]:
-            if pattern.search(password):
-                errors.append(
-                    "Password contains common sequences. Please choose a more complex password"
-                )
-                break
-
-        # Repeated characters check
-        if self._has_repeated_characters(password):
-            errors.append("Password contains too many repeated characters")
-
-        return len(errors) == 0, errors
-
-    def _has_repeated_characters(self, password: str, max_repeats: int = 3) -> bool:
-        """Check if password has too many repeated characters"""
-        for i in range(len(password) - max_repeats + 1):
-            char = password[i]
-            count = 1
-            for j in range(i + 1, min(i + max_repeats, len(password))):
-                if password[j] == char:
-                    count += 1
-                else:
-                    break
-            if count >= max_repeats:
-                return True
-        return False
+        result = self.policy.check(password)
+        return result.valid, result.errors
 
     def get_password_strength_score(self, password: str) -> Tuple[int, str]:
         """
         Calculate password strength score
         Returns: (score_out_of_100, strength_label)
         """
-        score = 0
-
-        # Length scoring
-        if len(password) >= self.MIN_LENGTH:
-            score += 20
-            if len(password) >= 12:
-                score += 10
-            if len(password) >= 16:
-                score += 10
-
-        # Character variety scoring
-        if self.patterns["uppercase"].search(password):
-            score += 15
-        if self.patterns["lowercase"].search(password):
-            score += 15
-        if self.patterns["digit"].search(password):
-            score += 15
-        if self.patterns["special"].search(password):
-            score += 15
-
-        # Additional complexity scoring
-        unique_chars = len(set(password))
-        if unique_chars >= len(password) * 0.7:  # 70% unique characters
-            score += 10
-
-        # Penalty for common passwords
-        if password.lower() in self.common_passwords:
-            score -= 30
-
-        # Penalty for repeated characters
-        if self._has_repeated_characters(password):
-            score -= 10
-
-        # Ensure score is within bounds
-        score = max(0, min(100, score))
-
-        # Determine strength label
-        if score < 30:
-            strength = "Very Weak"
-        elif score < 50:
-            strength = "Weak"
-        elif score < 70:
-            strength = "Fair"
-        elif score < 90:
-            strength = "Strong"
-        else:
-            strength = "Very Strong"
-
-        return score, strength
+        result = self.policy.check(password)
+        return result.score, result.strength
 
     def generate_password_suggestions(self) -> List[str]:
         """Generate password suggestions"""
@@ -222,37 +73,211 @@ class PasswordValidator:
         return suggestions
 
 
-class PasswordHasher:
-    """Enhanced password hashing utilities"""
+def _scrypt(password: bytes, salt: bytes, n: int, r: int, p: int, dklen: int) -> bytes:
+    # Room for the 128 * r * (n + p) byte working set
+    maxmem = 128 * r * (n + p) + 1024 * 1024
+    return hashlib.scrypt(
+        password, salt=salt, n=n, r=r, p=p, maxmem=maxmem, dklen=dklen
+    )
 
-    @staticmethod
-    def hash_password(password: str, rounds: int = 12) -> str:
-        """Hash password using bcrypt"""
-        salt = bcrypt.gensalt(rounds=rounds)
-        return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
 
-    @staticmethod
-    def verify_password(password: str, hashed: str) -> bool:
-        """Verify password against hash"""
-        try:
-            return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
-        except (ValueError, TypeError):
-            return False
+def _scrypt_hash(password: bytes, n: int, r: int, p: int, dklen: int) -> str:
+    salt = os.urandom(16)
+    key = _scrypt(password, salt, n, r, p, dklen)
+    return "$scrypt$ln={},r={},p={}${}${}".format(
+        n.bit_length() - 1, r, p, _b64encode(salt), _b64encode(key)
+    )
 
-    @staticmethod
-    def needs_rehash(hashed: str, rounds: int = 12) -> bool:
-        """Check if password hash needs to be updated"""
+
+def _scrypt_verify(password: bytes, hashed: str) -> bool:
+    _, _, params, salt, key = hashed.split("$")
+    settings = dict(item.split("=") for item in params.split(","))
+    expected = _b64decode(key)
+    derived = _scrypt(
+        password,
+        _b64decode(salt),
+        1 << int(settings["ln"]),
+        int(settings["r"]),
+        int(settings["p"]),
+        len(expected),
+    )
+    return hmac.compare_digest(derived, expected)
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.b64decode(data + "=" * (-len(data) % 4))
+
+
+class PasswordScheme:
+    """A password hash format, recognised by the prefix of its hashes"""
+
+    name = ""
+    prefixes: Tuple[str, ...] = ()
+
+    def identify(self, hashed: str) -> bool:
+        return hashed.startswith(self.prefixes)
+
+    def submit_hash(self, password: str) -> Future:
+        """Hash on the hashing pool; the future resolves to the encoded hash"""
+        raise NotImplementedError
+
+    def submit_verify(self, password: str, hashed: str) -> Future:
+        """Verify on the hashing pool; the future resolves to a bool"""
+        raise NotImplementedError
+
+    def needs_update(self, hashed: str) -> bool:
+        """Check if the hash was made with other parameters than the current ones"""
+        raise NotImplementedError
+
+
+class BcryptScheme(PasswordScheme):
+    """
+    bcrypt at the hashing pool's (possibly calibrated) cost.
+
+    Hashes are upgraded when cheaper than this node's cost or dearer than
+    max_rounds, but not on any difference: nodes calibrated to different
+    costs would otherwise rehash the same users back and forth. A pinned
+    cost is the same on every node, so any other cost is rehashed to it,
+    downgrades included.
+    """
+
+    name = "bcrypt"
+    prefixes = ("$2b$", "$2a$", "$2y$")
+
+    def __init__(self, max_rounds: Optional[int] = None):
+        self.max_rounds = max_rounds
+
+    def submit_hash(self, password: str) -> Future:
+        return hashing_pool.submit_hash(password)
+
+    def submit_verify(self, password: str, hashed: str) -> Future:
+        return hashing_pool.submit_verify(password, hashed)
+
+    def needs_update(self, hashed: str) -> bool:
         try:
             # Extract rounds from hash
             parts = hashed.split("$")
-            if len(parts) >= 3 and parts[1] == "2b":
-                current_rounds = int(parts[2])
-                return current_rounds < rounds
+            if parts[1] == "2b":
+                rounds = int(parts[2])
+                if hashing_pool.pin_rounds:
+                    return rounds != hashing_pool.rounds
+                if rounds < hashing_pool.rounds:
+                    return True
+                return self.max_rounds is not None and rounds > max(
+                    self.max_rounds, hashing_pool.rounds
+                )
         except (ValueError, IndexError):
             pass
         return True
 
 
+class ScryptScheme(PasswordScheme):
+    """
+    hashlib.scrypt with tunable cost (n), block size (r) and parallelism (p).
+
+    Hashes look like $scrypt$ln=14,r=8,p=1$<salt>$<key>, so parameters can be
+    changed without invalidating existing hashes.
+    """
+
+    name = "scrypt"
+    prefixes = ("$scrypt$",)
+
+    def __init__(self, n: int = 16384, r: int = 8, p: int = 1, dklen: int = 32):
+        if n < 2 or n & (n - 1):
+            raise ValueError(f"scrypt n must be a power of two, got {n}")
+        self.n = n
+        self.r = r
+        self.p = p
+        self.dklen = dklen
+
+    def submit_hash(self, password: str) -> Future:
+        return hashing_pool.submit(
+            _scrypt_hash, password.encode("utf-8"), self.n, self.r, self.p, self.dklen
+        )
+
+    def submit_verify(self, password: str, hashed: str) -> Future:
+        return hashing_pool.submit(_scrypt_verify, password.encode("utf-8"), hashed)
+
+    def needs_update(self, hashed: str) -> bool:
+        params = f"ln={self.n.bit_length() - 1},r={self.r},p={self.p}"
+        parts = hashed.split("$")
+        return len(parts) != 5 or parts[2] != params
+
+
+class PasswordHasher:
+    """
+    Registry of password hash schemes.
+
+    New hashes use the preferred scheme; existing hashes are verified with
+    whichever registered scheme their prefix identifies, and needs_rehash()
+    reports those that should be upgraded on the next login.
+    """
+
+    def __init__(self, schemes: Iterable[PasswordScheme] = (), preferred: str = ""):
+        self.schemes: Dict[str, PasswordScheme] = {}
+        for scheme in schemes:
+            self.register(scheme)
+        self.preferred = preferred or next(iter(self.schemes), "")
+
+    def register(self, scheme: PasswordScheme):
+        self.schemes[scheme.name] = scheme
+
+    @property
+    def preferred_scheme(self) -> PasswordScheme:
+        scheme = self.schemes.get(self.preferred)
+        if scheme is None:
+            raise ValueError(f"Unknown password hash scheme: {self.preferred}")
+        return scheme
+
+    def identify(self, hashed: str) -> Optional[PasswordScheme]:
+        """Find the scheme a stored hash was made with"""
+        if not isinstance(hashed, str):
+            return None
+        for scheme in self.schemes.values():
+            if scheme.identify(hashed):
+                return scheme
+        return None
+
+    def submit_hash(self, password: str) -> Future:
+        return self.preferred_scheme.submit_hash(password)
+
+    def hash_password(self, password: str) -> str:
+        """Hash password with the preferred scheme (on the hashing pool)"""
+        return self.result(self.submit_hash(password))
+
+    @staticmethod
+    def result(future: Future):
+        """Wait for a hashing job, bounded by the pool timeout"""
+        return future.result(timeout=hashing_pool.timeout)
+
+    def verify_password(self, password: str, hashed: str) -> bool:
+        """Verify password against a hash of any registered scheme"""
+        scheme = self.identify(hashed)
+        if scheme is None:
+            return False
+        try:
+            return self.result(scheme.submit_verify(password, hashed))
+        except (ValueError, TypeError, KeyError):
+            return False
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """Check if the hash is not in the preferred scheme at its current parameters"""
+        scheme = self.identify(hashed)
+        if scheme is not self.preferred_scheme:
+            return True
+        return scheme.needs_update(hashed)
+
+
 # Global instances
 password_validator = PasswordValidator()
-password_hasher = PasswordHasher()
+password_hasher = PasswordHasher(
+    schemes=[
+        BcryptScheme(max_rounds=Config.BCRYPT_MAX_ROUNDS),
+        ScryptScheme(n=Config.SCRYPT_N, r=Config.SCRYPT_R, p=Config.SCRYPT_P),
+    ],
+    preferred=Config.PASSWORD_HASH_SCHEME,
+)
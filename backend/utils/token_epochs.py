@@ -0,0 +1,94 @@
+"""
+Revocation epochs for stateless access tokens
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Tuple
+
+from flask import current_app
+
+from utils.database import get_db
+
+logger = logging.getLogger(__name__)
+
+
+class TokenEpochTable:
+    """
+    In-memory map of recently bumped per-user token epochs.
+
+    An access token is revoked when its token_epoch claim is lower than the
+    user's current epoch. Only users bumped within the access token lifetime
+    can still hold such a token, so the table only keeps those and reloads them
+    from the users collection every refresh_interval seconds. Other workers
+    therefore observe a revocation within one refresh interval.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # user_id -> (epoch, bumped_at)
+        self._epochs: Dict[str, Tuple[int, datetime]] = {}
+        self._last_refresh = None
+
+    def _retention(self) -> timedelta:
+        """Access token lifetime plus a minute of clock skew"""
+        return timedelta(seconds=current_app.config["JWT_ACCESS_TOKEN_EXPIRES"] + 60)
+
+    def _refresh_if_stale(self):
+        """Reload recent bumps from the users collection once per interval"""
+        interval = current_app.config.get("TOKEN_EPOCH_REFRESH_INTERVAL", 30)
+        now = time.monotonic()
+        if self._last_refresh is not None and now - self._last_refresh < interval:
+            return
+
+        with self._lock:
+            if self._last_refresh is not None and now - self._last_refresh < interval:
+                return
+            self._last_refresh = now
+
+        try:
+            cutoff = datetime.now(timezone.utc) - self._retention()
+            cursor = get_db().users.find(
+                {"token_epoch_updated_at": {"$gte": cutoff}},
+                {"_id": 1, "token_epoch": 1, "token_epoch_updated_at": 1},
+            )
+            for doc in cursor:
+                self.record(
+                    str(doc["_id"]), doc["token_epoch"], doc["token_epoch_updated_at"]
+                )
+            self._prune(cutoff)
+        except Exception as e:
+            # Keep serving from the last known map
+            logger.error(f"Token epoch refresh error: {str(e)}")
+
+    def _prune(self, cutoff: datetime):
+        with self._lock:
+            for user_id in [
+                user_id
+                for user_id, (_, bumped_at) in self._epochs.items()
+                if bumped_at.replace(tzinfo=timezone.utc) < cutoff
+            ]:
+                del self._epochs[user_id]
+
+    def record(self, user_id: str, epoch: int, bumped_at: datetime = None):
+        """Remember a user's epoch, keeping the highest one seen"""
+        bumped_at = bumped_at or datetime.now(timezone.utc)
+        with self._lock:
+            current = self._epochs.get(user_id)
+            if current is None or epoch >= current[0]:
+                self._epochs[user_id] = (epoch, bumped_at)
+
+    def is_current(self, user_id: str, epoch: int) -> bool:
+        """Check that a token's epoch has not been superseded"""
+        self._refresh_if_stale()
+        current = self._epochs.get(str(user_id))
+        return current is None or epoch >= current[0]
+
+    def __len__(self) -> int:
+        return len(self._epochs)
+
+
+# Global epoch table
+token_epochs = TokenEpochTable()
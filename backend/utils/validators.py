@@ -7,6 +7,8 @@ from typing import Any, Dict
 
 import email_validator
 
+from utils.password_policy import password_policy
+
 
 class InputValidator:
     """Comprehensive input validation for API requests"""
@@ -67,13 +69,13 @@ class InputValidator:
         if not isinstance(password, str):
             return {"valid": False, "error": "Password must be a string"}
 
-        if len(password) < 8:
+        if len(password) < password_policy.min_length:
             return {
                 "valid": False,
-                "error": "Password must be at least 8 characters long",
+                "error": f"Password must be at least {password_policy.min_length} characters long",
             }
 
-        if len(password) > 128:
+        if len(password) > password_policy.max_length:
             return {"valid": False, "error": "Password is too long"}
 
         return {"valid": True, "value": password}